@@ -1,8 +1,22 @@
+import os
+import time
+import uuid
+import hashlib
+import tempfile
 import streamlit as st
 import pandas as pd
 from datetime import datetime
 from io import BytesIO
 from cnab_engine import GeradorCNAB
+from fontes_dados import formato_arquivo, ler_dataframe, ler_dataframes
+from validacao import obrigatorias_ausentes, validar_dataframe, resumir_validacao
+from planejador import ESTRATEGIA_MEMORIA, MEMORIA_BASE_MB, planejar_execucao, gerar_remessa
+from manifesto import ManifestoRemessa
+from cache_sessao import CacheSessao, LIMITE_MEMORIA_MB, LIMITE_DISCO_MB
+from metricas import (
+    gravar_textfile, iniciar_servidor_metricas, medir_etapa, observar_etapa,
+    registrar_arquivo, registrar_cache, registrar_erro_linha, registrar_falha
+)
 
 
 def check_password():
@@ -74,6 +88,177 @@ def check_password():
     st.stop()
 
 
+def obter_configuracao_mb(chave: str, variavel: str, padrao: float) -> float:
+    
+    try:
+        return float(st.secrets.get(chave, os.environ.get(variavel, padrao)))
+    except Exception:
+        return float(os.environ.get(variavel, padrao))
+
+
+def obter_limite_memoria_mb() -> float:
+    
+    return obter_configuracao_mb("max_memory_mb", "CNAB_MAX_MEMORY_MB", 1024)
+
+
+@st.cache_resource
+def obter_cache_sessoes() -> CacheSessao:
+    
+    return CacheSessao(
+        limite_memoria_mb=obter_configuracao_mb("cache_memoria_mb", "CNAB_CACHE_MEMORIA_MB", LIMITE_MEMORIA_MB),
+        limite_disco_mb=obter_configuracao_mb("cache_disco_mb", "CNAB_CACHE_DISCO_MB", LIMITE_DISCO_MB),
+    )
+
+
+@st.cache_resource
+def iniciar_metricas():
+    
+    registrar_cache(obter_cache_sessoes())
+    
+    porta = os.environ.get("CNAB_METRICAS_PORTA")
+    if porta:
+        return iniciar_servidor_metricas(os.environ.get("CNAB_METRICAS_HOST", "127.0.0.1"), int(porta))
+    return None
+
+
+def publicar_metricas():
+    
+    caminho = os.environ.get("CNAB_METRICAS_ARQUIVO")
+    if caminho:
+        try:
+            gravar_textfile(caminho)
+        except OSError as e:
+            st.warning(f"⚠️ Não foi possível gravar as métricas em {caminho}: {e}")
+
+
+def chave_sessao(*partes) -> str:
+    
+    if "id_sessao" not in st.session_state:
+        st.session_state.id_sessao = uuid.uuid4().hex
+    
+    return ":".join([st.session_state.id_sessao, *map(str, partes)])
+
+
+def exibir_manifesto(manifesto: ManifestoRemessa, nome_arquivo_saida: str):
+    
+    st.markdown("---")
+    st.subheader("🧾 Manifesto de Controle")
+    
+    col_man1, col_man2, col_man3, col_man4 = st.columns(4)
+    with col_man1:
+        st.metric("Detalhes", f"{manifesto.registros:,}")
+    with col_man2:
+        st.metric("Valor Nominal", f"R$ {manifesto.totais['VALOR_NOMINAL'] / 100:,.2f}")
+    with col_man3:
+        st.metric("Valor Presente", f"R$ {manifesto.totais['VALOR_PRESENTE'] / 100:,.2f}")
+    with col_man4:
+        st.metric("Valor de Aquisição", f"R$ {manifesto.totais['VALOR_AQUISICAO'] / 100:,.2f}")
+    
+    st.write(f"**SHA-256:** `{manifesto.sha256}`")
+    
+    with st.expander(f"🏢 Subtotais por cedente ({len(manifesto.cedentes):,})"):
+        st.dataframe(pd.DataFrame(manifesto.subtotais_cedentes()), use_container_width=True)
+    
+    st.download_button(
+        label="⬇️ Baixar Manifesto (.json)",
+        data=manifesto.para_json(arquivo=nome_arquivo_saida).encode('utf-8'),
+        file_name=nome_arquivo_saida.rsplit(".", 1)[0] + ".manifesto.json",
+        mime="application/json",
+        use_container_width=True
+    )
+
+
+def exibir_geracao_planejada(arquivo_upload, plano, cod_originador: str, razao_social: str,
+                             numero_banco: str, nome_banco: str, seq_arquivo: int,
+                             coobrigacao: str, tipo_baixa: str):
+    
+    st.warning(
+        f"⚠️ Arquivo grande para a memória disponível: a geração será feita em modo "
+        f"**{plano.estrategia}**, sem prévia nem pré-validação dos dados."
+    )
+    
+    col_info1, col_info2, col_info3 = st.columns(3)
+    with col_info1:
+        st.metric("Registros Estimados", f"{plano.registros_estimados:,}")
+    with col_info2:
+        st.metric("Tamanho Estimado (.REM)", f"{plano.tamanho_saida_bytes:,} bytes")
+    with col_info3:
+        st.metric("Processos", plano.processos)
+    
+    limite_memoria_mb = obter_limite_memoria_mb()
+    if plano.memoria_estimada_mb > limite_memoria_mb:
+        st.error(
+            f"❌ O download mantém o arquivo .REM em memória "
+            f"({plano.tamanho_saida_bytes / (1024 * 1024):,.0f} MB) e a geração excederia o limite de "
+            f"{limite_memoria_mb:,.0f} MB. Gere a remessa pela linha de comando com `planejador.py`."
+        )
+        return
+    
+    st.markdown("---")
+    st.header("🚀 Geração do Arquivo CNAB")
+    
+    col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
+    with col_btn2:
+        gerar_cnab = st.button(
+            "🎯 Gerar Arquivo .REM",
+            type="primary",
+            use_container_width=True
+        )
+    
+    if not gerar_cnab:
+        return
+    
+    campos_obrigatorios = [
+        (cod_originador, "o Código do Originador"),
+        (razao_social, "a Razão Social"),
+        (numero_banco, "o Número do Banco"),
+        (nome_banco, "o Nome do Banco"),
+    ]
+    for valor, descricao in campos_obrigatorios:
+        if not valor or not valor.strip():
+            st.error(f"❌ Por favor, informe {descricao} na sidebar!")
+            st.stop()
+    
+    try:
+        with st.spinner(f"⏳ Gerando arquivo CNAB (modo {plano.estrategia})..."):
+            with tempfile.TemporaryDirectory() as diretorio:
+                caminho_saida = os.path.join(diretorio, "remessa.REM")
+                arquivo_upload.seek(0)
+                manifesto = ManifestoRemessa()
+                
+                gerar_remessa(
+                    arquivo_upload, arquivo_upload.name, caminho_saida,
+                    cod_originador, razao_social, numero_banco, nome_banco,
+                    seq_arquivo, coobrigacao, tipo_baixa, plano=plano, manifesto=manifesto
+                )
+                
+                total_registros = (os.path.getsize(caminho_saida) + 2) // 446
+                nome_arquivo_saida = f"REMESSA_{datetime.now().strftime('%Y%m%d_%H%M%S')}.REM"
+                
+                st.success("✅ Arquivo CNAB gerado com sucesso!")
+                st.metric("📦 Total", f"{total_registros:,} registros")
+                
+                with open(caminho_saida, 'rb') as arquivo_saida:
+                    st.download_button(
+                        label="⬇️ Baixar Arquivo CNAB (.REM)",
+                        data=arquivo_saida,
+                        file_name=nome_arquivo_saida,
+                        mime="text/plain",
+                        use_container_width=True
+                    )
+                
+                exibir_manifesto(manifesto, nome_arquivo_saida)
+        
+        publicar_metricas()
+    
+    except Exception as e:
+        publicar_metricas()
+        st.error(f"❌ Erro ao gerar arquivo CNAB: {str(e)}")
+        with st.expander("🔍 Detalhes do erro"):
+            import traceback
+            st.code(traceback.format_exc())
+
+
 def main():
     
     st.set_page_config(
@@ -83,6 +268,7 @@ def main():
         initial_sidebar_state="expanded"
     )
     
+    iniciar_metricas()
     check_password()
     
     with st.sidebar:
@@ -92,6 +278,7 @@ def main():
         st.markdown("---")
         
         if st.button("🚪 Sair", type="secondary", use_container_width=True):
+            obter_cache_sessoes().remover_prefixo(chave_sessao())
             st.session_state.authenticated = False
             st.rerun()
         
@@ -170,26 +357,95 @@ def main():
     
     st.header("📁 Upload do Arquivo de Dados")
     
-    arquivo_upload = st.file_uploader(
-        "Selecione o arquivo com os dados (Excel ou CSV)",
-        type=['xlsx', 'xls', 'csv'],
-        help="Formatos aceitos: Excel (.xlsx, .xls) ou CSV (.csv)"
-    )
+    arquivos_upload = st.file_uploader(
+        "Selecione os arquivos com os dados (Excel ou CSV)",
+        type=['xlsx', 'xls', 'csv', 'parquet'],
+        accept_multiple_files=True,
+        help="Formatos aceitos: Excel (.xlsx, .xls), CSV (.csv) ou Parquet (.parquet). "
+             "Vários arquivos com as mesmas colunas são unidos em uma única remessa."
+    ) or []
     
+    arquivo_upload = arquivos_upload[0] if len(arquivos_upload) == 1 else None
+    
+    plano = None
+    memoria_excedida = False
     if arquivo_upload is not None:
+        try:
+            formato_arquivo(arquivo_upload.name)
+            plano = planejar_execucao(
+                arquivo_upload, arquivo_upload.name, obter_limite_memoria_mb(), saida_em_memoria=True
+            )
+        except Exception:
+            plano = None
+    
+    elif arquivos_upload:
+        try:
+            limite_memoria_mb = obter_limite_memoria_mb()
+            planos = [planejar_execucao(arquivo, arquivo.name, limite_memoria_mb) for arquivo in arquivos_upload]
+            memoria_conjunta_mb = MEMORIA_BASE_MB + sum(p.memoria_estimada_mb - MEMORIA_BASE_MB for p in planos)
+            memoria_excedida = (
+                any(p.estrategia != ESTRATEGIA_MEMORIA for p in planos)
+                or memoria_conjunta_mb > limite_memoria_mb
+            )
+        except Exception:
+            memoria_excedida = False
+    
+    if plano is not None and plano.estrategia != ESTRATEGIA_MEMORIA:
         st.success(f"✅ Arquivo carregado: **{arquivo_upload.name}**")
+        exibir_geracao_planejada(
+            arquivo_upload, plano, cod_originador, razao_social, numero_banco,
+            nome_banco, seq_arquivo, coobrigacao, tipo_baixa
+        )
+    
+    elif plano is not None and plano.memoria_estimada_mb > obter_limite_memoria_mb():
+        st.error(
+            f"❌ Arquivos {formato_arquivo(arquivo_upload.name)} são lidos inteiros em memória "
+            f"(~{plano.memoria_estimada_mb:,.0f} MB estimados) e excederiam o limite de "
+            f"{obter_limite_memoria_mb():,.0f} MB. Converta para CSV ou xlsx para usar a geração em streaming."
+        )
+    
+    elif memoria_excedida:
+        st.error(
+            "❌ Os arquivos juntos excedem a memória disponível. "
+            "Envie um arquivo por vez para usar a geração em streaming."
+        )
+    
+    elif arquivos_upload:
+        if arquivo_upload is not None:
+            st.success(f"✅ Arquivo carregado: **{arquivo_upload.name}**")
+        else:
+            nomes_arquivos = ", ".join(arquivo.name for arquivo in arquivos_upload)
+            st.success(f"✅ {len(arquivos_upload)} arquivos carregados: **{nomes_arquivos}**")
         
         try:
-            with st.spinner("⏳ Carregando dados..."):
-                nome_arquivo = arquivo_upload.name.lower()
+            cache = obter_cache_sessoes()
+            assinatura = hashlib.sha1("|".join(
+                f"{getattr(arquivo, 'file_id', arquivo.name)}:{arquivo.name}:{arquivo.size}"
+                for arquivo in arquivos_upload
+            ).encode('utf-8')).hexdigest()
+            
+            chave_dados = chave_sessao("dados", assinatura)
+            df = cache.obter(chave_dados)
+            
+            if df is None:
+                with st.spinner("⏳ Carregando dados..."):
+                    try:
+                        for arquivo in arquivos_upload:
+                            formato_arquivo(arquivo.name)
+                    except ValueError:
+                        st.error("❌ Formato de arquivo não suportado!")
+                        st.stop()
+                    
+                    with medir_etapa('leitura'):
+                        if arquivo_upload is not None:
+                            df = ler_dataframe(arquivo_upload, arquivo_upload.name)
+                        else:
+                            df = ler_dataframes([(arquivo, arquivo.name) for arquivo in arquivos_upload])
                 
-                if nome_arquivo.endswith('.csv'):
-                    df = pd.read_csv(arquivo_upload)
-                elif nome_arquivo.endswith(('.xlsx', '.xls')):
-                    df = pd.read_excel(arquivo_upload)
-                else:
-                    st.error("❌ Formato de arquivo não suportado!")
-                    st.stop()
+                cache.remover_prefixo(chave_sessao("dados"))
+                cache.remover_prefixo(chave_sessao("validacao"))
+                cache.remover_prefixo(chave_sessao("remessa"))
+                cache.guardar(chave_dados, df)
             
             st.markdown("---")
             st.header("📊 Prévia dos Dados")
@@ -200,7 +456,7 @@ def main():
             with col_info2:
                 st.metric("Total de Colunas", len(df.columns))
             with col_info3:
-                st.metric("Tamanho", f"{arquivo_upload.size:,} bytes")
+                st.metric("Tamanho", f"{sum(arquivo.size for arquivo in arquivos_upload):,} bytes")
             
             st.subheader("🔍 Primeiras 5 linhas")
             st.dataframe(df.head(5), use_container_width=True)
@@ -219,12 +475,89 @@ def main():
                 
                 st.markdown("---")
                 st.write("**Colunas esperadas pelo sistema:**")
+                ausentes = obrigatorias_ausentes(df.columns)
                 for col in colunas_necessarias:
                     if col in df.columns:
                         st.write(f"  ✅ {col}")
+                    elif col in ausentes:
+                        st.write(f"  ❌ {col} (obrigatória)")
                     else:
                         st.write(f"  ⚠️ {col} (opcional)")
             
+            st.markdown("---")
+            st.header("👁️ Prévia do Arquivo CNAB")
+            
+            col_prev1, col_prev2, col_prev3 = st.columns([2, 1, 1])
+            with col_prev1:
+                modo_previa = st.radio(
+                    "Registros exibidos",
+                    options=["Primeiros registros", "Amostra aleatória"],
+                    horizontal=True
+                )
+            with col_prev2:
+                quantidade_previa = st.number_input(
+                    "Quantidade", min_value=1, max_value=100, value=10, step=1
+                )
+            with col_prev3:
+                if "semente_previa" not in st.session_state:
+                    st.session_state.semente_previa = 0
+                if st.button("🎲 Nova amostra", disabled=modo_previa != "Amostra aleatória", use_container_width=True):
+                    st.session_state.semente_previa += 1
+            
+            gerador_previa = GeradorCNAB()
+            previa = gerador_previa.gerar_previa(
+                df, int(quantidade_previa), modo_previa == "Amostra aleatória",
+                st.session_state.semente_previa, coobrigacao, tipo_baixa
+            )
+            
+            st.caption(
+                f"Formatados sob demanda {len(previa)} de {len(df):,} detalhes, "
+                f"com os parâmetros atuais da sidebar"
+            )
+            header_previa = gerador_previa.gerar_header(
+                cod_originador, razao_social, numero_banco, nome_banco, seq_arquivo
+            )
+            st.text(f"00001 (Header): {header_previa}")
+            for sequencial_registro, detalhe, erro in previa:
+                if erro:
+                    st.warning(f"Linha {sequencial_registro}: {erro}")
+                else:
+                    st.text(f"{sequencial_registro:05d} (Detalhe): {detalhe}")
+            
+            st.markdown("---")
+            st.header("🧪 Pré-validação")
+            
+            chave_validacao = chave_sessao("validacao", assinatura)
+            relatorio_validacao = cache.obter(chave_validacao)
+            
+            if relatorio_validacao is None:
+                with st.spinner("⏳ Validando dados..."), medir_etapa('validacao'):
+                    relatorio_validacao = validar_dataframe(df)
+                cache.guardar(chave_validacao, relatorio_validacao)
+            
+            ignorar_validacao = False
+            
+            if relatorio_validacao.empty:
+                st.success("✅ Nenhum problema encontrado na pré-validação")
+            else:
+                linhas_com_erro = relatorio_validacao['LINHA'].dropna().nunique()
+                st.error(
+                    f"❌ {len(relatorio_validacao):,} problemas encontrados "
+                    f"em {linhas_com_erro:,} linhas"
+                )
+                
+                st.dataframe(resumir_validacao(relatorio_validacao), use_container_width=True)
+                
+                with st.expander("📋 Problemas por linha"):
+                    st.dataframe(relatorio_validacao.head(1000), use_container_width=True)
+                    if len(relatorio_validacao) > 1000:
+                        st.caption(f"Exibindo 1.000 de {len(relatorio_validacao):,} problemas")
+                
+                ignorar_validacao = st.checkbox(
+                    "⚠️ Gerar mesmo com problemas na pré-validação",
+                    value=False
+                )
+            
             st.markdown("---")
             
             st.header("🚀 Geração do Arquivo CNAB")
@@ -255,110 +588,145 @@ def main():
                     st.error("❌ Por favor, informe o Nome do Banco na sidebar!")
                     st.stop()
                 
+                if not relatorio_validacao.empty and not ignorar_validacao:
+                    st.error("❌ Corrija os problemas da pré-validação ou marque a opção para gerar mesmo assim!")
+                    st.stop()
+                
                 try:
-                    with st.spinner("⏳ Gerando arquivo CNAB..."):
-                        gerador = GeradorCNAB()
-                        
-                        header = gerador.gerar_header(
-                            cod_originador=cod_originador,
-                            razao_social=razao_social,
-                            numero_banco=numero_banco,
-                            nome_banco=nome_banco,
-                            seq_arquivo=seq_arquivo
-                        )
-                        
-                        linhas = [header]
-                        
-                        total_detalhes = 0
-                        erros = []
-                        
-                        progress_bar = st.progress(0)
-                        status_text = st.empty()
-                        
-                        for idx, row in df.iterrows():
-                            try:
-                                sequencial_registro = idx + 2
-                                detalhe = gerador.gerar_detalhe(row, sequencial_registro, coobrigacao, tipo_baixa)
-                                linhas.append(detalhe)
-                                total_detalhes += 1
-                                
-                                progress = (idx + 1) / len(df)
-                                progress_bar.progress(progress)
-                                status_text.text(f"Processando registro {idx + 1} de {len(df)}...")
+                    parametros_remessa = (
+                        cod_originador, razao_social, numero_banco, nome_banco,
+                        seq_arquivo, coobrigacao, tipo_baixa
+                    )
+                    chave_remessa = chave_sessao("remessa", assinatura, hashlib.sha1(
+                        repr(parametros_remessa).encode('utf-8')
+                    ).hexdigest())
+                    conteudo_bytes = cache.obter(chave_remessa)
+                    resumo = cache.obter(chave_remessa + ":resumo")
+                    
+                    if conteudo_bytes is None or resumo is None:
+                        with st.spinner("⏳ Gerando arquivo CNAB..."):
+                            gerador = GeradorCNAB()
+                            
+                            header = gerador.gerar_header(
+                                cod_originador=cod_originador,
+                                razao_social=razao_social,
+                                numero_banco=numero_banco,
+                                nome_banco=nome_banco,
+                                seq_arquivo=seq_arquivo
+                            )
+                            
+                            linhas = [header]
+                            
+                            total_detalhes = 0
+                            erros = []
+                            manifesto = ManifestoRemessa()
+                            
+                            progress_bar = st.progress(0)
+                            status_text = st.empty()
+                            inicio_formatacao = time.perf_counter()
+                            
+                            for idx, row in df.iterrows():
+                                try:
+                                    sequencial_registro = idx + 2
+                                    detalhe = gerador.gerar_detalhe(row, sequencial_registro, coobrigacao, tipo_baixa)
+                                    linhas.append(detalhe)
+                                    manifesto.registrar_detalhe(detalhe)
+                                    total_detalhes += 1
+                                    
+                                    progress = (idx + 1) / len(df)
+                                    progress_bar.progress(progress)
+                                    status_text.text(f"Processando registro {idx + 1} de {len(df)}...")
                                 
-                            except Exception as e:
-                                erros.append(f"Linha {idx + 2}: {str(e)}")
-                        
-                        progress_bar.empty()
-                        status_text.empty()
-                        
-                        total_registros = len(linhas) + 1
-                        trailer = gerador.gerar_trailer(total_registros)
-                        linhas.append(trailer)
-                        
-                        conteudo_cnab = "\r\n".join(linhas)
-                        
-                        st.success("✅ Arquivo CNAB gerado com sucesso!")
-                        
-                        col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
-                        with col_stat1:
-                            st.metric("📝 Header", "1 registro")
-                        with col_stat2:
-                            st.metric("📋 Detalhes", f"{total_detalhes} registros")
-                        with col_stat3:
-                            st.metric("📊 Trailer", "1 registro")
-                        with col_stat4:
-                            st.metric("📦 Total", f"{total_registros} registros")
-                        
-                        if erros:
-                            with st.expander(f"⚠️ Avisos/Erros ({len(erros)} encontrados)"):
-                                for erro in erros:
-                                    st.warning(erro)
-                        
-                        nome_arquivo_saida = f"REMESSA_{datetime.now().strftime('%Y%m%d_%H%M%S')}.REM"
-                        
-                        conteudo_bytes = conteudo_cnab.encode('latin-1')
-                        
-                        st.markdown("---")
-                        st.subheader("💾 Download do Arquivo")
+                                except Exception as e:
+                                    registrar_erro_linha(e)
+                                    erros.append(f"Linha {idx + 2}: {str(e)}")
+                            
+                            segundos_formatacao = time.perf_counter() - inicio_formatacao
+                            progress_bar.empty()
+                            status_text.empty()
+                            
+                            total_registros = len(linhas) + 1
+                            trailer = gerador.gerar_trailer(total_registros)
+                            linhas.append(trailer)
+                            
+                            conteudo_bytes = "\r\n".join(linhas).encode('latin-1')
+                            del linhas
+                            manifesto.registrar_saida(conteudo_bytes)
+                            
+                            observar_etapa('formatacao', segundos_formatacao)
+                            registrar_arquivo('app', total_detalhes, segundos_formatacao)
+                            publicar_metricas()
                         
-                        col_down1, col_down2, col_down3 = st.columns([1, 2, 1])
-                        with col_down2:
-                            st.download_button(
-                                label="⬇️ Baixar Arquivo CNAB (.REM)",
-                                data=conteudo_bytes,
-                                file_name=nome_arquivo_saida,
-                                mime="text/plain",
-                                use_container_width=True
-                            )
+                        resumo = (total_detalhes, total_registros, erros, manifesto)
+                        cache.remover_prefixo(chave_sessao("remessa"))
+                        cache.guardar(chave_remessa, conteudo_bytes)
+                        cache.guardar(chave_remessa + ":resumo", resumo)
+                    
+                    total_detalhes, total_registros, erros, manifesto = resumo
+                    
+                    st.success("✅ Arquivo CNAB gerado com sucesso!")
+                    
+                    col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
+                    with col_stat1:
+                        st.metric("📝 Header", "1 registro")
+                    with col_stat2:
+                        st.metric("📋 Detalhes", f"{total_detalhes} registros")
+                    with col_stat3:
+                        st.metric("📊 Trailer", "1 registro")
+                    with col_stat4:
+                        st.metric("📦 Total", f"{total_registros} registros")
+                    
+                    if erros:
+                        with st.expander(f"⚠️ Avisos/Erros ({len(erros)} encontrados)"):
+                            for erro in erros:
+                                st.warning(erro)
+                    
+                    nome_arquivo_saida = f"REMESSA_{datetime.now().strftime('%Y%m%d_%H%M%S')}.REM"
+                    
+                    st.markdown("---")
+                    st.subheader("💾 Download do Arquivo")
+                    
+                    col_down1, col_down2, col_down3 = st.columns([1, 2, 1])
+                    with col_down2:
+                        st.download_button(
+                            label="⬇️ Baixar Arquivo CNAB (.REM)",
+                            data=bytes(conteudo_bytes),
+                            file_name=nome_arquivo_saida,
+                            mime="text/plain",
+                            use_container_width=True
+                        )
+                    
+                    exibir_manifesto(manifesto, nome_arquivo_saida)
+                    
+                    with st.expander("👁️ Prévia do Arquivo CNAB (primeiras 10 linhas)"):
+                        linhas_preview = bytes(conteudo_bytes[:446 * 10]).decode('latin-1').split("\r\n")[:10]
+                        for i, linha in enumerate(linhas_preview, 1):
+                            tipo = "Header" if linha[0] == "0" else "Detalhe" if linha[0] == "1" else "Trailer"
+                            st.text(f"{i:02d} ({tipo}): {linha}")
+                    
+                    with st.expander("ℹ️ Informações do Arquivo"):
+                        info_col1, info_col2 = st.columns(2)
                         
-                        with st.expander("👁️ Prévia do Arquivo CNAB (primeiras 10 linhas)"):
-                            linhas_preview = linhas[:10]
-                            for i, linha in enumerate(linhas_preview, 1):
-                                tipo = "Header" if linha[0] == "0" else "Detalhe" if linha[0] == "1" else "Trailer"
-                                st.text(f"{i:02d} ({tipo}): {linha}")
+                        with info_col1:
+                            st.write(f"**Nome do arquivo:** {nome_arquivo_saida}")
+                            st.write(f"**Tamanho:** {len(conteudo_bytes):,} bytes")
+                            st.write(f"**Encoding:** latin-1 (padrão bancário)")
+                            st.write(f"**Caracteres por linha:** 444")
+                            st.write(f"**Quebra de linha:** \\r\\n")
                         
-                        with st.expander("ℹ️ Informações do Arquivo"):
-                            info_col1, info_col2 = st.columns(2)
-                            
-                            with info_col1:
-                                st.write(f"**Nome do arquivo:** {nome_arquivo_saida}")
-                                st.write(f"**Tamanho:** {len(conteudo_bytes):,} bytes")
-                                st.write(f"**Encoding:** latin-1 (padrão bancário)")
-                                st.write(f"**Caracteres por linha:** 444")
-                                st.write(f"**Quebra de linha:** \\r\\n")
-                            
-                            with info_col2:
-                                st.write(f"**Data de geração:** {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-                                st.write(f"**Código Originador:** {cod_originador}")
-                                st.write(f"**Razão Social:** {razao_social}")
-                                st.write(f"**Banco:** {numero_banco} - {nome_banco}")
-                                st.write(f"**Sequencial:** {seq_arquivo}")
-                                st.write(f"**Coobrigação:** {coobrigacao}")
-                                st.write(f"**Tipo de Baixa:** {'Baixa Total' if tipo_baixa == 'TOTAL' else 'Baixa Parcial'}")
-                                st.write(f"**Total de registros:** {total_registros}")
+                        with info_col2:
+                            st.write(f"**Data de geração:** {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+                            st.write(f"**Código Originador:** {cod_originador}")
+                            st.write(f"**Razão Social:** {razao_social}")
+                            st.write(f"**Banco:** {numero_banco} - {nome_banco}")
+                            st.write(f"**Sequencial:** {seq_arquivo}")
+                            st.write(f"**Coobrigação:** {coobrigacao}")
+                            st.write(f"**Tipo de Baixa:** {'Baixa Total' if tipo_baixa == 'TOTAL' else 'Baixa Parcial'}")
+                            st.write(f"**Total de registros:** {total_registros}")
                 
                 except Exception as e:
+                    registrar_falha('app', e)
+                    publicar_metricas()
                     st.error(f"❌ Erro ao gerar arquivo CNAB: {str(e)}")
                     with st.expander("🔍 Detalhes do erro"):
                         import traceback
@@ -0,0 +1,217 @@
+import os
+import mmap
+import pickle
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+
+LIMITE_MEMORIA_MB = 256
+LIMITE_DISCO_MB = 4096
+TIPOS_OBJETO_ARROW = {'string', 'bytes', 'date'}
+
+
+class EntradaDisco(NamedTuple):
+    caminho: str
+    formato: str
+    tamanho: int
+
+
+def tamanho_valor(valor: Any) -> int:
+    
+    if isinstance(valor, (bytes, bytearray, memoryview, mmap.mmap)):
+        return len(valor)
+    
+    if hasattr(valor, 'memory_usage'):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    
+    return len(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def preserva_tipos_arrow(valor: Any) -> bool:
+    
+    if not hasattr(valor, 'to_feather'):
+        return False
+    
+    from pandas.api.types import infer_dtype
+    
+    return all(
+        infer_dtype(valor[coluna], skipna=False) in TIPOS_OBJETO_ARROW
+        for coluna, tipo in valor.dtypes.items() if tipo == object
+    )
+
+
+class CacheSessao:
+    
+    def __init__(self, diretorio: Optional[str] = None, limite_memoria_mb: float = LIMITE_MEMORIA_MB,
+                 limite_disco_mb: float = LIMITE_DISCO_MB):
+        
+        self.diretorio = diretorio or tempfile.mkdtemp(prefix="cnab_cache_")
+        os.makedirs(self.diretorio, exist_ok=True)
+        self.limite_memoria = int(limite_memoria_mb * 1024 * 1024)
+        self.limite_disco = int(limite_disco_mb * 1024 * 1024)
+        
+        self._memoria: "OrderedDict[str, tuple]" = OrderedDict()
+        self._disco: "OrderedDict[str, EntradaDisco]" = OrderedDict()
+        self._bytes_memoria = 0
+        self._bytes_disco = 0
+        self._sequencia = 0
+        self._trava = threading.RLock()
+        
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.faltas = 0
+        
+        if diretorio is None:
+            self._finalizador = weakref.finalize(self, shutil.rmtree, self.diretorio, True)
+    
+    def guardar(self, chave: str, valor: Any):
+        
+        with self._trava:
+            self._remover(chave)
+            
+            tamanho = tamanho_valor(valor)
+            self._memoria[chave] = (valor, tamanho)
+            self._bytes_memoria += tamanho
+            self._ajustar()
+    
+    def obter(self, chave: str) -> Optional[Any]:
+        
+        with self._trava:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                if chave in self._disco:
+                    self._disco.move_to_end(chave)
+                self.acertos_memoria += 1
+                return self._memoria[chave][0]
+            
+            entrada = self._disco.get(chave)
+            if entrada is None:
+                self.faltas += 1
+                return None
+            
+            valor = self._carregar(entrada)
+            self._disco.move_to_end(chave)
+            self.acertos_disco += 1
+            
+            tamanho = tamanho_valor(valor)
+            self._memoria[chave] = (valor, tamanho)
+            self._bytes_memoria += tamanho
+            self._ajustar()
+            return valor
+    
+    def remover(self, chave: str):
+        
+        with self._trava:
+            self._remover(chave)
+    
+    def remover_prefixo(self, prefixo: str):
+        
+        with self._trava:
+            for chave in [c for c in (*self._memoria, *self._disco) if c.startswith(prefixo)]:
+                self._remover(chave)
+    
+    def __contains__(self, chave: str) -> bool:
+        
+        with self._trava:
+            return chave in self._memoria or chave in self._disco
+    
+    def taxa_acertos(self) -> float:
+        
+        consultas = self.acertos_memoria + self.acertos_disco + self.faltas
+        return (self.acertos_memoria + self.acertos_disco) / consultas if consultas else 0.0
+    
+    def estatisticas(self) -> dict:
+        
+        with self._trava:
+            return {
+                'entradas_memoria': len(self._memoria),
+                'entradas_disco': len(self._disco),
+                'bytes_memoria': self._bytes_memoria,
+                'bytes_disco': self._bytes_disco,
+                'acertos_memoria': self.acertos_memoria,
+                'acertos_disco': self.acertos_disco,
+                'faltas': self.faltas,
+            }
+    
+    def fechar(self):
+        
+        with self._trava:
+            for chave in list(self._disco):
+                self._remover(chave)
+            self._memoria.clear()
+            self._bytes_memoria = 0
+    
+    def _remover(self, chave: str):
+        
+        item = self._memoria.pop(chave, None)
+        if item is not None:
+            self._bytes_memoria -= item[1]
+        
+        entrada = self._disco.pop(chave, None)
+        if entrada is not None:
+            self._bytes_disco -= entrada.tamanho
+            try:
+                os.remove(entrada.caminho)
+            except FileNotFoundError:
+                pass
+    
+    def _ajustar(self):
+        
+        while self._bytes_memoria > self.limite_memoria and self._memoria:
+            chave, (valor, tamanho) = self._memoria.popitem(last=False)
+            self._bytes_memoria -= tamanho
+            if chave not in self._disco:
+                self._derramar(chave, valor)
+        
+        while self._bytes_disco > self.limite_disco and self._disco:
+            chave, entrada = self._disco.popitem(last=False)
+            self._bytes_disco -= entrada.tamanho
+            try:
+                os.remove(entrada.caminho)
+            except FileNotFoundError:
+                pass
+    
+    def _derramar(self, chave: str, valor: Any):
+        
+        self._sequencia += 1
+        base = os.path.join(self.diretorio, f"entrada_{self._sequencia:08d}")
+        
+        if isinstance(valor, (bytes, bytearray, memoryview, mmap.mmap)):
+            caminho, formato = base + ".bin", 'bytes'
+            with open(caminho, 'wb') as f:
+                f.write(valor)
+        else:
+            caminho, formato = base + ".pkl", 'pickle'
+            if preserva_tipos_arrow(valor):
+                try:
+                    valor.to_feather(base + ".arrow", compression='uncompressed')
+                    caminho, formato = base + ".arrow", 'arrow'
+                except Exception:
+                    if os.path.exists(base + ".arrow"):
+                        os.remove(base + ".arrow")
+            if formato == 'pickle':
+                with open(caminho, 'wb') as f:
+                    pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+        
+        entrada = EntradaDisco(caminho, formato, os.path.getsize(caminho))
+        self._disco[chave] = entrada
+        self._bytes_disco += entrada.tamanho
+    
+    def _carregar(self, entrada: EntradaDisco) -> Any:
+        
+        if entrada.formato == 'bytes':
+            if not entrada.tamanho:
+                return b""
+            with open(entrada.caminho, 'rb') as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        if entrada.formato == 'arrow':
+            import pyarrow.feather as feather
+            return feather.read_feather(entrada.caminho)
+        
+        with open(entrada.caminho, 'rb') as f:
+            return pickle.load(f)
@@ -1,10 +1,32 @@
-import pandas as pd
+import os
+import random
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, Any, List, Dict, Mapping, Optional, Iterable, Iterator, Sequence, Tuple
 from utils import (
     format_text, format_number, format_date, format_money,
-    formatar_texto, formatar_numero, formatar_data, formatar_dinheiro
+    formatar_texto, formatar_numero, formatar_data, formatar_dinheiro,
+    obter_campo
 )
+from layout_cnab import (
+    LayoutCNAB, LAYOUT_444, campos_parametricos, compilar_registro, grupos_fatorados, nome_campo
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+CAMPOS_DETALHE = (
+    'SEU_NUMERO', 'ID_RECEBIVEL', 'VALOR_PRESENTE', 'DATA_REFERENCIA',
+    'NU_DOCUMENTO', 'DATA_VENCIMENTO_AJUSTADA', 'DATA_VENCIMENTO',
+    'VALOR_NOMINAL', 'DATA_EMISSAO', 'DOC_CEDENTE', 'VALOR_AQUISICAO',
+    'DOC_SACADO', 'NOME_SACADO', 'CHAVE_NFE', 'NOME_CEDENTE'
+)
+
+COLUNAS_FATORADAS = ('NOME_CEDENTE', 'DOC_CEDENTE', 'NOME_SACADO', 'DOC_SACADO')
+
+PARAMETROS_HEADER = ('cod_originador', 'razao_social', 'numero_banco', 'nome_banco', 'seq_arquivo')
+
+PROPORCAO_MAXIMA_FATORACAO = 0.5
 
 
 class GeradorCNAB:
@@ -80,7 +102,7 @@ class GeradorCNAB:
         
         return linha_final
     
-    def gerar_detalhe(self, linha: pd.Series, sequencial_registro: int, 
+    def gerar_detalhe(self, linha: Any, sequencial_registro: int, 
                      coobrigacao: str = "02", tipo_baixa: str = "TOTAL") -> str:
         
         registro = [" "] * self.tamanho_registro
@@ -103,11 +125,12 @@ class GeradorCNAB:
         registro[36] = "0"
         
         seu_numero_raw = ""
-        if hasattr(linha, 'SEU_NUMERO') and pd.notna(linha.SEU_NUMERO):
+        valor = obter_campo(linha, 'SEU_NUMERO')
+        if valor is not None:
             try:
-                seu_numero_raw = str(int(float(linha.SEU_NUMERO)))
+                seu_numero_raw = str(int(float(valor)))
             except:
-                seu_numero_raw = str(linha.SEU_NUMERO)
+                seu_numero_raw = str(valor)
         
         seu_numero_fmt = formatar_numero(seu_numero_raw, 25)
         for i, char in enumerate(seu_numero_fmt):
@@ -117,8 +140,9 @@ class GeradorCNAB:
             registro[i] = "0"
         
         id_recebivel = ""
-        if hasattr(linha, 'ID_RECEBIVEL') and pd.notna(linha.ID_RECEBIVEL):
-            id_recebivel = str(int(linha.ID_RECEBIVEL))
+        valor = obter_campo(linha, 'ID_RECEBIVEL')
+        if valor is not None:
+            id_recebivel = str(int(valor))
         
         id_fmt = formatar_numero(id_recebivel, 11)
         for i, char in enumerate(id_fmt):
@@ -127,8 +151,9 @@ class GeradorCNAB:
         registro[81] = " "
         
         valor_presente = 0
-        if hasattr(linha, 'VALOR_PRESENTE') and pd.notna(linha.VALOR_PRESENTE):
-            valor_presente = linha.VALOR_PRESENTE
+        valor = obter_campo(linha, 'VALOR_PRESENTE')
+        if valor is not None:
+            valor_presente = valor
         
         valor_pres_fmt = formatar_dinheiro(valor_presente, 10)
         for i, char in enumerate(valor_pres_fmt):
@@ -138,9 +163,7 @@ class GeradorCNAB:
         
         registro[93] = " "
         
-        data_referencia = None
-        if hasattr(linha, 'DATA_REFERENCIA') and pd.notna(linha.DATA_REFERENCIA):
-            data_referencia = linha.DATA_REFERENCIA
+        data_referencia = obter_campo(linha, 'DATA_REFERENCIA')
         
         data_ref_fmt = formatar_data(data_referencia)
         for i, char in enumerate(data_ref_fmt):
@@ -162,26 +185,26 @@ class GeradorCNAB:
             registro[109] = "4"
         
         nu_documento = ""
-        if hasattr(linha, 'NU_DOCUMENTO') and pd.notna(linha.NU_DOCUMENTO):
-            nu_documento = str(linha.NU_DOCUMENTO)
+        valor = obter_campo(linha, 'NU_DOCUMENTO')
+        if valor is not None:
+            nu_documento = str(valor)
         
         nu_doc_clean = formatar_texto(nu_documento, 10)
         for i, char in enumerate(nu_doc_clean):
             registro[110 + i] = char
         
-        data_vencimento = None
-        if hasattr(linha, 'DATA_VENCIMENTO_AJUSTADA') and pd.notna(linha.DATA_VENCIMENTO_AJUSTADA):
-            data_vencimento = linha.DATA_VENCIMENTO_AJUSTADA
-        elif hasattr(linha, 'DATA_VENCIMENTO') and pd.notna(linha.DATA_VENCIMENTO):
-            data_vencimento = linha.DATA_VENCIMENTO
+        data_vencimento = obter_campo(linha, 'DATA_VENCIMENTO_AJUSTADA')
+        if data_vencimento is None:
+            data_vencimento = obter_campo(linha, 'DATA_VENCIMENTO')
         
         data_venc_fmt = formatar_data(data_vencimento)
         for i, char in enumerate(data_venc_fmt):
             registro[120 + i] = char
         
         valor_nominal = 0
-        if hasattr(linha, 'VALOR_NOMINAL') and pd.notna(linha.VALOR_NOMINAL):
-            valor_nominal = linha.VALOR_NOMINAL
+        valor = obter_campo(linha, 'VALOR_NOMINAL')
+        if valor is not None:
+            valor_nominal = valor
         
         valor_nom_fmt = formatar_dinheiro(valor_nominal, 13)
         for i, char in enumerate(valor_nom_fmt):
@@ -195,9 +218,7 @@ class GeradorCNAB:
         
         registro[149] = " "
         
-        data_emissao = None
-        if hasattr(linha, 'DATA_EMISSAO') and pd.notna(linha.DATA_EMISSAO):
-            data_emissao = linha.DATA_EMISSAO
+        data_emissao = obter_campo(linha, 'DATA_EMISSAO')
         
         data_emis_fmt = formatar_data(data_emissao)
         for i, char in enumerate(data_emis_fmt):
@@ -207,8 +228,9 @@ class GeradorCNAB:
             registro[i] = "0"
         
         doc_cedente = ""
-        if hasattr(linha, 'DOC_CEDENTE') and pd.notna(linha.DOC_CEDENTE):
-            doc_cedente = str(linha.DOC_CEDENTE).replace(".", "").replace("/", "").replace("-", "")
+        valor = obter_campo(linha, 'DOC_CEDENTE')
+        if valor is not None:
+            doc_cedente = str(valor).replace(".", "").replace("/", "").replace("-", "")
         
         tipo_pessoa_cedente = "02" if len(doc_cedente) == 14 else "01"
         registro[159] = tipo_pessoa_cedente[0]
@@ -218,8 +240,9 @@ class GeradorCNAB:
             registro[i] = "0"
         
         valor_aquisicao = 0
-        if hasattr(linha, 'VALOR_AQUISICAO') and pd.notna(linha.VALOR_AQUISICAO):
-            valor_aquisicao = linha.VALOR_AQUISICAO
+        valor = obter_campo(linha, 'VALOR_AQUISICAO')
+        if valor is not None:
+            valor_aquisicao = valor
         
         valor_aquis_fmt = formatar_dinheiro(valor_aquisicao, 13)
         for i, char in enumerate(valor_aquis_fmt):
@@ -229,8 +252,9 @@ class GeradorCNAB:
             registro[i] = "0"
         
         doc_sacado = ""
-        if hasattr(linha, 'DOC_SACADO') and pd.notna(linha.DOC_SACADO):
-            doc_sacado = str(linha.DOC_SACADO).replace(".", "").replace("/", "").replace("-", "")
+        valor = obter_campo(linha, 'DOC_SACADO')
+        if valor is not None:
+            doc_sacado = str(valor).replace(".", "").replace("/", "").replace("-", "")
         
         tipo_pessoa_sacado = "02" if len(doc_sacado) == 14 else "01"
         registro[218] = tipo_pessoa_sacado[0]
@@ -241,8 +265,9 @@ class GeradorCNAB:
             registro[220 + i] = char
         
         nome_sacado_raw = ""
-        if hasattr(linha, 'NOME_SACADO') and pd.notna(linha.NOME_SACADO):
-            nome_sacado_raw = str(linha.NOME_SACADO)
+        valor = obter_campo(linha, 'NOME_SACADO')
+        if valor is not None:
+            nome_sacado_raw = str(valor)
         
         nome_sac_fmt = formatar_texto(nome_sacado_raw, 40)
         for i, char in enumerate(nome_sac_fmt):
@@ -253,8 +278,9 @@ class GeradorCNAB:
             registro[274 + i] = char
         
         chave_nfe = ""
-        if hasattr(linha, 'CHAVE_NFE') and pd.notna(linha.CHAVE_NFE):
-            chave_nfe = str(linha.CHAVE_NFE)
+        valor = obter_campo(linha, 'CHAVE_NFE')
+        if valor is not None:
+            chave_nfe = str(valor)
         
         chave_nfe_fmt = formatar_numero(chave_nfe, 9)
         for i, char in enumerate(chave_nfe_fmt):
@@ -267,8 +293,9 @@ class GeradorCNAB:
             registro[i] = "0"
         
         nome_cedente_raw = ""
-        if hasattr(linha, 'NOME_CEDENTE') and pd.notna(linha.NOME_CEDENTE):
-            nome_cedente_raw = str(linha.NOME_CEDENTE)
+        valor = obter_campo(linha, 'NOME_CEDENTE')
+        if valor is not None:
+            nome_cedente_raw = str(valor)
         
         nome_cedente = formatar_texto(nome_cedente_raw, 200)
         doc_cedente_clean = doc_cedente
@@ -332,7 +359,7 @@ class GeradorCNAB:
         
         return linha
     
-    def gerar_arquivo_completo(self, df: pd.DataFrame, cod_originador: str,
+    def gerar_arquivo_completo(self, df: "pd.DataFrame", cod_originador: str,
                               razao_social: str, numero_banco: str, 
                               nome_banco: str, seq_arquivo: int,
                               coobrigacao: str = "02", tipo_baixa: str = "TOTAL") -> str:
@@ -353,6 +380,199 @@ class GeradorCNAB:
         linhas.append(trailer)
         
         return "\r\n".join(linhas)
+    
+    def gerar_lote(self, registros: Iterable, sequencial_inicial: int,
+                   coobrigacao: str = "02", tipo_baixa: str = "TOTAL") -> List[str]:
+        
+        return [
+            self.gerar_detalhe(registro, sequencial, coobrigacao, tipo_baixa)
+            for sequencial, registro in enumerate(registros, sequencial_inicial)
+        ]
+    
+    def gerar_linhas(self, registros: Iterable, cod_originador: str,
+                     razao_social: str, numero_banco: str,
+                     nome_banco: str, seq_arquivo: int,
+                     coobrigacao: str = "02", tipo_baixa: str = "TOTAL") -> Iterator[str]:
+        
+        yield self.gerar_header(cod_originador, razao_social, numero_banco,
+                                nome_banco, seq_arquivo)
+        
+        total_registros = 1
+        for sequencial, registro in enumerate(registros, 2):
+            yield self.gerar_detalhe(registro, sequencial, coobrigacao, tipo_baixa)
+            total_registros += 1
+        
+        yield self.gerar_trailer(total_registros + 1)
+    
+    def gerar_previa(self, df: "pd.DataFrame", quantidade: int = 10, aleatoria: bool = False,
+                     semente: Optional[int] = None, coobrigacao: str = "02",
+                     tipo_baixa: str = "TOTAL") -> List[Tuple[int, Optional[str], Optional[str]]]:
+        
+        quantidade = min(quantidade, len(df))
+        if aleatoria:
+            posicoes = sorted(random.Random(semente).sample(range(len(df)), quantidade))
+        else:
+            posicoes = list(range(quantidade))
+        
+        previa = []
+        for posicao, (_, linha) in zip(posicoes, df.iloc[posicoes].iterrows()):
+            sequencial_registro = posicao + 2
+            try:
+                detalhe = self.gerar_detalhe(linha, sequencial_registro, coobrigacao, tipo_baixa)
+            except Exception as e:
+                previa.append((sequencial_registro, None, str(e)))
+                continue
+            previa.append((sequencial_registro, detalhe, None))
+        
+        return previa
+    
+    def gerar_detalhes(self, df: "pd.DataFrame", coobrigacao: str = "02",
+                       tipo_baixa: str = "TOTAL") -> List[str]:
+        
+        return self.gerar_lote((linha for _, linha in df.iterrows()), 2, coobrigacao, tipo_baixa)
+    
+    def gerar_variantes(self, df: "pd.DataFrame", variantes: Sequence[Mapping[str, Any]],
+                        caminhos: Sequence[str], max_workers: Optional[int] = None) -> int:
+        
+        import numpy as np
+        from concurrent.futures import ThreadPoolExecutor
+        
+        if len(variantes) != len(caminhos):
+            raise ValueError(
+                f"Quantidade de variantes ({len(variantes)}) difere da de arquivos ({len(caminhos)})"
+            )
+        
+        for numero, variante in enumerate(variantes, 1):
+            faltantes = [nome for nome in PARAMETROS_HEADER if nome not in variante]
+            if faltantes:
+                raise ValueError(f"Variante {numero} sem parâmetros: {', '.join(faltantes)}")
+        
+        if not variantes:
+            return 0
+        
+        layout = getattr(self, 'layout', LAYOUT_444)
+        estampas = campos_parametricos(layout, 'detalhe')
+        
+        def fatias_variante(variante: Mapping[str, Any]) -> Tuple[bytes, ...]:
+            detalhe = self.gerar_detalhe(
+                {}, 2, variante.get('coobrigacao', "02"), variante.get('tipo_baixa', "TOTAL")
+            )
+            return tuple(
+                detalhe[campo.inicio:campo.inicio + campo.tamanho].encode('latin-1') for campo in estampas
+            )
+        
+        base = variantes[0]
+        detalhes = self.gerar_detalhes(df, base.get('coobrigacao', "02"), base.get('tipo_baixa', "TOTAL"))
+        total_registros = len(detalhes) + 2
+        
+        corpo_base = ("\r\n" + "\r\n".join(detalhes)).encode('latin-1') if detalhes else b""
+        fatias_base = fatias_variante(base)
+        corpos = {fatias_base: corpo_base}
+        
+        for variante in variantes[1:]:
+            fatias = fatias_variante(variante)
+            if fatias in corpos:
+                continue
+            
+            matriz = np.frombuffer(corpo_base, dtype=np.uint8).reshape(-1, self.tamanho_registro + 2).copy()
+            for campo, fatia in zip(estampas, fatias):
+                matriz[:, campo.inicio + 2:campo.inicio + 2 + campo.tamanho] = np.frombuffer(fatia, dtype=np.uint8)
+            corpos[fatias] = matriz.tobytes()
+        
+        trailer = ("\r\n" + self.gerar_trailer(total_registros)).encode('latin-1')
+        
+        def gravar(variante: Mapping[str, Any], caminho: str):
+            header = self.gerar_header(*(variante[nome] for nome in PARAMETROS_HEADER))
+            with open(caminho, 'wb') as arquivo:
+                arquivo.write(header.encode('latin-1'))
+                arquivo.write(corpos[fatias_variante(variante)])
+                arquivo.write(trailer)
+        
+        max_workers = max_workers or min(len(variantes), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(gravar, variantes, caminhos))
+        
+        return total_registros
+
+
+class GeradorCNABCompilado(GeradorCNAB):
+    
+    def __init__(self, layout: LayoutCNAB = LAYOUT_444):
+        super().__init__()
+        self.layout = layout
+        self.tamanho_registro = layout.tamanho_registro
+        self._gerar_header = compilar_registro(layout, 'header')
+        self._gerar_detalhe = compilar_registro(layout, 'detalhe')
+        self._gerar_trailer = compilar_registro(layout, 'trailer')
+        self._grupos_fatorados = grupos_fatorados(layout, 'detalhe', COLUNAS_FATORADAS)
+    
+    def gerar_header(self, cod_originador: str, razao_social: str,
+                     numero_banco: str, nome_banco: str, seq_arquivo: int) -> str:
+        return self._gerar_header(cod_originador, razao_social, numero_banco,
+                                  nome_banco, seq_arquivo)
+    
+    def gerar_detalhe(self, linha: Any, sequencial_registro: int,
+                      coobrigacao: str = "02", tipo_baixa: str = "TOTAL") -> str:
+        return self._gerar_detalhe(linha, sequencial_registro, coobrigacao, tipo_baixa)
+    
+    def gerar_trailer(self, total_registros: int) -> str:
+        return self._gerar_trailer(total_registros)
+    
+    def gerar_lote(self, registros: Iterable, sequencial_inicial: int,
+                   coobrigacao: str = "02", tipo_baixa: str = "TOTAL") -> List[str]:
+        
+        if hasattr(registros, 'itertuples'):
+            return self.gerar_lote_fatorado(registros, sequencial_inicial, coobrigacao, tipo_baixa)
+        
+        return super().gerar_lote(registros, sequencial_inicial, coobrigacao, tipo_baixa)
+    
+    def gerar_detalhes(self, df: "pd.DataFrame", coobrigacao: str = "02",
+                       tipo_baixa: str = "TOTAL") -> List[str]:
+        
+        return self.gerar_lote_fatorado(df, 2, coobrigacao, tipo_baixa)
+    
+    def gerar_lote_fatorado(self, df: "pd.DataFrame", sequencial_inicial: int,
+                            coobrigacao: str = "02", tipo_baixa: str = "TOTAL") -> List[str]:
+        
+        from fontes_dados import fatorar_colunas, tipos_como_iterrows
+        
+        df = tipos_como_iterrows(df)
+        
+        externos = []
+        fatias_linhas = []
+        for colunas, campos in self._grupos_fatorados if len(df) else ():
+            presentes = [coluna for coluna in colunas if coluna in df.columns]
+            codigos, primeiros = fatorar_colunas(df, presentes)
+            if len(primeiros) > len(df) * PROPORCAO_MAXIMA_FATORACAO:
+                continue
+            
+            unicos = zip(*(df[coluna].take(primeiros).tolist() for coluna in presentes)) if presentes else [()]
+            try:
+                fatias = [
+                    self._fatias_campos(dict(zip(presentes, valores)), campos, coobrigacao, tipo_baixa)
+                    for valores in unicos
+                ]
+            except Exception:
+                continue
+            
+            externos.append(tuple(nome_campo(campo) for campo in campos))
+            fatias_linhas.append([fatias[codigo] for codigo in codigos.tolist()])
+        
+        registros = df.itertuples(index=False)
+        if not externos:
+            return super().gerar_lote(registros, sequencial_inicial, coobrigacao, tipo_baixa)
+        
+        gerar_detalhe = compilar_registro(self.layout, 'detalhe', externos)
+        return [
+            gerar_detalhe(registro, sequencial, coobrigacao, tipo_baixa, fatias)
+            for sequencial, (registro, fatias) in enumerate(zip(registros, zip(*fatias_linhas)), sequencial_inicial)
+        ]
+    
+    def _fatias_campos(self, registro: Dict[str, Any], campos, coobrigacao: str,
+                       tipo_baixa: str) -> Tuple[str, ...]:
+        
+        detalhe = self._gerar_detalhe(registro, 1, coobrigacao, tipo_baixa)
+        return tuple(detalhe[campo.inicio:campo.inicio + campo.tamanho] for campo in campos)
 
 
 class CNABGenerator(GeradorCNAB):
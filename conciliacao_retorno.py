@@ -0,0 +1,181 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Iterable, NamedTuple, Sequence, Tuple, Union
+
+from diff_remessa import carregar_matriz
+from layout_cnab import Campo, LAYOUT_444
+
+
+CAMPOS_RETORNO_444 = (
+    Campo(37, 25, 'numero', nome='SEU_NUMERO'),
+    Campo(70, 11, 'numero', nome='ID_RECEBIVEL'),
+    Campo(108, 2, 'numero', nome='CODIGO_OCORRENCIA'),
+    Campo(110, 6, 'data', nome='DATA_OCORRENCIA'),
+    Campo(116, 10, 'texto', nome='NU_DOCUMENTO'),
+    Campo(146, 6, 'data', nome='DATA_VENCIMENTO'),
+    Campo(152, 13, 'dinheiro', nome='VALOR_NOMINAL'),
+    Campo(253, 13, 'dinheiro', nome='VALOR_PAGO'),
+    Campo(318, 10, 'texto', nome='MOTIVOS_OCORRENCIA'),
+    Campo(438, 6, 'numero', nome='SEQUENCIAL'),
+)
+
+CAMPOS_REMESSA_CONCILIACAO = ('SEU_NUMERO', 'ID_RECEBIVEL', 'VALOR_NOMINAL', 'DATA_VENCIMENTO')
+
+CODIGOS_ACEITE = frozenset({"02"})
+CODIGOS_REJEICAO = frozenset({"03"})
+
+SITUACOES_REMESSA = ('ausentes', 'duplicados', 'sem_chave')
+SITUACOES_RETORNO = ('desconhecidos', 'ambiguos')
+
+
+class ResultadoConciliacao(NamedTuple):
+    aceitos: pd.DataFrame
+    rejeitados: pd.DataFrame
+    outras_ocorrencias: pd.DataFrame
+    ausentes: pd.DataFrame
+    desconhecidos: pd.DataFrame
+    duplicados: pd.DataFrame
+    sem_chave: pd.DataFrame
+    ambiguos: pd.DataFrame
+
+
+def extrair_campos(matriz: np.ndarray, campos: Iterable[Campo]) -> pd.DataFrame:
+    
+    colunas = {}
+    
+    for campo in campos:
+        fatia = np.ascontiguousarray(matriz[:, campo.inicio:campo.inicio + campo.tamanho])
+        textos = pd.Series(fatia.view(f"S{campo.tamanho}").ravel()).str.decode('latin-1')
+        
+        if campo.formato == 'dinheiro':
+            colunas[campo.nome] = pd.to_numeric(textos, errors='coerce').astype('Int64')
+        else:
+            colunas[campo.nome] = textos.str.strip()
+    
+    return pd.DataFrame(colunas)
+
+
+def _detalhes(matriz: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    
+    posicoes = np.flatnonzero(matriz[:, 0] == ord("1"))
+    return matriz[posicoes], posicoes + 1
+
+
+def carregar_remessas(arquivos: Sequence[Union[str, bytes]]) -> pd.DataFrame:
+    
+    campos = [
+        campo for campo in LAYOUT_444.registros['detalhe'].campos
+        if campo.nome in CAMPOS_REMESSA_CONCILIACAO
+    ]
+    
+    partes = []
+    for indice, arquivo in enumerate(arquivos):
+        detalhes, linhas = _detalhes(carregar_matriz(arquivo, LAYOUT_444.tamanho_registro))
+        
+        parte = extrair_campos(detalhes, campos)
+        parte.insert(0, 'ARQUIVO_REMESSA', arquivo if isinstance(arquivo, str) else f"remessa_{indice + 1}")
+        parte.insert(1, 'LINHA_REMESSA', linhas)
+        partes.append(parte)
+    
+    if not partes:
+        return pd.DataFrame(columns=['ARQUIVO_REMESSA', 'LINHA_REMESSA', *CAMPOS_REMESSA_CONCILIACAO])
+    
+    return pd.concat(partes, ignore_index=True)
+
+
+def carregar_retorno(arquivo: Union[str, bytes], campos: Sequence[Campo] = CAMPOS_RETORNO_444) -> pd.DataFrame:
+    
+    detalhes, linhas = _detalhes(carregar_matriz(arquivo, LAYOUT_444.tamanho_registro))
+    
+    retorno = extrair_campos(detalhes, campos)
+    retorno.insert(0, 'LINHA_RETORNO', linhas)
+    return retorno
+
+
+def chaves_vazias(chaves: pd.Series) -> np.ndarray:
+    
+    return (chaves.isna() | (chaves.astype(str).str.strip("0 ") == "")).to_numpy()
+
+
+def conciliar(remessas: pd.DataFrame, retorno: pd.DataFrame, chave: str = 'SEU_NUMERO',
+              codigos_aceite: Iterable[str] = CODIGOS_ACEITE,
+              codigos_rejeicao: Iterable[str] = CODIGOS_REJEICAO) -> ResultadoConciliacao:
+    
+    vazias = chaves_vazias(remessas[chave])
+    repetidas = remessas[chave].duplicated(keep=False).to_numpy() & ~vazias
+    indice_remessas = remessas[~vazias & ~repetidas].set_index(chave)
+    
+    cruzado = retorno.join(indice_remessas, on=chave, how='left', lsuffix='_RETORNO', rsuffix='_REMESSA')
+    encontrados = cruzado['LINHA_REMESSA'].notna()
+    
+    if 'VALOR_NOMINAL_RETORNO' in cruzado.columns:
+        cruzado['DIFERENCA_VALOR'] = cruzado['VALOR_NOMINAL_RETORNO'] - cruzado['VALOR_NOMINAL_REMESSA']
+        cruzado['VALOR_DIVERGENTE'] = (cruzado['DIFERENCA_VALOR'].fillna(0) != 0) & encontrados
+    
+    codigos = cruzado['CODIGO_OCORRENCIA']
+    aceitos = encontrados & codigos.isin(set(codigos_aceite))
+    rejeitados = encontrados & codigos.isin(set(codigos_rejeicao))
+    outros = encontrados & ~aceitos & ~rejeitados
+    
+    ausentes = ~indice_remessas.index.isin(retorno[chave])
+    ambiguos = retorno[chave].isin(remessas.loc[repetidas, chave]).to_numpy()
+    desconhecidos = ~encontrados.to_numpy() & ~ambiguos
+    
+    return ResultadoConciliacao(
+        aceitos=cruzado[aceitos].reset_index(drop=True),
+        rejeitados=cruzado[rejeitados].reset_index(drop=True),
+        outras_ocorrencias=cruzado[outros].reset_index(drop=True),
+        ausentes=indice_remessas[ausentes].reset_index(),
+        desconhecidos=retorno[desconhecidos].reset_index(drop=True),
+        duplicados=remessas[repetidas].sort_values([chave, 'ARQUIVO_REMESSA', 'LINHA_REMESSA'], kind='stable').reset_index(drop=True),
+        sem_chave=remessas[vazias].reset_index(drop=True),
+        ambiguos=retorno[ambiguos].reset_index(drop=True),
+    )
+
+
+def _somar(tabela: pd.DataFrame, coluna: str) -> int:
+    
+    return int(tabela[coluna].sum()) if coluna in tabela.columns else 0
+
+
+def resumir_conciliacao(resultado: ResultadoConciliacao) -> pd.DataFrame:
+    
+    linhas = []
+    for nome, tabela in resultado._asdict().items():
+        if nome in SITUACOES_REMESSA:
+            valor_remessa, valor_retorno = _somar(tabela, 'VALOR_NOMINAL'), 0
+        elif nome in SITUACOES_RETORNO:
+            valor_remessa, valor_retorno = 0, _somar(tabela, 'VALOR_NOMINAL')
+        else:
+            valor_remessa = _somar(tabela, 'VALOR_NOMINAL_REMESSA')
+            valor_retorno = _somar(tabela, 'VALOR_NOMINAL_RETORNO')
+        
+        linhas.append({
+            'SITUACAO': nome,
+            'REGISTROS': len(tabela),
+            'VALOR_REMESSA_CENTAVOS': valor_remessa,
+            'VALOR_RETORNO_CENTAVOS': valor_retorno,
+            'VALORES_DIVERGENTES': _somar(tabela, 'VALOR_DIVERGENTE'),
+        })
+    
+    return pd.DataFrame(linhas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conciliação de arquivos de retorno com remessas CNAB 444")
+    parser.add_argument("retorno")
+    parser.add_argument("remessas", nargs="+")
+    parser.add_argument("--chave", choices=["SEU_NUMERO", "ID_RECEBIVEL"], default="SEU_NUMERO")
+    parser.add_argument("--saida", help="Pasta onde gravar os relatórios em CSV")
+    args = parser.parse_args()
+    
+    resultado = conciliar(carregar_remessas(args.remessas), carregar_retorno(args.retorno), args.chave)
+    
+    print(resumir_conciliacao(resultado).to_string(index=False))
+    
+    if args.saida:
+        os.makedirs(args.saida, exist_ok=True)
+        for nome, tabela in resultado._asdict().items():
+            tabela.to_csv(os.path.join(args.saida, f"{nome}.csv"), index=False, sep=";")
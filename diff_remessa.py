@@ -0,0 +1,218 @@
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from layout_cnab import Campo, LayoutCNAB, LAYOUT_444, nome_campo
+
+
+TIPOS_REGISTRO = (
+    ('header', b"0"),
+    ('detalhe', b"1"),
+    ('trailer', b"9"),
+)
+
+TAMANHO_BLOCO = 100_000
+
+
+class ResultadoComparacao(NamedTuple):
+    resumo: pd.DataFrame
+    exemplos: pd.DataFrame
+    somente_a: np.ndarray
+    somente_b: np.ndarray
+    registros_comparados: int
+
+
+def carregar_matriz(arquivo: Union[str, bytes], tamanho_registro: int = 444) -> np.ndarray:
+    
+    if isinstance(arquivo, bytes):
+        conteudo = arquivo
+    else:
+        with open(arquivo, 'rb') as f:
+            conteudo = f.read()
+    
+    if conteudo.endswith(b"\r\n"):
+        conteudo = conteudo[:-2]
+    
+    passo = tamanho_registro + 2
+    if (len(conteudo) + 2) % passo == 0:
+        matriz = np.frombuffer(conteudo + b"\r\n", dtype=np.uint8).reshape(-1, passo)
+        if (matriz[:, tamanho_registro] == ord("\r")).all() and (matriz[:, tamanho_registro + 1] == ord("\n")).all():
+            return matriz[:, :tamanho_registro]
+    
+    linhas = conteudo.splitlines()
+    for numero, linha in enumerate(linhas, 1):
+        if len(linha) != tamanho_registro:
+            raise ValueError(
+                f"Linha {numero} com tamanho incorreto: {len(linha)} "
+                f"(esperado: {tamanho_registro})"
+            )
+    
+    return np.frombuffer(b"".join(linhas), dtype=np.uint8).reshape(-1, tamanho_registro)
+
+
+def _chaves(matriz: np.ndarray, posicoes: np.ndarray, campo: Campo) -> np.ndarray:
+    
+    fatia = np.ascontiguousarray(matriz[posicoes, campo.inicio:campo.inicio + campo.tamanho])
+    return fatia.view(f"S{campo.tamanho}").ravel()
+
+
+def _alinhar_por_chave(matriz_a: np.ndarray, matriz_b: np.ndarray, posicoes_a: np.ndarray,
+                       posicoes_b: np.ndarray, campo: Campo) -> Tuple[np.ndarray, ...]:
+    
+    chaves_b = pd.Index(_chaves(matriz_b, posicoes_b, campo))
+    primeiras = ~chaves_b.duplicated()
+    indice_b = chaves_b[primeiras]
+    posicoes_b_unicas = posicoes_b[primeiras]
+    
+    chaves_a = pd.Index(_chaves(matriz_a, posicoes_a, campo))
+    encontrados = indice_b.get_indexer(chaves_a)
+    pareados = (encontrados >= 0) & ~chaves_a.duplicated()
+    
+    pares_a = posicoes_a[pareados]
+    pares_b = posicoes_b_unicas[encontrados[pareados]]
+    
+    return pares_a, pares_b, posicoes_a[~pareados], np.setdiff1d(posicoes_b, pares_b)
+
+
+def _texto(matriz: np.ndarray, linha: int, campo: Campo) -> str:
+    
+    return matriz[linha, campo.inicio:campo.inicio + campo.tamanho].tobytes().decode('latin-1')
+
+
+def comparar_remessas(arquivo_a: Union[str, bytes], arquivo_b: Union[str, bytes],
+                      chave: Optional[str] = None, layout: LayoutCNAB = LAYOUT_444,
+                      ignorar: Iterable[str] = (), max_exemplos: int = 20) -> ResultadoComparacao:
+    
+    matriz_a = carregar_matriz(arquivo_a, layout.tamanho_registro)
+    matriz_b = carregar_matriz(arquivo_b, layout.tamanho_registro)
+    ignorar = set(ignorar)
+    
+    resumo = []
+    exemplos = []
+    somente_a = []
+    somente_b = []
+    registros_comparados = 0
+    
+    for tipo, codigo in TIPOS_REGISTRO:
+        registro = layout.registros[tipo]
+        posicoes_a = np.flatnonzero(matriz_a[:, 0] == codigo[0])
+        posicoes_b = np.flatnonzero(matriz_b[:, 0] == codigo[0])
+        
+        campos_chave = [campo for campo in registro.campos if nome_campo(campo) == chave]
+        if chave and tipo == 'detalhe':
+            if not campos_chave:
+                raise ValueError(f"Campo {chave} não existe no layout {layout.nome}")
+            pares_a, pares_b, sobra_a, sobra_b = _alinhar_por_chave(
+                matriz_a, matriz_b, posicoes_a, posicoes_b, campos_chave[0]
+            )
+        else:
+            quantidade = min(len(posicoes_a), len(posicoes_b))
+            pares_a, pares_b = posicoes_a[:quantidade], posicoes_b[:quantidade]
+            sobra_a, sobra_b = posicoes_a[quantidade:], posicoes_b[quantidade:]
+        
+        somente_a.append(sobra_a)
+        somente_b.append(sobra_b)
+        registros_comparados += len(pares_a)
+        
+        inicios = np.array([campo.inicio for campo in registro.campos])
+        contagens = np.zeros(len(registro.campos), dtype=np.int64)
+        exemplos_campo = [[] for _ in registro.campos]
+        
+        for inicio_bloco in range(0, len(pares_a), TAMANHO_BLOCO):
+            bloco_a = pares_a[inicio_bloco:inicio_bloco + TAMANHO_BLOCO]
+            bloco_b = pares_b[inicio_bloco:inicio_bloco + TAMANHO_BLOCO]
+            
+            diferentes = matriz_a[bloco_a] != matriz_b[bloco_b]
+            por_campo = np.logical_or.reduceat(diferentes, inicios, axis=1)
+            contagens += por_campo.sum(axis=0)
+            
+            for indice_campo in np.flatnonzero(por_campo.any(axis=0)):
+                faltantes = max_exemplos - len(exemplos_campo[indice_campo])
+                if faltantes > 0:
+                    linhas = np.flatnonzero(por_campo[:, indice_campo])[:faltantes]
+                    exemplos_campo[indice_campo].extend(zip(bloco_a[linhas], bloco_b[linhas]))
+        
+        for indice_campo, campo in enumerate(registro.campos):
+            nome = nome_campo(campo)
+            if nome in ignorar or not contagens[indice_campo]:
+                continue
+            
+            resumo.append({
+                'TIPO': tipo,
+                'CAMPO': nome,
+                'INICIO': campo.inicio + 1,
+                'FIM': campo.inicio + campo.tamanho,
+                'REGISTROS_DIFERENTES': int(contagens[indice_campo]),
+            })
+            
+            for linha_a, linha_b in exemplos_campo[indice_campo]:
+                exemplos.append({
+                    'TIPO': tipo,
+                    'CAMPO': nome,
+                    'LINHA_A': int(linha_a) + 1,
+                    'LINHA_B': int(linha_b) + 1,
+                    'VALOR_A': _texto(matriz_a, linha_a, campo),
+                    'VALOR_B': _texto(matriz_b, linha_b, campo),
+                })
+    
+    resumo_df = pd.DataFrame(resumo, columns=['TIPO', 'CAMPO', 'INICIO', 'FIM', 'REGISTROS_DIFERENTES'])
+    resumo_df = resumo_df.sort_values('REGISTROS_DIFERENTES', ascending=False, kind='stable').reset_index(drop=True)
+    
+    exemplos_df = pd.DataFrame(
+        exemplos, columns=['TIPO', 'CAMPO', 'LINHA_A', 'LINHA_B', 'VALOR_A', 'VALOR_B']
+    )
+    
+    return ResultadoComparacao(
+        resumo=resumo_df,
+        exemplos=exemplos_df,
+        somente_a=np.sort(np.concatenate(somente_a)) + 1,
+        somente_b=np.sort(np.concatenate(somente_b)) + 1,
+        registros_comparados=registros_comparados,
+    )
+
+
+def formatar_resumo(resultado: ResultadoComparacao) -> List[str]:
+    
+    linhas = [f"{resultado.registros_comparados:,} registros comparados"]
+    
+    for item in resultado.resumo.itertuples(index=False):
+        linhas.append(
+            f"{item.CAMPO} ({item.TIPO}, {item.INICIO}-{item.FIM}) difere em "
+            f"{item.REGISTROS_DIFERENTES:,} registros"
+        )
+    
+    if len(resultado.somente_a):
+        linhas.append(f"{len(resultado.somente_a):,} registros só existem no arquivo A")
+    if len(resultado.somente_b):
+        linhas.append(f"{len(resultado.somente_b):,} registros só existem no arquivo B")
+    
+    if resultado.resumo.empty and not len(resultado.somente_a) and not len(resultado.somente_b):
+        linhas.append("Arquivos idênticos")
+    
+    return linhas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Comparação campo a campo entre remessas CNAB 444")
+    parser.add_argument("arquivo_a")
+    parser.add_argument("arquivo_b")
+    parser.add_argument("--chave", help="Alinha os detalhes por este campo (ex: SEU_NUMERO)")
+    parser.add_argument("--ignorar", nargs="*", default=[], help="Campos ignorados na comparação")
+    parser.add_argument("--exemplos", type=int, default=5)
+    args = parser.parse_args()
+    
+    resultado = comparar_remessas(
+        args.arquivo_a, args.arquivo_b, chave=args.chave,
+        ignorar=args.ignorar, max_exemplos=args.exemplos
+    )
+    
+    for linha in formatar_resumo(resultado):
+        print(linha)
+    
+    if not resultado.exemplos.empty:
+        print("\nExemplos:")
+        print(resultado.exemplos.to_string(index=False))
+    
+    sys.exit(0 if resultado.resumo.empty and not len(resultado.somente_a) and not len(resultado.somente_b) else 1)
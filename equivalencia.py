@@ -0,0 +1,396 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cnab_engine import GeradorCNAB, GeradorCNABCompilado
+from fontes_dados import iterar_registros, tipos_como_iterrows
+from pipeline import gerar_remessa_pipeline
+from planejador import (
+    ESTRATEGIA_FAIXAS, ESTRATEGIA_PARALELO, ESTRATEGIA_STREAMING, PlanoExecucao, estimar_registros, gerar_remessa
+)
+
+
+PARAMETROS_PADRAO = dict(
+    cod_originador="202501", razao_social="58479927000136BANCO PAULISTA",
+    numero_banco="611", nome_banco="PAULISTA S.A.", seq_arquivo=1,
+    coobrigacao="02", tipo_baixa="TOTAL",
+)
+
+TAMANHO_LINHA_ARQUIVO = 446
+TAMANHO_LOTE_ARQUIVO = 64
+
+NOMES = [
+    "JOSÉ DA SILVA", "Maria-Aparecida O'Neil", "EMPRESA ÇÃO LTDA", "ÁÉÍÓÚ àèìòù ãõ ç",
+    "Ñandú & Cia.", "名前 Tanaka", "São João 😀", "   espaços   ", "", "A" * 120,
+]
+
+DOCUMENTOS = [
+    "12.345.678/0001-95", "123.456.789-09", "11222333000181", "98765432100",
+    12345678909, 12345678000195.0, "00.000.000/0000-00", "1", "123.456.789-0912",
+]
+
+DATAS = [
+    "2026-02-01", "01/03/2026", "2026/04/05", "06-07-2026", "31/02/2026", "abc", "",
+    pd.Timestamp("2025-11-27"), datetime(2024, 2, 29), pd.NaT, np.nan, None,
+]
+
+VALORES = [
+    0, 0.005, 0.015, 1, -5.5, 10.5, 1234.565, 99999999.99, 9999999999.99,
+    10 ** 12, "R$ 10,50", "1.234,56", " 42 ", "abc", "", np.nan, None,
+]
+
+CEDENTES = [
+    ("CEDENTE ALFA S.A.", "12.345.678/0001-95"),
+    ("Cedente Béta", "123.456.789-09"),
+    ("Indústria e Comércio de Produtos Alimentícios do Vale do São Francisco Ltda - EPP", "11.222.333/0001-81"),
+    ("X" * 200, "98765432100"),
+    ("", ""),
+    (np.nan, np.nan),
+]
+
+
+def gerar_carteira(quantidade: int, semente: int = 0, adversarial: bool = True) -> pd.DataFrame:
+    
+    sorteio = random.Random(semente)
+    
+    def escolher(opcoes, comuns):
+        return sorteio.choice(opcoes if adversarial and sorteio.random() < 0.3 else comuns)
+    
+    linhas = []
+    for _ in range(quantidade):
+        nome_cedente, doc_cedente = sorteio.choice(CEDENTES if adversarial else CEDENTES[:3])
+        linhas.append({
+            'SEU_NUMERO': escolher(
+                [float(sorteio.randint(1, 10 ** 6)), "AB-12", 10 ** 24, 1e20, np.nan, "", "007"],
+                [sorteio.randint(1, 10 ** 9)]
+            ),
+            'ID_RECEBIVEL': escolher(
+                [float(sorteio.randint(1, 10 ** 10)), np.nan, 10 ** 12, 0],
+                [sorteio.randint(1, 10 ** 10)]
+            ),
+            'VALOR_PRESENTE': escolher(VALORES, [round(sorteio.uniform(0, 10000), 2)]),
+            'DATA_REFERENCIA': escolher(DATAS, [pd.Timestamp("2025-11-27")]),
+            'NU_DOCUMENTO': escolher(["NF-123", 4567, 12.0, "ÇÃO/2025-ABCDEFGHIJKLMN", np.nan], ["NF-1"]),
+            'DATA_VENCIMENTO_AJUSTADA': escolher(DATAS, [pd.NaT]),
+            'DATA_VENCIMENTO': escolher(DATAS, ["2026-02-01", "01/03/2026"]),
+            'VALOR_NOMINAL': escolher(VALORES, [round(sorteio.uniform(1, 100000), 2)]),
+            'DATA_EMISSAO': escolher(DATAS, [pd.Timestamp("2025-10-01")]),
+            'DOC_CEDENTE': doc_cedente,
+            'VALOR_AQUISICAO': escolher(VALORES, [round(sorteio.uniform(0, 90000), 2)]),
+            'DOC_SACADO': escolher(DOCUMENTOS + [np.nan], DOCUMENTOS[:4]),
+            'NOME_SACADO': escolher(NOMES + [np.nan, 12345], NOMES[:3]),
+            'CHAVE_NFE': escolher(
+                ["35251112345678000195550010000001231000001234", 123, 4.5e10, "ABC-123", np.nan],
+                ["123456789"]
+            ),
+            'NOME_CEDENTE': nome_cedente,
+        })
+    
+    return pd.DataFrame(linhas)
+
+
+def gerar_carteira_numerica(quantidade: int, semente: int = 0) -> pd.DataFrame:
+    
+    sorteio = random.Random(semente)
+    
+    return pd.DataFrame({
+        'SEU_NUMERO': [sorteio.randint(1, 10 ** 9) for _ in range(quantidade)],
+        'ID_RECEBIVEL': [sorteio.choice([float(sorteio.randint(1, 10 ** 10)), np.nan]) for _ in range(quantidade)],
+        'VALOR_NOMINAL': [round(sorteio.uniform(-10, 10 ** 9), 3) for _ in range(quantidade)],
+        'DOC_CEDENTE': [sorteio.choice([12345678000195, 12345678909]) for _ in range(quantidade)],
+        'DOC_SACADO': [sorteio.randint(10 ** 9, 10 ** 14) for _ in range(quantidade)],
+        'CHAVE_NFE': [sorteio.randint(0, 10 ** 12) for _ in range(quantidade)],
+    })
+
+
+def espalhar_nulos_tardios(df: pd.DataFrame, semente: int = 0, fracao: float = 0.1) -> pd.DataFrame:
+    
+    sorteio = random.Random(semente)
+    df = df.copy()
+    inicio = min(int(len(df) * (1 - fracao)), max(len(df) - 1, 0))
+    
+    for coluna in df.columns:
+        if not len(df):
+            break
+        if pd.api.types.is_integer_dtype(df[coluna]):
+            df[coluna] = df[coluna].astype('Int64')
+        linhas = sorteio.sample(range(inicio, len(df)), min(2, len(df) - inicio))
+        df.loc[linhas, coluna] = None
+    
+    return df
+
+
+CARTEIRAS: Dict[str, Callable[[int, int], pd.DataFrame]] = {
+    'comum': lambda quantidade, semente: gerar_carteira(quantidade, semente, adversarial=False),
+    'adversarial': lambda quantidade, semente: gerar_carteira(quantidade, semente, adversarial=True),
+    'numerica': gerar_carteira_numerica,
+    'nulos_tardios': lambda quantidade, semente: espalhar_nulos_tardios(
+        gerar_carteira_numerica(quantidade, semente).assign(NOME_SACADO=NOMES[0]), semente
+    ),
+}
+
+
+def primeira_diferenca(esperado: bytes, obtido: bytes) -> Optional[int]:
+    
+    tamanho = min(len(esperado), len(obtido))
+    a = np.frombuffer(esperado, dtype=np.uint8, count=tamanho)
+    b = np.frombuffer(obtido, dtype=np.uint8, count=tamanho)
+    
+    diferentes = np.flatnonzero(a != b)
+    if len(diferentes):
+        return int(diferentes[0])
+    
+    return None if len(esperado) == len(obtido) else tamanho
+
+
+def motor_legado(df: pd.DataFrame, parametros: dict) -> str:
+    
+    return GeradorCNAB().gerar_arquivo_completo(df, **parametros)
+
+
+def motor_compilado(df: pd.DataFrame, parametros: dict) -> str:
+    
+    return GeradorCNABCompilado().gerar_arquivo_completo(df, **parametros)
+
+
+def motor_lotes(df: pd.DataFrame, parametros: dict) -> str:
+    
+    return "\r\n".join(GeradorCNABCompilado().gerar_linhas(iterar_registros(df), **parametros))
+
+
+def motor_fatorado(df: pd.DataFrame, parametros: dict) -> str:
+    
+    gerador = GeradorCNABCompilado()
+    parametros = dict(parametros)
+    coobrigacao, tipo_baixa = parametros.pop('coobrigacao'), parametros.pop('tipo_baixa')
+    
+    detalhes = gerador.gerar_lote_fatorado(df, 2, coobrigacao, tipo_baixa)
+    return "\r\n".join([gerador.gerar_header(**parametros), *detalhes, gerador.gerar_trailer(len(detalhes) + 2)])
+
+
+def motor_registros(df: pd.DataFrame, parametros: dict) -> str:
+    
+    df = tipos_como_iterrows(df)
+    registros = df.astype(object).where(df.notna(), None).to_dict('records')
+    return "\r\n".join(GeradorCNABCompilado().gerar_linhas(registros, **parametros))
+
+
+MOTORES: Dict[str, Callable[[pd.DataFrame, dict], str]] = {
+    'compilado': motor_compilado,
+    'lotes': motor_lotes,
+    'fatorado': motor_fatorado,
+    'registros': motor_registros,
+}
+
+
+def _motor_planejador(estrategia: str, processos: int) -> Callable[[str, dict], str]:
+    
+    def motor(caminho: str, parametros: dict) -> str:
+        plano = PlanoExecucao(
+            estrategia, estimar_registros(caminho, caminho), 0, 0, TAMANHO_LOTE_ARQUIVO, processos
+        )
+        saida = caminho + ".REM"
+        try:
+            gerar_remessa(caminho, caminho, saida, **parametros, plano=plano)
+            with open(saida, 'rb') as f:
+                return f.read().decode('latin-1')
+        finally:
+            if os.path.exists(saida):
+                os.remove(saida)
+    
+    return motor
+
+
+def motor_pipeline(caminho: str, parametros: dict) -> str:
+    
+    saida = caminho + ".REM"
+    try:
+        resultado = gerar_remessa_pipeline(
+            caminho, caminho, saida, **parametros, tamanho_lote=TAMANHO_LOTE_ARQUIVO, janela=2
+        )
+        if resultado.erros:
+            erro = resultado.erros[0]
+            raise ValueError(f"{len(resultado.erros)} linhas com erro; linha {erro.linha}: {erro.mensagem}")
+        with open(saida, 'rb') as f:
+            return f.read().decode('latin-1')
+    finally:
+        if os.path.exists(saida):
+            os.remove(saida)
+
+
+FORMATOS_ARQUIVO: Dict[str, Tuple[Callable[[pd.DataFrame, str], None], Callable[[str], pd.DataFrame]]] = {
+    'csv': (lambda df, caminho: df.to_csv(caminho, index=False), pd.read_csv),
+    'xlsx': (lambda df, caminho: df.to_excel(caminho, index=False), pd.read_excel),
+}
+
+MOTORES_ARQUIVO: Dict[str, Tuple[str, Callable[[str, dict], str]]] = {
+    'csv_streaming': ('csv', _motor_planejador(ESTRATEGIA_STREAMING, 1)),
+    'csv_paralelo': ('csv', _motor_planejador(ESTRATEGIA_PARALELO, 2)),
+    'csv_faixas': ('csv', _motor_planejador(ESTRATEGIA_FAIXAS, 2)),
+    'csv_pipeline': ('csv', motor_pipeline),
+    'xlsx_streaming': ('xlsx', _motor_planejador(ESTRATEGIA_STREAMING, 1)),
+    'xlsx_paralelo': ('xlsx', _motor_planejador(ESTRATEGIA_PARALELO, 2)),
+    'xlsx_pipeline': ('xlsx', motor_pipeline),
+}
+
+
+def _executar(motor: Callable, entrada, parametros: dict):
+    
+    inicio = time.perf_counter()
+    try:
+        conteudo, erro = motor(entrada, parametros).encode('latin-1'), None
+    except Exception as e:
+        conteudo, erro = None, f"{type(e).__name__}: {e}"
+    return conteudo, erro, time.perf_counter() - inicio
+
+
+def _comparar(esperado: Optional[bytes], erro_esperado: Optional[str], segundos_referencia: float,
+              motores: Dict[str, Callable], entrada, parametros: dict) -> List[dict]:
+    
+    resultados = []
+    for nome, motor in motores.items():
+        obtido, erro, segundos = _executar(motor, entrada, parametros)
+        
+        if esperado is not None and obtido is not None:
+            posicao = primeira_diferenca(esperado, obtido)
+            identico = posicao is None
+        else:
+            posicao = None
+            identico = (esperado is None) == (obtido is None)
+        
+        linha = coluna = trecho_esperado = trecho_obtido = None
+        if posicao is not None:
+            linha = posicao // TAMANHO_LINHA_ARQUIVO + 1
+            coluna = posicao % TAMANHO_LINHA_ARQUIVO + 1
+            inicio = posicao - coluna + 1
+            trecho_esperado = esperado[inicio:inicio + TAMANHO_LINHA_ARQUIVO - 2].decode('latin-1')
+            trecho_obtido = obtido[inicio:inicio + TAMANHO_LINHA_ARQUIVO - 2].decode('latin-1')
+        
+        resultados.append({
+            'MOTOR': nome,
+            'IDENTICO': identico,
+            'PRIMEIRA_DIFERENCA': posicao,
+            'LINHA': linha,
+            'COLUNA': coluna,
+            'ESPERADO': trecho_esperado,
+            'OBTIDO': trecho_obtido,
+            'ERRO_REFERENCIA': erro_esperado,
+            'ERRO': erro,
+            'SEGUNDOS_REFERENCIA': segundos_referencia,
+            'SEGUNDOS': segundos,
+            'ACELERACAO': segundos_referencia / segundos if segundos else None,
+        })
+    
+    return resultados
+
+
+def comparar_motores(df: pd.DataFrame, motores: Optional[Dict[str, Callable]] = None,
+                     parametros: Optional[dict] = None,
+                     referencia: Callable = motor_legado) -> pd.DataFrame:
+    
+    motores = MOTORES if motores is None else motores
+    parametros = {**PARAMETROS_PADRAO, **(parametros or {})}
+    
+    esperado, erro_esperado, segundos_referencia = _executar(referencia, df, parametros)
+    
+    return pd.DataFrame(_comparar(esperado, erro_esperado, segundos_referencia, motores, df, parametros))
+
+
+def comparar_arquivos(df: pd.DataFrame, motores: Optional[Dict[str, Tuple[str, Callable]]] = None,
+                      parametros: Optional[dict] = None,
+                      referencia: Callable = motor_legado) -> pd.DataFrame:
+    
+    motores = MOTORES_ARQUIVO if motores is None else motores
+    parametros = {**PARAMETROS_PADRAO, **(parametros or {})}
+    
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for formato, (gravar, ler) in FORMATOS_ARQUIVO.items():
+            motores_formato = {nome: motor for nome, (fmt, motor) in motores.items() if fmt == formato}
+            if not motores_formato:
+                continue
+            
+            caminho = os.path.join(diretorio, f"carteira.{formato}")
+            gravar(df, caminho)
+            
+            esperado, erro_esperado, segundos_referencia = _executar(
+                lambda caminho, parametros: referencia(ler(caminho), parametros), caminho, parametros
+            )
+            resultados.extend(_comparar(
+                esperado, erro_esperado, segundos_referencia, motores_formato, caminho, parametros
+            ))
+    
+    return pd.DataFrame(resultados)
+
+
+def executar_rodadas(quantidade: int, rodadas: int, semente: int = 0,
+                     motores: Optional[Dict[str, Callable]] = None,
+                     parametros: Optional[dict] = None,
+                     motores_arquivo: Optional[Dict[str, Tuple[str, Callable]]] = None) -> pd.DataFrame:
+    
+    motores_arquivo = MOTORES_ARQUIVO if motores_arquivo is None else motores_arquivo
+    
+    resultados = []
+    for rodada in range(rodadas):
+        for carteira, gerar in CARTEIRAS.items():
+            df = gerar(quantidade, semente + rodada)
+            resultado = pd.concat([
+                comparar_motores(df, motores, parametros),
+                comparar_arquivos(df, motores_arquivo, parametros),
+            ], ignore_index=True)
+            resultado.insert(0, 'RODADA', rodada)
+            resultado.insert(1, 'CARTEIRA', carteira)
+            resultados.append(resultado)
+    
+    return pd.concat(resultados, ignore_index=True)
+
+
+def resumir_rodadas(resultados: pd.DataFrame) -> List[str]:
+    
+    linhas = []
+    for motor, grupo in resultados.groupby('MOTOR', sort=False):
+        divergentes = grupo[~grupo['IDENTICO']]
+        aceleracao = grupo['SEGUNDOS_REFERENCIA'].sum() / grupo['SEGUNDOS'].sum()
+        linhas.append(
+            f"{motor}: {len(grupo) - len(divergentes)}/{len(grupo)} rodadas idênticas, "
+            f"{aceleracao:.2f}x mais rápido que o legado"
+        )
+        for item in divergentes.head(3).itertuples(index=False):
+            if item.PRIMEIRA_DIFERENCA is None or pd.isna(item.PRIMEIRA_DIFERENCA):
+                linhas.append(f"  rodada {item.RODADA} ({item.CARTEIRA}): {item.ERRO or item.ERRO_REFERENCIA}")
+            else:
+                linhas.append(
+                    f"  rodada {item.RODADA} ({item.CARTEIRA}): byte {int(item.PRIMEIRA_DIFERENCA)} "
+                    f"(linha {int(item.LINHA)}, coluna {int(item.COLUNA)})"
+                )
+    
+    return linhas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste diferencial dos motores de geração CNAB 444")
+    parser.add_argument("--registros", type=int, default=2000)
+    parser.add_argument("--rodadas", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--motores", nargs="*", choices=sorted([*MOTORES, *MOTORES_ARQUIVO]),
+                        default=sorted([*MOTORES, *MOTORES_ARQUIVO]))
+    args = parser.parse_args()
+    
+    resultados = executar_rodadas(
+        args.registros, args.rodadas, args.semente,
+        {nome: MOTORES[nome] for nome in args.motores if nome in MOTORES},
+        motores_arquivo={nome: MOTORES_ARQUIVO[nome] for nome in args.motores if nome in MOTORES_ARQUIVO}
+    )
+    
+    for linha in resumir_rodadas(resultados):
+        print(linha)
+    
+    sys.exit(0 if resultados['IDENTICO'].all() else 1)
@@ -0,0 +1,256 @@
+import os
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union, List
+from cnab_engine import CAMPOS_DETALHE
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+
+EXTENSOES_SUPORTADAS = ('.csv', '.xlsx', '.xls', '.parquet')
+
+
+def formato_arquivo(nome_arquivo: str) -> str:
+    
+    nome = nome_arquivo.lower()
+    for extensao in EXTENSOES_SUPORTADAS:
+        if nome.endswith(extensao):
+            return extensao.lstrip('.')
+    
+    raise ValueError(f"Formato de arquivo não suportado: {nome_arquivo}")
+
+
+def leitura_em_lotes(formato: str) -> bool:
+    
+    if formato == 'parquet':
+        return importlib.util.find_spec('pyarrow') is not None
+    return formato in ('csv', 'xlsx')
+
+
+def ler_dataframe(arquivo, nome_arquivo: str) -> "pd.DataFrame":
+    
+    import pandas as pd
+    
+    formato = formato_arquivo(nome_arquivo)
+    
+    if formato == 'csv':
+        return pd.read_csv(arquivo)
+    
+    if formato in ('xlsx', 'xls'):
+        return pd.read_excel(arquivo)
+    
+    try:
+        return pd.read_parquet(arquivo)
+    except ImportError as e:
+        raise ValueError(
+            "Leitura de Parquet requer pyarrow ou fastparquet instalado"
+        ) from e
+
+
+def ler_dataframes(arquivos: Sequence[Tuple[Any, str]],
+                   max_workers: Optional[int] = None) -> "pd.DataFrame":
+    
+    import pandas as pd
+    
+    if not arquivos:
+        raise ValueError("Nenhum arquivo informado")
+    
+    for _, nome_arquivo in arquivos:
+        formato_arquivo(nome_arquivo)
+    
+    max_workers = max_workers or min(len(arquivos), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        dfs = list(executor.map(lambda item: ler_dataframe(*item), arquivos))
+    
+    nome_referencia = arquivos[0][1]
+    referencia = [coluna for coluna in CAMPOS_DETALHE if coluna in dfs[0].columns]
+    
+    for (_, nome_arquivo), df in zip(arquivos[1:], dfs[1:]):
+        colunas = [coluna for coluna in CAMPOS_DETALHE if coluna in df.columns]
+        if colunas != referencia:
+            ausentes = [coluna for coluna in referencia if coluna not in colunas]
+            extras = [coluna for coluna in colunas if coluna not in referencia]
+            raise ValueError(
+                f"Colunas de {nome_arquivo} não conferem com {nome_referencia}: "
+                f"ausentes [{', '.join(ausentes)}], extras [{', '.join(extras)}]"
+            )
+    
+    return pd.concat(dfs, ignore_index=True)
+
+
+def selecionar_campos(df: "pd.DataFrame") -> "pd.DataFrame":
+    
+    return df[[coluna for coluna in CAMPOS_DETALHE if coluna in df.columns]]
+
+
+def preparar_lote(df: "pd.DataFrame") -> "pd.DataFrame":
+    
+    df = tipos_como_iterrows(df)
+    lote = selecionar_campos(df)
+    
+    if len(df) and _tipo_linha(df) == object and _tipo_linha(lote) != object:
+        return lote.astype(object)
+    return lote
+
+
+def resumir_tipos(df: "pd.DataFrame") -> Dict[str, Tuple[Any, bool, bool]]:
+    
+    nulos = df.isna()
+    return {
+        coluna: (df[coluna].dtype, not nulos[coluna].all(), bool(nulos[coluna].any()))
+        for coluna in df.columns
+    }
+
+
+def _tipo_comum(tipos: set, com_nulos: bool):
+    
+    import numpy as np
+    
+    categorias = {tipo.kind for tipo in tipos}
+    if not categorias or categorias == {'b'}:
+        return None
+    
+    if categorias <= set('iuf'):
+        if com_nulos or 'f' in categorias or len(tipos) > 1:
+            return np.dtype('float64')
+        return next(iter(tipos))
+    
+    if categorias == {'M'} and len(tipos) == 1:
+        return next(iter(tipos))
+    
+    return np.dtype(object)
+
+
+def combinar_tipos(resumos: Iterable[Dict[str, Tuple[Any, bool, bool]]]) -> Dict[str, Any]:
+    
+    observados, preenchidos, com_nulos = {}, {}, {}
+    for resumo in resumos:
+        for coluna, (tipo, preenchido, nulo) in resumo.items():
+            observados.setdefault(coluna, set()).add(tipo)
+            preenchidos.setdefault(coluna, set())
+            if preenchido:
+                preenchidos[coluna].add(tipo)
+            com_nulos[coluna] = com_nulos.get(coluna, False) or nulo
+    
+    tipos = {}
+    for coluna, tipos_coluna in observados.items():
+        tipo = _tipo_comum(preenchidos[coluna], com_nulos[coluna])
+        if tipo is not None and any(observado != tipo for observado in tipos_coluna):
+            tipos[coluna] = tipo
+    
+    return tipos
+
+
+def tipos_csv(arquivo, tamanho_lote: int, **opcoes) -> Dict[str, Any]:
+    
+    import pandas as pd
+    
+    posicao = None if isinstance(arquivo, (str, os.PathLike)) else arquivo.tell()
+    try:
+        with pd.read_csv(arquivo, chunksize=tamanho_lote, **opcoes) as leitor:
+            return combinar_tipos(resumir_tipos(lote) for lote in leitor)
+    finally:
+        if posicao is not None:
+            arquivo.seek(posicao)
+
+
+def iterar_lotes(arquivo, nome_arquivo: str, tamanho_lote: int) -> Iterator[Union["pd.DataFrame", List]]:
+    
+    formato = formato_arquivo(nome_arquivo)
+    
+    if formato == 'csv':
+        import pandas as pd
+        
+        tipos = tipos_csv(arquivo, tamanho_lote)
+        with pd.read_csv(arquivo, chunksize=tamanho_lote, dtype=tipos or None) as leitor:
+            for lote in leitor:
+                yield preparar_lote(lote)
+        return
+    
+    if formato == 'xlsx':
+        from leitor_excel import ler_registros_excel
+        
+        lote = []
+        for registro in ler_registros_excel(arquivo):
+            lote.append(registro)
+            if len(lote) >= tamanho_lote:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+        return
+    
+    if formato == 'parquet' and leitura_em_lotes(formato):
+        import pyarrow.parquet as pq
+        
+        arquivo_parquet = pq.ParquetFile(arquivo)
+        tipos = combinar_tipos(
+            resumir_tipos(lote.to_pandas()) for lote in arquivo_parquet.iter_batches(batch_size=tamanho_lote)
+        )
+        for lote in arquivo_parquet.iter_batches(batch_size=tamanho_lote):
+            yield preparar_lote(lote.to_pandas().astype(tipos))
+        return
+    
+    df = preparar_lote(ler_dataframe(arquivo, nome_arquivo))
+    for inicio in range(0, len(df), tamanho_lote):
+        yield df.iloc[inicio:inicio + tamanho_lote]
+
+
+def _tipo_linha(df: "pd.DataFrame"):
+    
+    return df.iloc[:1].to_numpy().dtype
+
+
+def tipos_como_iterrows(df: "pd.DataFrame") -> "pd.DataFrame":
+    
+    if not len(df.columns) or not len(df):
+        return df
+    
+    tipo_linha = _tipo_linha(df)
+    if tipo_linha != object and any(tipo != tipo_linha for tipo in df.dtypes):
+        return df.astype(tipo_linha)
+    return df
+
+
+def _codigos_coluna(valores) -> "np.ndarray":
+    
+    import numpy as np
+    import pandas as pd
+    
+    if valores.dtype.kind == 'f':
+        chaves = np.ascontiguousarray(valores).view(f"i{valores.dtype.itemsize}")
+    elif valores.dtype.kind in 'iub':
+        chaves = valores
+    elif valores.dtype == object and pd.api.types.infer_dtype(valores, skipna=True) in ('string', 'empty'):
+        chaves = valores
+    else:
+        chaves = np.empty(len(valores), dtype=object)
+        chaves[:] = [(type(valor), valor) for valor in valores]
+    
+    return pd.factorize(chaves, use_na_sentinel=False)[0]
+
+
+def fatorar_colunas(df: "pd.DataFrame", colunas: Sequence[str]) -> Tuple["np.ndarray", "np.ndarray"]:
+    
+    import numpy as np
+    import pandas as pd
+    
+    codigos = np.zeros(len(df), dtype=np.int64)
+    for coluna in colunas:
+        codigos_coluna = _codigos_coluna(df[coluna].to_numpy())
+        codigos = codigos * (int(codigos_coluna.max(initial=0)) + 1) + codigos_coluna
+    
+    if len(colunas) > 1:
+        codigos = pd.factorize(codigos)[0]
+    
+    _, primeiros = np.unique(codigos, return_index=True)
+    return codigos, primeiros
+
+
+def iterar_registros(lote: Union["pd.DataFrame", List]) -> Iterator:
+    
+    if hasattr(lote, 'itertuples'):
+        return tipos_como_iterrows(lote).itertuples(index=False)
+    return iter(lote)
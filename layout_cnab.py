@@ -0,0 +1,450 @@
+import re
+from datetime import datetime
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from utils import formatar_texto, formatar_numero, formatar_data, formatar_dinheiro, obter_campo
+
+
+class Campo(NamedTuple):
+    inicio: int
+    tamanho: int
+    formato: str
+    origem: object = ""
+    constante: bool = False
+    truncar: bool = True
+    nome: str = ""
+
+
+class Registro(NamedTuple):
+    nome: str
+    rotulo: str
+    parametros: Tuple[str, ...]
+    variaveis: Tuple[Tuple[str, str], ...]
+    campos: Tuple[Campo, ...]
+
+
+class LayoutCNAB(NamedTuple):
+    nome: str
+    versao: str
+    tamanho_registro: int
+    registros: Dict[str, Registro]
+
+
+FORMATADORES = {
+    'texto': 'formatar_texto',
+    'numero': 'formatar_numero',
+    'dinheiro': 'formatar_dinheiro',
+}
+
+
+def valor_campo(linha, campo: str):
+    
+    return obter_campo(linha, campo)
+
+
+def texto_campo(valor) -> str:
+    
+    return "" if valor is None else str(valor)
+
+
+def seu_numero_campo(valor) -> str:
+    
+    if valor is None:
+        return ""
+    
+    try:
+        return str(int(float(valor)))
+    except Exception:
+        return str(valor)
+
+
+def inteiro_campo(valor) -> str:
+    
+    return "" if valor is None else str(int(valor))
+
+
+def documento_campo(valor) -> str:
+    
+    if valor is None:
+        return ""
+    
+    return str(valor).replace(".", "").replace("/", "").replace("-", "")
+
+
+def tipo_pessoa(documento: str) -> str:
+    
+    return "02" if len(documento) == 14 else "01"
+
+
+def campo_cedente(nome_cedente_raw: str, doc_cedente: str, tamanho: int = 60) -> str:
+    
+    nome_cedente = formatar_texto(nome_cedente_raw, 200)
+    
+    tamanho_nome_disponivel = tamanho - len(doc_cedente) - 1
+    
+    if tamanho_nome_disponivel > 0:
+        nome_cedente_truncado = nome_cedente[:tamanho_nome_disponivel]
+    else:
+        nome_cedente_truncado = ""
+    
+    campo_completo = nome_cedente_truncado
+    if nome_cedente_truncado and doc_cedente:
+        campo_completo = nome_cedente_truncado + " " + doc_cedente
+    elif doc_cedente:
+        campo_completo = doc_cedente
+    
+    return campo_completo[-tamanho:].rjust(tamanho)
+
+
+HEADER_444 = Registro(
+    nome='header',
+    rotulo='Header',
+    parametros=('cod_originador', 'razao_social', 'numero_banco', 'nome_banco', 'seq_arquivo'),
+    variaveis=(),
+    campos=(
+        Campo(0, 11, 'constante', "01REMESSA01"),
+        Campo(11, 15, 'texto', "COBRANCA", constante=True, nome='LITERAL_SERVICO'),
+        Campo(26, 20, 'numero', "cod_originador", nome='COD_ORIGINADOR'),
+        Campo(46, 30, 'texto', "razao_social", nome='RAZAO_SOCIAL'),
+        Campo(76, 3, 'numero', "numero_banco", nome='NUMERO_BANCO'),
+        Campo(79, 15, 'texto', "nome_banco", nome='NOME_BANCO'),
+        Campo(94, 6, 'data', "datetime.now()", nome='DATA_GRAVACAO'),
+        Campo(100, 8, 'constante', " " * 8),
+        Campo(108, 8, 'constante', "MX000001"),
+        Campo(116, 322, 'constante', " " * 322),
+        Campo(438, 6, 'constante', "000001", nome='SEQUENCIAL'),
+    )
+)
+
+DETALHE_444 = Registro(
+    nome='detalhe',
+    rotulo='Detalhe',
+    parametros=('linha', 'sequencial_registro', 'coobrigacao="02"', 'tipo_baixa="TOTAL"'),
+    variaveis=(
+        ('doc_cedente', "documento_campo(valor_campo(linha, 'DOC_CEDENTE'))"),
+        ('doc_sacado', "documento_campo(valor_campo(linha, 'DOC_SACADO'))"),
+        ('data_vencimento', "valor_campo(linha, 'DATA_VENCIMENTO_AJUSTADA')"),
+    ),
+    campos=(
+        Campo(0, 20, 'constante', "1" + " " * 19),
+        Campo(20, 2, 'numero', "coobrigacao", nome='COOBRIGACAO'),
+        Campo(22, 15, 'constante', "0" * 12 + "AA0"),
+        Campo(37, 25, 'numero', "seu_numero_campo(valor_campo(linha, 'SEU_NUMERO'))", nome='SEU_NUMERO'),
+        Campo(62, 8, 'constante', "0" * 8),
+        Campo(70, 11, 'numero', "inteiro_campo(valor_campo(linha, 'ID_RECEBIVEL'))", nome='ID_RECEBIVEL'),
+        Campo(81, 1, 'constante', " "),
+        Campo(82, 10, 'dinheiro', "valor_campo(linha, 'VALOR_PRESENTE')", nome='VALOR_PRESENTE'),
+        Campo(92, 2, 'constante', "0 "),
+        Campo(94, 6, 'data', "valor_campo(linha, 'DATA_REFERENCIA')", nome='DATA_REFERENCIA'),
+        Campo(100, 8, 'constante', " " * 5 + "0" + " " * 2),
+        Campo(108, 2, 'bruto', '"77" if tipo_baixa == "TOTAL" else "14"', nome='TIPO_BAIXA'),
+        Campo(110, 10, 'texto', "texto_campo(valor_campo(linha, 'NU_DOCUMENTO'))", nome='NU_DOCUMENTO'),
+        Campo(120, 6, 'data', "data_vencimento if data_vencimento is not None "
+                              "else valor_campo(linha, 'DATA_VENCIMENTO')", nome='DATA_VENCIMENTO'),
+        Campo(126, 13, 'dinheiro', "valor_campo(linha, 'VALOR_NOMINAL')", nome='VALOR_NOMINAL'),
+        Campo(139, 11, 'constante', "0" * 8 + "71 "),
+        Campo(150, 6, 'data', "valor_campo(linha, 'DATA_EMISSAO')", nome='DATA_EMISSAO'),
+        Campo(156, 3, 'constante', "000"),
+        Campo(159, 2, 'bruto', "tipo_pessoa(doc_cedente)", nome='TIPO_PESSOA_CEDENTE'),
+        Campo(161, 31, 'constante', "0" * 31),
+        Campo(192, 13, 'dinheiro', "valor_campo(linha, 'VALOR_AQUISICAO')", nome='VALOR_AQUISICAO'),
+        Campo(205, 13, 'constante', "0" * 13),
+        Campo(218, 2, 'bruto', "tipo_pessoa(doc_sacado)", nome='TIPO_PESSOA_SACADO'),
+        Campo(220, 14, 'numero', "doc_sacado", nome='DOC_SACADO'),
+        Campo(234, 40, 'texto', "texto_campo(valor_campo(linha, 'NOME_SACADO'))", nome='NOME_SACADO'),
+        Campo(274, 40, 'texto', "ENDERECO COMPLETO", constante=True, nome='ENDERECO_SACADO'),
+        Campo(314, 9, 'numero', "texto_campo(valor_campo(linha, 'CHAVE_NFE'))", nome='CHAVE_NFE'),
+        Campo(323, 11, 'constante', " " * 3 + "0" * 8),
+        Campo(334, 60, 'bruto', "campo_cedente(texto_campo(valor_campo(linha, 'NOME_CEDENTE')), doc_cedente)", nome='CEDENTE'),
+        Campo(394, 44, 'constante', "0" * 44),
+        Campo(438, 6, 'numero', "sequencial_registro", truncar=False, nome='SEQUENCIAL'),
+    )
+)
+
+TRAILER_444 = Registro(
+    nome='trailer',
+    rotulo='Trailer',
+    parametros=('total_registros',),
+    variaveis=(),
+    campos=(
+        Campo(0, 438, 'constante', "9" + " " * 437),
+        Campo(438, 6, 'numero', "total_registros", truncar=False, nome='TOTAL_REGISTROS'),
+    )
+)
+
+LAYOUT_444 = LayoutCNAB(
+    nome='444',
+    versao='1',
+    tamanho_registro=444,
+    registros={
+        'header': HEADER_444,
+        'detalhe': DETALHE_444,
+        'trailer': TRAILER_444,
+    }
+)
+
+LAYOUTS: Dict[str, LayoutCNAB] = {LAYOUT_444.nome: LAYOUT_444}
+
+_NAMESPACE = {
+    'datetime': datetime,
+    'formatar_texto': formatar_texto,
+    'formatar_numero': formatar_numero,
+    'formatar_data': formatar_data,
+    'formatar_dinheiro': formatar_dinheiro,
+    'valor_campo': valor_campo,
+    'texto_campo': texto_campo,
+    'seu_numero_campo': seu_numero_campo,
+    'inteiro_campo': inteiro_campo,
+    'documento_campo': documento_campo,
+    'tipo_pessoa': tipo_pessoa,
+    'campo_cedente': campo_cedente,
+}
+
+_COMPILADOS: Dict[Tuple[str, str, str, Tuple[Tuple[str, ...], ...]], Callable[..., str]] = {}
+
+_PADRAO_COLUNA = re.compile(r"valor_campo\(linha, '(\w+)'\)")
+_PADRAO_ARGUMENTO_LINHA = re.compile(r"\b(linha|sequencial_registro)\b")
+
+
+def nome_campo(campo: Campo) -> str:
+    
+    if campo.nome:
+        return campo.nome
+    
+    return f"POSICAO_{campo.inicio + 1:03d}_{campo.inicio + campo.tamanho:03d}"
+
+
+def _referencia(nome: str, expressao: str) -> bool:
+    
+    return re.search(rf"\b{re.escape(nome)}\b", expressao) is not None
+
+
+def dependencias_campo(registro: Registro, campo: Campo) -> Optional[FrozenSet[str]]:
+    
+    variaveis = dict(registro.variaveis)
+    pendentes = [str(campo.origem)]
+    visitadas = set()
+    colunas = set()
+    
+    while pendentes:
+        expressao = pendentes.pop()
+        colunas.update(_PADRAO_COLUNA.findall(expressao))
+        
+        restante = _PADRAO_COLUNA.sub("", expressao)
+        if _PADRAO_ARGUMENTO_LINHA.search(restante):
+            return None
+        
+        for nome, expressao_variavel in variaveis.items():
+            if nome not in visitadas and _referencia(nome, restante):
+                visitadas.add(nome)
+                pendentes.append(expressao_variavel)
+    
+    return frozenset(colunas)
+
+
+def grupos_fatorados(layout: LayoutCNAB, tipo: str,
+                     colunas: Sequence[str]) -> List[Tuple[Tuple[str, ...], Tuple[Campo, ...]]]:
+    
+    registro = layout.registros[tipo]
+    grupos: Dict[FrozenSet[str], List[Campo]] = {}
+    
+    for campo in registro.campos:
+        if campo.formato == 'constante' or campo.constante:
+            continue
+        
+        dependencias = dependencias_campo(registro, campo)
+        if dependencias and dependencias <= set(colunas):
+            grupos.setdefault(dependencias, []).append(campo)
+    
+    return [
+        (tuple(coluna for coluna in colunas if coluna in dependencias), tuple(campos))
+        for dependencias, campos in grupos.items()
+    ]
+
+
+def campos_parametricos(layout: LayoutCNAB, tipo: str) -> Tuple[Campo, ...]:
+    
+    registro = layout.registros[tipo]
+    
+    return tuple(
+        campo for campo in registro.campos
+        if campo.formato != 'constante' and not campo.constante
+        and dependencias_campo(registro, campo) == frozenset()
+    )
+
+
+def registrar_layout(layout: LayoutCNAB) -> LayoutCNAB:
+    
+    for registro in layout.registros.values():
+        _validar_campos(layout, registro)
+    
+    LAYOUTS[layout.nome] = layout
+    return layout
+
+
+def derivar_layout(base: LayoutCNAB, nome: str, versao: str,
+                   substituicoes: Dict[str, Iterable[Campo]]) -> LayoutCNAB:
+    
+    registros = dict(base.registros)
+    
+    for tipo, campos_novos in substituicoes.items():
+        registro = registros[tipo]
+        novos = list(campos_novos)
+        
+        campos = [
+            campo for campo in registro.campos
+            if not any(
+                campo.inicio < novo.inicio + novo.tamanho and novo.inicio < campo.inicio + campo.tamanho
+                for novo in novos
+            )
+        ]
+        campos.extend(novos)
+        campos.sort(key=lambda campo: campo.inicio)
+        
+        registros[tipo] = registro._replace(campos=tuple(campos))
+    
+    return registrar_layout(base._replace(nome=nome, versao=versao, registros=registros))
+
+
+def _validar_campos(layout: LayoutCNAB, registro: Registro) -> None:
+    
+    posicao = 0
+    for campo in registro.campos:
+        if campo.inicio != posicao:
+            raise ValueError(
+                f"{registro.rotulo} do layout {layout.nome}: campo na posição "
+                f"{campo.inicio} (esperado: {posicao})"
+            )
+        
+        if campo.formato == 'constante' and len(campo.origem) != campo.tamanho:
+            raise ValueError(
+                f"{registro.rotulo} do layout {layout.nome}: constante na posição "
+                f"{campo.inicio} com tamanho {len(campo.origem)} (esperado: {campo.tamanho})"
+            )
+        
+        posicao += campo.tamanho
+    
+    if posicao != layout.tamanho_registro:
+        raise ValueError(
+            f"{registro.rotulo} do layout {layout.nome} com tamanho incorreto: "
+            f"{posicao} (esperado: {layout.tamanho_registro})"
+        )
+
+
+def _formatar_constante(campo: Campo) -> str:
+    
+    if campo.formato == 'data':
+        valor = formatar_data(campo.origem)
+    elif campo.formato in FORMATADORES:
+        valor = _NAMESPACE[FORMATADORES[campo.formato]](campo.origem, campo.tamanho)
+    else:
+        valor = str(campo.origem)
+    
+    return valor[:campo.tamanho] if campo.truncar else valor
+
+
+def _expressao_campo(campo: Campo) -> str:
+    
+    if campo.formato == 'data':
+        return f"formatar_data({campo.origem})"
+    
+    if campo.formato == 'bruto':
+        expressao = f"({campo.origem})"
+    else:
+        expressao = f"{FORMATADORES[campo.formato]}({campo.origem}, {campo.tamanho})"
+    
+    return f"{expressao}[:{campo.tamanho}]" if campo.truncar else expressao
+
+
+def _variaveis_usadas(registro: Registro, campos: Iterable[Campo]) -> List[Tuple[str, str]]:
+    
+    expressoes = [str(campo.origem) for campo in campos]
+    usadas = []
+    
+    for nome, expressao in reversed(registro.variaveis):
+        if any(_referencia(nome, texto) for texto in expressoes):
+            usadas.append((nome, expressao))
+            expressoes.append(expressao)
+    
+    return usadas[::-1]
+
+
+def gerar_fonte(layout: LayoutCNAB, tipo: str, externos: Sequence[Sequence[str]] = ()) -> str:
+    
+    registro = layout.registros[tipo]
+    _validar_campos(layout, registro)
+    
+    posicoes_externas = {
+        nome: (grupo, indice)
+        for grupo, nomes in enumerate(externos)
+        for indice, nome in enumerate(nomes)
+    }
+    
+    parametros = registro.parametros
+    variaveis = registro.variaveis
+    if posicoes_externas:
+        parametros = parametros + ('fatias=()',)
+        variaveis = _variaveis_usadas(registro, [
+            campo for campo in registro.campos
+            if campo.formato != 'constante' and not campo.constante
+            and nome_campo(campo) not in posicoes_externas
+        ])
+    
+    linhas = [f"def gerar_{registro.nome}({', '.join(parametros)}):"]
+    
+    for nome, expressao in variaveis:
+        linhas.append(f"    {nome} = {expressao}")
+    
+    partes = []
+    constante_pendente = ""
+    
+    for indice, campo in enumerate(registro.campos):
+        if campo.formato == 'constante' or campo.constante:
+            constante_pendente += (
+                campo.origem if campo.formato == 'constante' else _formatar_constante(campo)
+            )
+            continue
+        
+        if constante_pendente:
+            partes.append(constante_pendente.replace("{", "{{").replace("}", "}}"))
+            constante_pendente = ""
+        
+        externo = posicoes_externas.get(nome_campo(campo))
+        if externo is not None:
+            linhas.append(f"    _c{indice} = fatias[{externo[0]}][{externo[1]}]")
+        else:
+            linhas.append(f"    _c{indice} = {_expressao_campo(campo)}")
+        partes.append(f"{{_c{indice}}}")
+    
+    if constante_pendente:
+        partes.append(constante_pendente.replace("{", "{{").replace("}", "}}"))
+    
+    linhas.append(f"    registro = f{''.join(partes)!r}")
+    linhas.append(f"    if len(registro) != {layout.tamanho_registro}:")
+    linhas.append("        raise ValueError(")
+    linhas.append(f"            f\"{registro.rotulo} com tamanho incorreto: {{len(registro)}} \"")
+    linhas.append(f"            f\"(esperado: {layout.tamanho_registro})\"")
+    linhas.append("        )")
+    linhas.append("    return registro")
+    
+    return "\n".join(linhas) + "\n"
+
+
+def compilar_registro(layout: LayoutCNAB, tipo: str,
+                      externos: Sequence[Sequence[str]] = ()) -> Callable[..., str]:
+    
+    externos = tuple(tuple(nomes) for nomes in externos)
+    chave = (layout.nome, layout.versao, tipo, externos)
+    
+    funcao = _COMPILADOS.get(chave)
+    if funcao is None:
+        fonte = gerar_fonte(layout, tipo, externos)
+        codigo = compile(fonte, f"<layout {layout.nome} v{layout.versao} {tipo}>", "exec")
+        
+        namespace = dict(_NAMESPACE)
+        exec(codigo, namespace)
+        
+        funcao = namespace[f"gerar_{layout.registros[tipo].nome}"]
+        funcao.__source__ = fonte
+        _COMPILADOS[chave] = funcao
+    
+    return funcao
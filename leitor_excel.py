@@ -0,0 +1,253 @@
+import os
+import re
+import sys
+import time
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from openpyxl import load_workbook
+
+from cnab_engine import GeradorCNAB, CAMPOS_DETALHE
+
+
+RegistroExcel = namedtuple('RegistroExcel', CAMPOS_DETALHE)
+
+VALORES_NULOS = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+    '#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#GETTING_DATA',
+})
+
+INTEIRO_TEXTO = re.compile(r'\s*[+-]?\d+\s*$')
+
+NAN = float("nan")
+
+
+def mapear_cabecalho(cabecalho: Tuple) -> Dict[str, int]:
+    
+    posicoes = {}
+    for indice, nome in enumerate(cabecalho):
+        if nome is None:
+            continue
+        
+        nome_coluna = str(nome)
+        if nome_coluna in CAMPOS_DETALHE and nome_coluna not in posicoes:
+            posicoes[nome_coluna] = indice
+    
+    return posicoes
+
+
+def categoria_valor(valor) -> str:
+    
+    if valor is None:
+        return 'nulo'
+    if isinstance(valor, bool):
+        return 'booleano'
+    if isinstance(valor, int):
+        return 'inteiro'
+    if isinstance(valor, float):
+        return 'inteiro' if valor.is_integer() else 'real'
+    
+    if isinstance(valor, str):
+        if valor in VALORES_NULOS:
+            return 'nulo'
+        if INTEIRO_TEXTO.match(valor):
+            return 'inteiro'
+        if '_' not in valor:
+            try:
+                float(valor)
+                return 'real'
+            except ValueError:
+                pass
+    
+    return 'outro'
+
+
+def tipo_coluna(categorias: set) -> str:
+    
+    if 'outro' in categorias:
+        return 'objeto'
+    if categorias == {'booleano'}:
+        return 'booleano'
+    if categorias <= {'inteiro', 'booleano'}:
+        return 'inteiro'
+    return 'real'
+
+
+def converter_valor(valor, tipo: str) -> Any:
+    
+    if categoria_valor(valor) == 'nulo':
+        return NAN
+    if tipo == 'inteiro':
+        return int(valor)
+    if tipo == 'real':
+        return float(valor)
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+
+def iterar_linhas_excel(arquivo, planilha: Optional[str] = None) -> Iterator[Tuple]:
+    
+    workbook = load_workbook(arquivo, read_only=True, data_only=True, keep_links=False)
+    
+    try:
+        aba = workbook[planilha] if planilha else workbook.active
+        aba.reset_dimensions()
+        
+        vazias = 0
+        for valores in aba.iter_rows(values_only=True):
+            if all(valor is None or valor == "" for valor in valores):
+                vazias += 1
+                continue
+            
+            for _ in range(vazias):
+                yield ()
+            vazias = 0
+            yield valores
+    
+    finally:
+        workbook.close()
+
+
+def inferir_tipos_excel(arquivo, planilha: Optional[str] = None) -> Tuple[Optional[Tuple], Dict[str, str]]:
+    
+    posicao = None if isinstance(arquivo, (str, os.PathLike)) else arquivo.tell()
+    try:
+        linhas = iterar_linhas_excel(arquivo, planilha)
+        cabecalho = next(linhas, None)
+        if not cabecalho:
+            return None, {}
+        
+        largura = max(indice + 1 for indice, nome in enumerate(cabecalho) if nome is not None and nome != "")
+        posicoes = mapear_cabecalho(cabecalho)
+        mapeadas = {indice: set() for indice in posicoes.values()}
+        outras = {indice: set() for indice in range(largura) if indice not in mapeadas}
+        linha_objeto = False
+        
+        for valores in linhas:
+            tamanho = len(valores)
+            
+            for indice, categorias in mapeadas.items():
+                if 'outro' not in categorias:
+                    categorias.add(categoria_valor(valores[indice]) if indice < tamanho else 'nulo')
+            
+            for indice, categorias in outras.items():
+                categoria = categoria_valor(valores[indice]) if indice < tamanho else 'nulo'
+                if categoria == 'outro':
+                    linha_objeto = True
+                    break
+                categorias.add(categoria)
+            
+            if linha_objeto or any('outro' in categorias for categorias in mapeadas.values()):
+                linha_objeto = True
+                outras.clear()
+    finally:
+        if posicao is not None:
+            arquivo.seek(posicao)
+    
+    tipos = {campo: tipo_coluna(mapeadas[indice]) for campo, indice in posicoes.items()}
+    
+    todas = [*tipos.values(), *(tipo_coluna(categorias) for categorias in outras.values())]
+    if not linha_objeto and not {'objeto', 'booleano'} & set(todas) and 'real' in todas:
+        tipos = {campo: 'real' for campo in tipos}
+    
+    return cabecalho, tipos
+
+
+def ler_registros_excel(arquivo, planilha: Optional[str] = None) -> Iterator[RegistroExcel]:
+    
+    cabecalho, tipos = inferir_tipos_excel(arquivo, planilha)
+    if cabecalho is None:
+        return
+    
+    posicoes = mapear_cabecalho(cabecalho)
+    indices = [(posicoes.get(campo), tipos.get(campo)) for campo in CAMPOS_DETALHE]
+    booleanos = [{} for _ in indices]
+    
+    linhas = iterar_linhas_excel(arquivo, planilha)
+    next(linhas, None)
+    
+    for valores in linhas:
+        tamanho = len(valores)
+        registro = []
+        for (indice, tipo), vistos in zip(indices, booleanos):
+            if indice is None:
+                registro.append(None)
+                continue
+            
+            valor = converter_valor(valores[indice] if indice < tamanho else None, tipo)
+            if tipo == 'objeto' and isinstance(valor, (bool, int)) and valor in (0, 1):
+                valor = vistos.setdefault(valor, valor)
+            registro.append(valor)
+        
+        yield RegistroExcel._make(registro)
+
+
+def _pico_memoria_mb() -> float:
+    import resource
+    
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return pico / (1024 * 1024)
+    return pico / 1024
+
+
+def _medir_leitura(caminho: str, modo: str) -> Dict[str, float]:
+    
+    inicio = time.perf_counter()
+    
+    if modo == 'pandas':
+        import pandas as pd
+        df = pd.read_excel(caminho)
+        registros = (linha for _, linha in df.iterrows())
+    else:
+        registros = ler_registros_excel(caminho)
+    
+    gerador = GeradorCNAB()
+    total_linhas = 0
+    for _ in gerador.gerar_linhas(registros, "0", "BENCHMARK", "000", "BENCHMARK", 1):
+        total_linhas += 1
+    
+    segundos = time.perf_counter() - inicio
+    total_detalhes = total_linhas - 2
+    
+    return {
+        'registros': total_detalhes,
+        'segundos': segundos,
+        'registros_por_segundo': total_detalhes / segundos if segundos else 0.0,
+        'pico_memoria_mb': _pico_memoria_mb(),
+    }
+
+
+def comparar_leitores(caminho: str) -> Dict[str, Dict[str, float]]:
+    
+    resultados = {}
+    contexto = multiprocessing.get_context('spawn')
+    
+    for modo in ('pandas', 'streaming'):
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+            resultados[modo] = executor.submit(_medir_leitura, caminho, modo).result()
+    
+    return resultados
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python leitor_excel.py <arquivo.xlsx>")
+        sys.exit(1)
+    
+    resultados = comparar_leitores(sys.argv[1])
+    
+    print("=" * 80)
+    print("COMPARAÇÃO DE LEITURA EXCEL: pd.read_excel x openpyxl read_only")
+    print("=" * 80)
+    
+    for modo, medicao in resultados.items():
+        print(f"\n{modo}:")
+        print(f"  Registros: {medicao['registros']:,}")
+        print(f"  Tempo: {medicao['segundos']:.2f} s")
+        print(f"  Registros/s: {medicao['registros_por_segundo']:,.0f}")
+        print(f"  Pico de memória (RSS): {medicao['pico_memoria_mb']:,.1f} MB")
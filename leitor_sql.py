@@ -0,0 +1,156 @@
+import sys
+import sqlite3
+import argparse
+from collections import namedtuple
+from datetime import date, datetime, time
+from typing import Any, BinaryIO, Dict, Iterator, List, Mapping, Optional, Sequence
+
+from cnab_engine import GeradorCNABCompilado, CAMPOS_DETALHE
+
+
+TAMANHO_LOTE_SQL = 5000
+
+RegistroSQL = namedtuple('RegistroSQL', CAMPOS_DETALHE)
+
+
+def mapear_colunas(descricao: Sequence[Sequence], mapeamento: Optional[Mapping[str, str]] = None) -> Dict[str, int]:
+    
+    apelidos = {str(coluna).strip().upper(): campo for coluna, campo in (mapeamento or {}).items()}
+    campos = {campo.upper(): campo for campo in CAMPOS_DETALHE}
+    
+    posicoes = {}
+    for indice, coluna in enumerate(descricao):
+        nome_coluna = str(coluna[0]).strip().upper()
+        destino = apelidos.get(nome_coluna)
+        if destino is None:
+            campo = campos.get(nome_coluna)
+            if campo is None:
+                continue
+        else:
+            campo = campos.get(str(destino).strip().upper())
+            if campo is None:
+                raise ValueError(f"Campo de destino desconhecido para a coluna {coluna[0]}: {destino}")
+        
+        if campo not in posicoes:
+            posicoes[campo] = indice
+    
+    return posicoes
+
+
+def converter_valor(valor: Any) -> Any:
+    
+    if isinstance(valor, date) and not isinstance(valor, datetime):
+        return datetime.combine(valor, time())
+    
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return bytes(valor).decode('utf-8', errors='replace')
+    
+    return valor
+
+
+def iterar_lotes_sql(conexao, consulta: str, parametros: Sequence = (),
+                     tamanho_lote: int = TAMANHO_LOTE_SQL,
+                     mapeamento: Optional[Mapping[str, str]] = None) -> Iterator[List[RegistroSQL]]:
+    
+    cursor_proprio = hasattr(conexao, 'cursor')
+    cursor = conexao.cursor() if cursor_proprio else conexao
+    
+    try:
+        cursor.arraysize = tamanho_lote
+        cursor.execute(consulta, parametros)
+        
+        if cursor.description is None:
+            raise ValueError("A consulta não retornou colunas")
+        
+        posicoes = mapear_colunas(cursor.description, mapeamento)
+        if not posicoes:
+            raise ValueError("Nenhuma coluna da consulta corresponde aos campos do detalhe")
+        
+        indices = [posicoes.get(campo) for campo in CAMPOS_DETALHE]
+        
+        while True:
+            linhas = cursor.fetchmany(tamanho_lote)
+            if not linhas:
+                break
+            
+            yield [
+                RegistroSQL._make(
+                    converter_valor(linha[indice]) if indice is not None else None
+                    for indice in indices
+                )
+                for linha in linhas
+            ]
+    
+    finally:
+        if cursor_proprio:
+            cursor.close()
+
+
+def ler_registros_sql(conexao, consulta: str, parametros: Sequence = (),
+                      tamanho_lote: int = TAMANHO_LOTE_SQL,
+                      mapeamento: Optional[Mapping[str, str]] = None) -> Iterator[RegistroSQL]:
+    
+    for lote in iterar_lotes_sql(conexao, consulta, parametros, tamanho_lote, mapeamento):
+        yield from lote
+
+
+def gerar_remessa_sql(conexao, consulta: str, destino: BinaryIO, cod_originador: str,
+                      razao_social: str, numero_banco: str,
+                      nome_banco: str, seq_arquivo: int,
+                      coobrigacao: str = "02", tipo_baixa: str = "TOTAL",
+                      parametros: Sequence = (), tamanho_lote: int = TAMANHO_LOTE_SQL,
+                      mapeamento: Optional[Mapping[str, str]] = None,
+                      gerador: Optional[GeradorCNABCompilado] = None) -> int:
+    
+    gerador = gerador or GeradorCNABCompilado()
+    
+    destino.write(gerador.gerar_header(cod_originador, razao_social, numero_banco,
+                                       nome_banco, seq_arquivo).encode('latin-1'))
+    
+    total_detalhes = 0
+    for lote in iterar_lotes_sql(conexao, consulta, parametros, tamanho_lote, mapeamento):
+        detalhes = gerador.gerar_lote(lote, total_detalhes + 2, coobrigacao, tipo_baixa)
+        destino.write(("\r\n" + "\r\n".join(detalhes)).encode('latin-1'))
+        total_detalhes += len(detalhes)
+    
+    trailer = gerador.gerar_trailer(total_detalhes + 2)
+    destino.write(("\r\n" + trailer).encode('latin-1'))
+    
+    return total_detalhes + 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Geração de remessa CNAB 444 a partir de uma consulta SQLite")
+    parser.add_argument("banco", help="Arquivo do banco SQLite")
+    parser.add_argument("consulta", help="Consulta SELECT com colunas nomeadas como os campos do detalhe")
+    parser.add_argument("saida")
+    parser.add_argument("--cod-originador", required=True)
+    parser.add_argument("--razao-social", required=True)
+    parser.add_argument("--numero-banco", required=True)
+    parser.add_argument("--nome-banco", required=True)
+    parser.add_argument("--seq-arquivo", type=int, default=1)
+    parser.add_argument("--coobrigacao", choices=["02", "01"], default="02")
+    parser.add_argument("--tipo-baixa", choices=["TOTAL", "PARCIAL"], default="TOTAL")
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE_SQL)
+    parser.add_argument("--mapear", nargs="*", default=[], metavar="COLUNA=CAMPO",
+                        help="Associa colunas da consulta a campos do detalhe")
+    args = parser.parse_args()
+    
+    mapeamento = dict(item.split("=", 1) for item in args.mapear)
+    
+    conexao = sqlite3.connect(f"file:{args.banco}?mode=ro", uri=True)
+    try:
+        with open(args.saida, 'wb') as arquivo_saida:
+            total_registros = gerar_remessa_sql(
+                conexao, args.consulta, arquivo_saida,
+                args.cod_originador, args.razao_social, args.numero_banco,
+                args.nome_banco, args.seq_arquivo, args.coobrigacao, args.tipo_baixa,
+                tamanho_lote=args.tamanho_lote, mapeamento=mapeamento
+            )
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+    finally:
+        conexao.close()
+    
+    print(f"Total de registros: {total_registros:,}")
@@ -0,0 +1,134 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+from layout_cnab import LayoutCNAB, LAYOUT_444, nome_campo
+
+
+CAMPOS_TOTALIZADOS = ('VALOR_NOMINAL', 'VALOR_PRESENTE', 'VALOR_AQUISICAO')
+CAMPO_CEDENTE = 'CEDENTE'
+
+
+def caminho_manifesto(caminho_remessa: str) -> str:
+    
+    return os.path.splitext(caminho_remessa)[0] + ".manifesto.json"
+
+
+class ManifestoRemessa:
+    
+    def __init__(self, layout: LayoutCNAB = LAYOUT_444):
+        
+        campos = {nome_campo(campo): campo for campo in layout.registros['detalhe'].campos}
+        
+        self._fatias_valores = [
+            (nome, slice(campos[nome].inicio, campos[nome].inicio + campos[nome].tamanho))
+            for nome in CAMPOS_TOTALIZADOS
+        ]
+        cedente = campos[CAMPO_CEDENTE]
+        self._fatia_cedente = slice(cedente.inicio, cedente.inicio + cedente.tamanho)
+        
+        self.registros = 0
+        self.totais = dict.fromkeys(CAMPOS_TOTALIZADOS, 0)
+        self.cedentes: Dict[str, Dict[str, int]] = {}
+        self.tamanho_bytes = 0
+        self._sha256 = hashlib.sha256()
+    
+    def registrar_detalhe(self, detalhe: str):
+        
+        chave = detalhe[self._fatia_cedente]
+        subtotal = self.cedentes.get(chave)
+        if subtotal is None:
+            subtotal = self.cedentes[chave] = dict.fromkeys(('registros',) + CAMPOS_TOTALIZADOS, 0)
+        
+        subtotal['registros'] += 1
+        for nome, fatia in self._fatias_valores:
+            centavos = int(detalhe[fatia])
+            self.totais[nome] += centavos
+            subtotal[nome] += centavos
+        
+        self.registros += 1
+    
+    def registrar_detalhes(self, detalhes: Iterable[str]):
+        
+        for detalhe in detalhes:
+            self.registrar_detalhe(detalhe)
+    
+    def incorporar(self, outro: "ManifestoRemessa"):
+        
+        self.registros += outro.registros
+        for nome in CAMPOS_TOTALIZADOS:
+            self.totais[nome] += outro.totais[nome]
+        
+        for chave, parcial in outro.cedentes.items():
+            subtotal = self.cedentes.setdefault(chave, dict.fromkeys(parcial, 0))
+            for nome, valor in parcial.items():
+                subtotal[nome] += valor
+    
+    def registrar_saida(self, dados: bytes):
+        
+        self._sha256.update(dados)
+        self.tamanho_bytes += len(dados)
+    
+    @property
+    def sha256(self) -> str:
+        
+        return self._sha256.hexdigest()
+    
+    def subtotais_cedentes(self) -> List[Dict[str, Any]]:
+        
+        subtotais = {}
+        for chave, subtotal in self.cedentes.items():
+            cedente = " ".join(chave.split())
+            acumulado = subtotais.setdefault(cedente, dict.fromkeys(subtotal, 0))
+            for nome, valor in subtotal.items():
+                acumulado[nome] += valor
+        
+        return [{'CEDENTE': cedente, **subtotal} for cedente, subtotal in sorted(subtotais.items())]
+    
+    def como_dict(self, **informacoes) -> Dict[str, Any]:
+        
+        return {
+            **informacoes,
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'registros_detalhe': self.registros,
+            'total_registros': self.registros + 2,
+            'tamanho_bytes': self.tamanho_bytes,
+            'sha256': self.sha256,
+            'totais_centavos': dict(self.totais),
+            'cedentes': self.subtotais_cedentes(),
+        }
+    
+    def para_json(self, **informacoes) -> str:
+        
+        return json.dumps(self.como_dict(**informacoes), ensure_ascii=False, indent=2)
+    
+    def gravar(self, caminho: str, **informacoes):
+        
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(self.para_json(**informacoes))
+    
+    def __getstate__(self):
+        
+        estado = self.__dict__.copy()
+        del estado['_sha256']
+        return estado
+    
+    def __setstate__(self, estado):
+        
+        self.__dict__.update(estado)
+        self._sha256 = hashlib.sha256()
+
+
+class SaidaComManifesto:
+    
+    def __init__(self, destino, manifesto: ManifestoRemessa):
+        
+        self.destino = destino
+        self.manifesto = manifesto
+    
+    def write(self, dados: bytes) -> int:
+        
+        self.manifesto.registrar_saida(dados)
+        return self.destino.write(dados)
@@ -0,0 +1,330 @@
+import os
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, Union
+
+
+TIPO_CONTEUDO = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+BUCKETS_SEGUNDOS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900)
+BUCKETS_REGISTROS = (10, 100, 1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000)
+BUCKETS_VAZAO = (100, 1_000, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 1_000_000)
+
+
+def _escapar(valor) -> str:
+    
+    return str(valor).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _numero(valor: float) -> str:
+    
+    if valor == float("inf"):
+        return "+Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+def _rotulos(nomes: Sequence[str], valores: Sequence, extras: Sequence[Tuple[str, str]] = ()) -> str:
+    
+    pares = [*zip(nomes, valores), *extras]
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + "}"
+
+
+class Contador:
+    
+    tipo = 'counter'
+    
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores: Dict[Tuple, float] = {}
+        self._trava = threading.Lock()
+    
+    def inc(self, valor: float = 1, **rotulos):
+        
+        chave = tuple(str(rotulos[nome]) for nome in self.rotulos)
+        with self._trava:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+    
+    def valor(self, **rotulos) -> float:
+        
+        return self._valores.get(tuple(str(rotulos[nome]) for nome in self.rotulos), 0)
+    
+    def amostras(self) -> List[str]:
+        
+        with self._trava:
+            itens = sorted(self._valores.items())
+        return [f"{self.nome}_total{_rotulos(self.rotulos, chave)} {_numero(valor)}" for chave, valor in itens]
+
+
+class Histograma:
+    
+    tipo = 'histogram'
+    
+    def __init__(self, nome: str, ajuda: str, buckets: Iterable[float], rotulos: Sequence[str] = ()):
+        
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._valores: Dict[Tuple, list] = {}
+        self._trava = threading.Lock()
+    
+    def observar(self, valor: float, **rotulos):
+        
+        chave = tuple(str(rotulos[nome]) for nome in self.rotulos)
+        with self._trava:
+            contagens = self._valores.setdefault(chave, [[0] * len(self.buckets), 0, 0.0])
+            for indice, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    contagens[0][indice] += 1
+                    break
+            contagens[1] += 1
+            contagens[2] += valor
+    
+    def contagem(self, **rotulos) -> int:
+        
+        itens = self._valores.get(tuple(str(rotulos[nome]) for nome in self.rotulos))
+        return itens[1] if itens else 0
+    
+    def amostras(self) -> List[str]:
+        
+        with self._trava:
+            itens = sorted((chave, ([*buckets], total, soma)) for chave, (buckets, total, soma) in self._valores.items())
+        
+        linhas = []
+        for chave, (buckets, total, soma) in itens:
+            acumulado = 0
+            for limite, quantidade in zip(self.buckets, buckets):
+                acumulado += quantidade
+                rotulos = _rotulos(self.rotulos, chave, [("le", _numero(limite))])
+                linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+            linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, chave)} {total}")
+            linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, chave)} {_numero(soma)}")
+        return linhas
+
+
+class Coletor:
+    
+    def __init__(self, nome: str, tipo: str, ajuda: str, rotulos: Sequence[str],
+                 funcao: Callable[[], Dict[Tuple, float]]):
+        
+        self.nome = nome
+        self.tipo = tipo
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.funcao = funcao
+    
+    def amostras(self) -> List[str]:
+        
+        sufixo = "_total" if self.tipo == 'counter' else ""
+        return [
+            f"{self.nome}{sufixo}{_rotulos(self.rotulos, chave)} {_numero(valor)}"
+            for chave, valor in sorted(self.funcao().items())
+        ]
+
+
+class RegistroMetricas:
+    
+    def __init__(self):
+        
+        self._metricas: Dict[str, object] = {}
+        self._trava = threading.Lock()
+    
+    def registrar(self, metrica):
+        
+        with self._trava:
+            self._metricas[metrica.nome] = metrica
+        return metrica
+    
+    def contador(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Contador:
+        
+        return self.registrar(Contador(nome, ajuda, rotulos))
+    
+    def histograma(self, nome: str, ajuda: str, buckets: Iterable[float],
+                   rotulos: Sequence[str] = ()) -> Histograma:
+        
+        return self.registrar(Histograma(nome, ajuda, buckets, rotulos))
+    
+    def coletor(self, nome: str, tipo: str, ajuda: str, rotulos: Sequence[str],
+                funcao: Callable[[], Dict[Tuple, float]]) -> Coletor:
+        
+        return self.registrar(Coletor(nome, tipo, ajuda, rotulos, funcao))
+    
+    def exportar(self) -> str:
+        
+        with self._trava:
+            metricas = list(self._metricas.values())
+        
+        linhas = []
+        for metrica in metricas:
+            linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+            linhas.append(f"# HELP {metrica.nome} {_escapar(metrica.ajuda)}")
+            linhas.extend(metrica.amostras())
+        linhas.append("# EOF")
+        
+        return "\n".join(linhas) + "\n"
+
+
+REGISTRO = RegistroMetricas()
+
+ARQUIVOS_GERADOS = REGISTRO.contador(
+    "cnab_arquivos_gerados", "Arquivos de remessa gerados", ("origem",)
+)
+REGISTROS_POR_ARQUIVO = REGISTRO.histograma(
+    "cnab_registros_por_arquivo", "Registros de detalhe por arquivo gerado", BUCKETS_REGISTROS, ("origem",)
+)
+VAZAO = REGISTRO.histograma(
+    "cnab_vazao_registros_por_segundo", "Registros de detalhe gerados por segundo", BUCKETS_VAZAO, ("origem",)
+)
+DURACAO_ETAPA = REGISTRO.histograma(
+    "cnab_duracao_etapa_segundos", "Duração de cada etapa da geração", BUCKETS_SEGUNDOS, ("etapa",)
+)
+ERROS_LINHA = REGISTRO.contador(
+    "cnab_erros_linha", "Registros que falharam na formatação, por tipo de erro", ("tipo",)
+)
+FALHAS_GERACAO = REGISTRO.contador(
+    "cnab_falhas_geracao", "Gerações de arquivo interrompidas, por tipo de erro", ("origem", "tipo")
+)
+
+
+def registrar_arquivo(origem: str, registros: int, segundos: float):
+    
+    ARQUIVOS_GERADOS.inc(origem=origem)
+    REGISTROS_POR_ARQUIVO.observar(registros, origem=origem)
+    if segundos > 0:
+        VAZAO.observar(registros / segundos, origem=origem)
+
+
+def registrar_erro_linha(erro: Union[BaseException, str]):
+    
+    ERROS_LINHA.inc(tipo=erro if isinstance(erro, str) else type(erro).__name__)
+
+
+def registrar_falha(origem: str, erro: BaseException):
+    
+    FALHAS_GERACAO.inc(origem=origem, tipo=type(erro).__name__)
+
+
+def observar_etapa(etapa: str, segundos: float):
+    
+    DURACAO_ETAPA.observar(segundos, etapa=etapa)
+
+
+@contextmanager
+def medir_etapa(etapa: str):
+    
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        observar_etapa(etapa, time.perf_counter() - inicio)
+
+
+CACHES: Dict[str, object] = {}
+_TRAVA_CACHES = threading.Lock()
+
+
+def _caches() -> List[Tuple[str, object]]:
+    
+    with _TRAVA_CACHES:
+        return list(CACHES.items())
+
+
+def _consultas_cache() -> Dict[Tuple, float]:
+    
+    valores = {}
+    for nome, cache in _caches():
+        estatisticas = cache.estatisticas()
+        valores[(nome, 'acerto_memoria')] = estatisticas['acertos_memoria']
+        valores[(nome, 'acerto_disco')] = estatisticas['acertos_disco']
+        valores[(nome, 'falta')] = estatisticas['faltas']
+    return valores
+
+
+def _ocupacao_cache() -> Dict[Tuple, float]:
+    
+    valores = {}
+    for nome, cache in _caches():
+        estatisticas = cache.estatisticas()
+        valores[(nome, 'memoria')] = estatisticas['bytes_memoria']
+        valores[(nome, 'disco')] = estatisticas['bytes_disco']
+    return valores
+
+
+def _taxa_acertos_cache() -> Dict[Tuple, float]:
+    
+    return {(nome,): cache.taxa_acertos() for nome, cache in _caches()}
+
+
+def registrar_cache(cache, nome: str = "sessao"):
+    
+    with _TRAVA_CACHES:
+        CACHES[nome] = cache
+    
+    REGISTRO.coletor(
+        "cnab_cache_consultas", 'counter', "Consultas ao cache por resultado", ("cache", "resultado"),
+        _consultas_cache
+    )
+    REGISTRO.coletor(
+        "cnab_cache_bytes", 'gauge', "Bytes ocupados pelo cache", ("cache", "local"), _ocupacao_cache
+    )
+    REGISTRO.coletor(
+        "cnab_cache_taxa_acertos", 'gauge', "Fração das consultas atendidas pelo cache", ("cache",),
+        _taxa_acertos_cache
+    )
+
+
+def exportar() -> str:
+    
+    return REGISTRO.exportar()
+
+
+def gravar_textfile(caminho: str):
+    
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, prefix=".metricas_", suffix=".prom")
+    try:
+        with os.fdopen(descritor, 'w', encoding='utf-8') as f:
+            f.write(exportar())
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+class ManipuladorMetricas(BaseHTTPRequestHandler):
+    
+    def do_GET(self):
+        
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        
+        corpo = exportar().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", TIPO_CONTEUDO)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+    
+    def log_message(self, formato, *args):
+        
+        pass
+
+
+def iniciar_servidor_metricas(host: str = "127.0.0.1", porta: int = 9464) -> ThreadingHTTPServer:
+    
+    servidor = ThreadingHTTPServer((host, porta), ManipuladorMetricas)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True, name="metricas-cnab").start()
+    return servidor
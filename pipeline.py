@@ -0,0 +1,257 @@
+import os
+import sys
+import csv
+import time
+import queue
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from cnab_engine import GeradorCNABCompilado
+from fontes_dados import iterar_lotes, iterar_registros
+from manifesto import ManifestoRemessa, SaidaComManifesto, caminho_manifesto
+from metricas import registrar_arquivo, registrar_erro_linha, registrar_falha
+from planejador import CAMPO_SEQUENCIAL, TAMANHO_BUFFER_ESCRITA
+
+
+TAMANHO_LOTE_PIPELINE = 10_000
+JANELA_PIPELINE = 4
+INTERVALO_ESPERA = 0.1
+
+_FIM = object()
+
+_gerador_processo: Optional[GeradorCNABCompilado] = None
+
+
+class ErroLinha(NamedTuple):
+    linha: int
+    tipo: str
+    mensagem: str
+
+
+class ResultadoPipeline(NamedTuple):
+    total_detalhes: int
+    erros: List[ErroLinha]
+    segundos: float
+
+
+def caminho_erros(caminho_remessa: str) -> str:
+    
+    return os.path.splitext(caminho_remessa)[0] + ".erros.csv"
+
+
+def _formatar_lote(lote, posicao_inicial: int, coobrigacao: str,
+                   tipo_baixa: str) -> Tuple[List[str], List[ErroLinha]]:
+    
+    global _gerador_processo
+    if _gerador_processo is None:
+        _gerador_processo = GeradorCNABCompilado()
+    
+    try:
+        return _gerador_processo.gerar_lote(lote, posicao_inicial + 2, coobrigacao, tipo_baixa), []
+    except Exception:
+        pass
+    
+    detalhes, erros = [], []
+    for linha, registro in enumerate(iterar_registros(lote), posicao_inicial + 2):
+        try:
+            detalhes.append(_gerador_processo.gerar_detalhe(registro, linha, coobrigacao, tipo_baixa))
+        except Exception as e:
+            erros.append(ErroLinha(linha, type(e).__name__, str(e)))
+    
+    return detalhes, erros
+
+
+def renumerar_detalhes(detalhes: List[str], sequencial_inicial: int) -> List[str]:
+    
+    inicio = CAMPO_SEQUENCIAL.inicio
+    fim = inicio + CAMPO_SEQUENCIAL.tamanho
+    
+    sequencial_final = sequencial_inicial + len(detalhes) - 1
+    if detalhes and sequencial_final >= 10 ** CAMPO_SEQUENCIAL.tamanho:
+        raise ValueError(f"Sequencial {sequencial_final} excede {CAMPO_SEQUENCIAL.tamanho} dígitos")
+    
+    return [
+        detalhe[:inicio] + str(sequencial).zfill(CAMPO_SEQUENCIAL.tamanho) + detalhe[fim:]
+        for sequencial, detalhe in enumerate(detalhes, sequencial_inicial)
+    ]
+
+
+def gerar_remessa_pipeline(arquivo, nome_arquivo: str, caminho_saida: str,
+                           cod_originador: str, razao_social: str, numero_banco: str,
+                           nome_banco: str, seq_arquivo: int,
+                           coobrigacao: str = "02", tipo_baixa: str = "TOTAL",
+                           tamanho_lote: int = TAMANHO_LOTE_PIPELINE,
+                           processos: int = 1, janela: int = JANELA_PIPELINE,
+                           manifesto: Optional[ManifestoRemessa] = None,
+                           ao_erro: Optional[Callable[[ErroLinha], None]] = None) -> ResultadoPipeline:
+    
+    inicio = time.perf_counter()
+    gerador = GeradorCNABCompilado()
+    
+    fila_lotes: "queue.Queue" = queue.Queue(maxsize=janela)
+    fila_formatados: "queue.Queue" = queue.Queue(maxsize=janela)
+    parar = threading.Event()
+    falhas: List[BaseException] = []
+    erros: List[ErroLinha] = []
+    total_detalhes = 0
+    
+    def colocar(fila, item) -> bool:
+        while not parar.is_set():
+            try:
+                fila.put(item, timeout=INTERVALO_ESPERA)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def obter(fila):
+        while not parar.is_set():
+            try:
+                return fila.get(timeout=INTERVALO_ESPERA)
+            except queue.Empty:
+                continue
+        return _FIM
+    
+    def falhar(erro: BaseException):
+        falhas.append(erro)
+        parar.set()
+    
+    def ler():
+        try:
+            posicao = 0
+            for lote in iterar_lotes(arquivo, nome_arquivo, tamanho_lote):
+                if not colocar(fila_lotes, (posicao, lote)):
+                    return
+                posicao += len(lote)
+            colocar(fila_lotes, _FIM)
+        except BaseException as e:
+            falhar(e)
+    
+    def escrever(destino):
+        nonlocal total_detalhes
+        try:
+            while True:
+                item = obter(fila_formatados)
+                if item is _FIM:
+                    return
+                
+                posicao, futuro = item
+                detalhes, erros_lote = futuro.result()
+                
+                for erro in erros_lote:
+                    erros.append(erro)
+                    registrar_erro_linha(erro.tipo)
+                    if ao_erro is not None:
+                        ao_erro(erro)
+                
+                if erros_lote or posicao != total_detalhes:
+                    detalhes = renumerar_detalhes(detalhes, total_detalhes + 2)
+                
+                if manifesto is not None:
+                    manifesto.registrar_detalhes(detalhes)
+                if detalhes:
+                    destino.write(("\r\n" + "\r\n".join(detalhes)).encode('latin-1'))
+                total_detalhes += len(detalhes)
+        except BaseException as e:
+            falhar(e)
+    
+    if processos > 1:
+        executor = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context('spawn'))
+    else:
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="formatacao")
+    
+    try:
+        with executor, open(caminho_saida, 'wb', buffering=TAMANHO_BUFFER_ESCRITA) as arquivo_saida:
+            destino = SaidaComManifesto(arquivo_saida, manifesto) if manifesto is not None else arquivo_saida
+            
+            header = gerador.gerar_header(cod_originador, razao_social, numero_banco,
+                                          nome_banco, seq_arquivo)
+            destino.write(header.encode('latin-1'))
+            
+            leitor = threading.Thread(target=ler, name="leitura", daemon=True)
+            escritor = threading.Thread(target=escrever, args=(destino,), name="escrita", daemon=True)
+            leitor.start()
+            escritor.start()
+            
+            try:
+                while True:
+                    item = obter(fila_lotes)
+                    if item is _FIM:
+                        break
+                    
+                    posicao, lote = item
+                    futuro = executor.submit(_formatar_lote, lote, posicao, coobrigacao, tipo_baixa)
+                    if not colocar(fila_formatados, (posicao, futuro)):
+                        break
+                
+                colocar(fila_formatados, _FIM)
+            except BaseException as e:
+                falhar(e)
+            finally:
+                leitor.join()
+                escritor.join()
+            
+            if falhas:
+                raise falhas[0]
+            
+            trailer = gerador.gerar_trailer(total_detalhes + 2)
+            destino.write(("\r\n" + trailer).encode('latin-1'))
+    
+    except Exception as e:
+        registrar_falha('pipeline', e)
+        raise
+    
+    segundos = time.perf_counter() - inicio
+    registrar_arquivo('pipeline', total_detalhes, segundos)
+    
+    return ResultadoPipeline(total_detalhes, erros, segundos)
+
+
+def gravar_erros(caminho: str, erros: List[ErroLinha]):
+    
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f, delimiter=';')
+        escritor.writerow(ErroLinha._fields)
+        escritor.writerows(erros)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Geração de remessa CNAB 444 em pipeline (leitura, formatação e escrita)")
+    parser.add_argument("entrada")
+    parser.add_argument("saida")
+    parser.add_argument("--cod-originador", required=True)
+    parser.add_argument("--razao-social", required=True)
+    parser.add_argument("--numero-banco", required=True)
+    parser.add_argument("--nome-banco", required=True)
+    parser.add_argument("--seq-arquivo", type=int, default=1)
+    parser.add_argument("--coobrigacao", choices=["02", "01"], default="02")
+    parser.add_argument("--tipo-baixa", choices=["TOTAL", "PARCIAL"], default="TOTAL")
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE_PIPELINE)
+    parser.add_argument("--processos", type=int, default=1)
+    parser.add_argument("--janela", type=int, default=JANELA_PIPELINE)
+    parser.add_argument("--sem-manifesto", action="store_true", help="Não grava o manifesto JSON")
+    args = parser.parse_args()
+    
+    manifesto = None if args.sem_manifesto else ManifestoRemessa()
+    
+    resultado = gerar_remessa_pipeline(
+        args.entrada, args.entrada, args.saida,
+        args.cod_originador, args.razao_social, args.numero_banco,
+        args.nome_banco, args.seq_arquivo, args.coobrigacao, args.tipo_baixa,
+        tamanho_lote=args.tamanho_lote, processos=args.processos,
+        janela=args.janela, manifesto=manifesto
+    )
+    
+    if manifesto is not None:
+        manifesto.gravar(caminho_manifesto(args.saida), arquivo=os.path.basename(args.saida))
+    
+    print(f"Registros de detalhe: {resultado.total_detalhes:,}")
+    print(f"Tempo: {resultado.segundos:.2f} s")
+    
+    if resultado.erros:
+        gravar_erros(caminho_erros(args.saida), resultado.erros)
+        print(f"Linhas com erro: {len(resultado.erros):,} (ver {caminho_erros(args.saida)})")
+        sys.exit(2)
@@ -0,0 +1,504 @@
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import BinaryIO, List, NamedTuple, Optional, Sequence, Tuple
+
+from cnab_engine import GeradorCNABCompilado
+from fontes_dados import (
+    combinar_tipos, formato_arquivo, iterar_lotes, leitura_em_lotes, preparar_lote, resumir_tipos
+)
+from layout_cnab import LAYOUT_444, nome_campo
+from manifesto import ManifestoRemessa, SaidaComManifesto, caminho_manifesto
+from metricas import gravar_textfile, medir_etapa, registrar_arquivo, registrar_falha
+
+
+TAMANHO_LINHA_ARQUIVO = 446
+
+FATOR_MEMORIA_ENTRADA = {
+    'csv': 6.0,
+    'parquet': 10.0,
+    'xlsx': 30.0,
+    'xls': 15.0,
+}
+
+FATOR_MEMORIA_SAIDA = 3.0
+MEMORIA_BASE_MB = 150
+MEMORIA_POR_PROCESSO_MB = 120
+LIMIAR_PARALELO_REGISTROS = 1_000_000
+TAMANHO_LOTE_MINIMO = 1_000
+TAMANHO_LOTE_MAXIMO = 100_000
+TAMANHO_BUFFER_ESCRITA = 1024 * 1024
+
+ESTRATEGIA_MEMORIA = 'memoria'
+ESTRATEGIA_STREAMING = 'streaming'
+ESTRATEGIA_PARALELO = 'paralelo'
+ESTRATEGIA_FAIXAS = 'faixas'
+
+CAMPO_SEQUENCIAL = next(
+    campo for campo in LAYOUT_444.registros['detalhe'].campos if nome_campo(campo) == 'SEQUENCIAL'
+)
+
+
+class PlanoExecucao(NamedTuple):
+    estrategia: str
+    registros_estimados: int
+    memoria_estimada_mb: float
+    tamanho_saida_bytes: int
+    tamanho_lote: int
+    processos: int
+
+
+def tamanho_saida(total_detalhes: int) -> int:
+    
+    return (total_detalhes + 2) * TAMANHO_LINHA_ARQUIVO - 2
+
+
+def csv_divisivel_em_faixas(caminho: str) -> bool:
+    
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BUFFER_ESCRITA), b''):
+            if b'"' in bloco:
+                return False
+    return True
+
+
+def _tamanho_arquivo(arquivo) -> int:
+    
+    if isinstance(arquivo, (str, os.PathLike)):
+        return os.path.getsize(arquivo)
+    
+    posicao = arquivo.tell()
+    arquivo.seek(0, os.SEEK_END)
+    tamanho = arquivo.tell()
+    arquivo.seek(posicao)
+    return tamanho
+
+
+def estimar_registros(arquivo, nome_arquivo: str) -> int:
+    
+    formato = formato_arquivo(nome_arquivo)
+    tamanho = _tamanho_arquivo(arquivo)
+    
+    if formato == 'csv':
+        if isinstance(arquivo, (str, os.PathLike)):
+            with open(arquivo, 'rb') as f:
+                amostra = f.read(1024 * 1024)
+        else:
+            posicao = arquivo.tell()
+            amostra = arquivo.read(1024 * 1024)
+            arquivo.seek(posicao)
+        
+        linhas = amostra.count(b"\n")
+        if not linhas:
+            return 0
+        if len(amostra) >= tamanho:
+            return max(linhas - 1 + (not amostra.endswith(b"\n")), 0)
+        return int(tamanho / (len(amostra) / linhas))
+    
+    if formato == 'parquet':
+        try:
+            import pyarrow.parquet as pq
+            return pq.ParquetFile(arquivo).metadata.num_rows
+        except ImportError:
+            pass
+    
+    if formato == 'xlsx':
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(arquivo, read_only=True)
+        try:
+            max_linha = workbook.active.max_row
+        finally:
+            workbook.close()
+        if max_linha:
+            return max(max_linha - 1, 0)
+    
+    return int(tamanho * FATOR_MEMORIA_ENTRADA.get(formato, 10.0) / 400)
+
+
+def planejar_execucao(arquivo, nome_arquivo: str, max_memory_mb: float,
+                      processos_disponiveis: Optional[int] = None,
+                      saida_em_memoria: bool = False) -> PlanoExecucao:
+    
+    formato = formato_arquivo(nome_arquivo)
+    tamanho_entrada = _tamanho_arquivo(arquivo)
+    
+    if isinstance(arquivo, (str, os.PathLike)):
+        registros = estimar_registros(arquivo, nome_arquivo)
+    else:
+        posicao = arquivo.tell()
+        registros = estimar_registros(arquivo, nome_arquivo)
+        arquivo.seek(posicao)
+    saida = tamanho_saida(registros)
+    
+    memoria_entrada_mb = tamanho_entrada * FATOR_MEMORIA_ENTRADA.get(formato, 10.0) / (1024 * 1024)
+    memoria_saida_mb = saida * FATOR_MEMORIA_SAIDA / (1024 * 1024)
+    memoria_total_mb = MEMORIA_BASE_MB + memoria_entrada_mb + memoria_saida_mb
+    
+    if memoria_total_mb <= max_memory_mb or not leitura_em_lotes(formato):
+        return PlanoExecucao(
+            ESTRATEGIA_MEMORIA, registros, memoria_total_mb, saida, max(registros, 1), 1
+        )
+    
+    memoria_download_mb = saida / (1024 * 1024) if saida_em_memoria else 0
+    memoria_por_registro = (memoria_entrada_mb + memoria_saida_mb) / max(registros, 1)
+    memoria_livre_mb = max(max_memory_mb - MEMORIA_BASE_MB - memoria_download_mb, 0)
+    
+    processos = 1
+    if registros >= LIMIAR_PARALELO_REGISTROS:
+        processos_disponiveis = processos_disponiveis or os.cpu_count() or 1
+        processos = min(processos_disponiveis, int(memoria_livre_mb // (MEMORIA_POR_PROCESSO_MB * 2)))
+    
+    if processos >= 2:
+        lotes_em_memoria = processos * 2
+        memoria_lotes_mb = memoria_livre_mb - processos * MEMORIA_POR_PROCESSO_MB
+        if formato == 'csv' and isinstance(arquivo, (str, os.PathLike)) and csv_divisivel_em_faixas(arquivo):
+            estrategia = ESTRATEGIA_FAIXAS
+        else:
+            estrategia = ESTRATEGIA_PARALELO
+    else:
+        processos = 1
+        lotes_em_memoria = 1
+        memoria_lotes_mb = memoria_livre_mb
+        estrategia = ESTRATEGIA_STREAMING
+    
+    tamanho_lote = int(memoria_lotes_mb / lotes_em_memoria / memoria_por_registro) if memoria_por_registro else 0
+    tamanho_lote = min(max(tamanho_lote, TAMANHO_LOTE_MINIMO), TAMANHO_LOTE_MAXIMO)
+    
+    memoria_estimada = (
+        MEMORIA_BASE_MB
+        + memoria_download_mb
+        + (processos * MEMORIA_POR_PROCESSO_MB if processos > 1 else 0)
+        + tamanho_lote * lotes_em_memoria * memoria_por_registro
+    )
+    
+    return PlanoExecucao(estrategia, registros, memoria_estimada, saida, tamanho_lote, processos)
+
+
+def _escrever_detalhes(gerador, lote, sequencial_inicial: int, coobrigacao: str,
+                       tipo_baixa: str, destino: BinaryIO,
+                       manifesto: Optional[ManifestoRemessa] = None) -> int:
+    
+    detalhes = gerador.gerar_lote(lote, sequencial_inicial, coobrigacao, tipo_baixa)
+    if manifesto is not None:
+        manifesto.registrar_detalhes(detalhes)
+    if detalhes:
+        destino.write(("\r\n" + "\r\n".join(detalhes)).encode('latin-1'))
+    return len(detalhes)
+
+
+def _gravar_parte(lote, sequencial_inicial: int, coobrigacao: str, tipo_baixa: str,
+                  caminho_parte: str, com_manifesto: bool = False) -> Optional[ManifestoRemessa]:
+    
+    manifesto = ManifestoRemessa() if com_manifesto else None
+    with open(caminho_parte, 'wb') as parte:
+        _escrever_detalhes(
+            GeradorCNABCompilado(), lote, sequencial_inicial, coobrigacao, tipo_baixa, parte, manifesto
+        )
+    return manifesto
+
+
+def _gerar_sequencial(arquivo, nome_arquivo: str, plano: PlanoExecucao, gerador,
+                      coobrigacao: str, tipo_baixa: str, destino: BinaryIO,
+                      manifesto: Optional[ManifestoRemessa] = None) -> int:
+    
+    total_detalhes = 0
+    for lote in iterar_lotes(arquivo, nome_arquivo, plano.tamanho_lote):
+        total_detalhes += _escrever_detalhes(
+            gerador, lote, total_detalhes + 2, coobrigacao, tipo_baixa, destino, manifesto
+        )
+    return total_detalhes
+
+
+def _gerar_paralelo(arquivo, nome_arquivo: str, plano: PlanoExecucao, coobrigacao: str,
+                    tipo_baixa: str, destino: BinaryIO, diretorio_temporario: str,
+                    manifesto: Optional[ManifestoRemessa] = None) -> int:
+    
+    total_detalhes = 0
+    pendentes = deque()
+    contexto = multiprocessing.get_context('spawn')
+    
+    def copiar_parte():
+        caminho_parte, futuro = pendentes.popleft()
+        parcial = futuro.result()
+        if manifesto is not None:
+            manifesto.incorporar(parcial)
+        with open(caminho_parte, 'rb') as parte:
+            shutil.copyfileobj(parte, destino, TAMANHO_BUFFER_ESCRITA)
+        os.remove(caminho_parte)
+    
+    with ProcessPoolExecutor(max_workers=plano.processos, mp_context=contexto) as executor:
+        try:
+            for indice, lote in enumerate(iterar_lotes(arquivo, nome_arquivo, plano.tamanho_lote)):
+                caminho_parte = os.path.join(diretorio_temporario, f"parte_{indice:06d}.rem")
+                pendentes.append((caminho_parte, executor.submit(
+                    _gravar_parte, lote, total_detalhes + 2, coobrigacao, tipo_baixa,
+                    caminho_parte, manifesto is not None
+                )))
+                total_detalhes += len(lote)
+                
+                if len(pendentes) >= plano.processos * 2:
+                    copiar_parte()
+            
+            while pendentes:
+                copiar_parte()
+        
+        finally:
+            for _, futuro in pendentes:
+                futuro.cancel()
+    
+    return total_detalhes
+
+
+def dividir_faixas_csv(caminho: str, quantidade: int) -> List[Tuple[int, int]]:
+    
+    tamanho = os.path.getsize(caminho)
+    
+    with open(caminho, 'rb') as f:
+        f.readline()
+        limites = [f.tell()]
+        passo = max((tamanho - limites[0]) // max(quantidade, 1), 1)
+        
+        for indice in range(1, quantidade):
+            posicao = max(limites[0] + indice * passo, limites[-1])
+            if posicao >= tamanho:
+                break
+            
+            f.seek(posicao - 1)
+            f.readline()
+            posicao = f.tell()
+            if posicao >= tamanho:
+                break
+            if posicao > limites[-1]:
+                limites.append(posicao)
+    
+    limites.append(tamanho)
+    return [(inicio, fim) for inicio, fim in zip(limites[:-1], limites[1:]) if fim > inicio]
+
+
+def _ler_faixa(caminho: str, inicio: int, fim: int, colunas: Sequence[str], tipos=None):
+    
+    import pandas as pd
+    
+    with open(caminho, 'rb') as f:
+        f.seek(inicio)
+        conteudo = f.read(fim - inicio)
+    
+    if not conteudo.strip():
+        return None
+    
+    return pd.read_csv(BytesIO(conteudo), header=None, names=list(colunas), dtype=tipos or None)
+
+
+def _tipos_faixa(caminho: str, inicio: int, fim: int, colunas: Sequence[str]):
+    
+    df = _ler_faixa(caminho, inicio, fim, colunas)
+    return {} if df is None else resumir_tipos(df)
+
+
+def _gravar_faixa(caminho: str, inicio: int, fim: int, colunas: Sequence[str], tipos, coobrigacao: str,
+                  tipo_baixa: str, caminho_parte: str,
+                  com_manifesto: bool = False) -> Tuple[int, Optional[ManifestoRemessa]]:
+    
+    df = _ler_faixa(caminho, inicio, fim, colunas, tipos)
+    
+    manifesto = ManifestoRemessa() if com_manifesto else None
+    with open(caminho_parte, 'wb') as parte:
+        if df is None:
+            return 0, manifesto
+        
+        total = _escrever_detalhes(
+            GeradorCNABCompilado(), preparar_lote(df), 2, coobrigacao, tipo_baixa, parte, manifesto
+        )
+    
+    return total, manifesto
+
+
+def _renumerar_parte(caminho_parte: str, deslocamento: int) -> bytes:
+    
+    import numpy as np
+    
+    with open(caminho_parte, 'rb') as parte:
+        conteudo = parte.read()
+    
+    if not deslocamento or not conteudo:
+        return conteudo
+    
+    matriz = np.frombuffer(conteudo, dtype=np.uint8).reshape(-1, TAMANHO_LINHA_ARQUIVO).copy()
+    inicio = 2 + CAMPO_SEQUENCIAL.inicio
+    colunas = slice(inicio, inicio + CAMPO_SEQUENCIAL.tamanho)
+    potencias = 10 ** np.arange(CAMPO_SEQUENCIAL.tamanho - 1, -1, -1, dtype=np.int64)
+    
+    sequenciais = (matriz[:, colunas].astype(np.int64) - ord("0")) @ potencias + deslocamento
+    if sequenciais[-1] >= 10 ** CAMPO_SEQUENCIAL.tamanho:
+        raise ValueError(
+            f"Sequencial {int(sequenciais[-1])} excede {CAMPO_SEQUENCIAL.tamanho} dígitos"
+        )
+    
+    matriz[:, colunas] = (sequenciais[:, None] // potencias % 10 + ord("0")).astype(np.uint8)
+    return matriz.tobytes()
+
+
+def _gerar_faixas_csv(caminho: str, plano: PlanoExecucao, coobrigacao: str, tipo_baixa: str,
+                      destino: BinaryIO, diretorio_temporario: str,
+                      manifesto: Optional[ManifestoRemessa] = None) -> int:
+    
+    import pandas as pd
+    
+    colunas = pd.read_csv(caminho, nrows=0).columns.tolist()
+    
+    tamanho = os.path.getsize(caminho)
+    bytes_por_registro = tamanho / max(plano.registros_estimados, 1)
+    quantidade = max(plano.processos, -(-tamanho // max(int(plano.tamanho_lote * bytes_por_registro), 1)))
+    
+    total_detalhes = 0
+    pendentes = deque()
+    contexto = multiprocessing.get_context('spawn')
+    
+    def copiar_parte():
+        nonlocal total_detalhes
+        caminho_parte, futuro = pendentes.popleft()
+        quantidade_parte, parcial = futuro.result()
+        destino.write(_renumerar_parte(caminho_parte, total_detalhes))
+        os.remove(caminho_parte)
+        if manifesto is not None:
+            manifesto.incorporar(parcial)
+        total_detalhes += quantidade_parte
+    
+    faixas = dividir_faixas_csv(caminho, quantidade)
+    
+    with ProcessPoolExecutor(max_workers=plano.processos, mp_context=contexto) as executor:
+        resumos = [executor.submit(_tipos_faixa, caminho, inicio, fim, colunas) for inicio, fim in faixas]
+        tipos = combinar_tipos(resumo.result() for resumo in resumos)
+        
+        try:
+            for indice, (inicio, fim) in enumerate(faixas):
+                caminho_parte = os.path.join(diretorio_temporario, f"faixa_{indice:06d}.rem")
+                pendentes.append((caminho_parte, executor.submit(
+                    _gravar_faixa, caminho, inicio, fim, colunas, tipos, coobrigacao, tipo_baixa,
+                    caminho_parte, manifesto is not None
+                )))
+                
+                if len(pendentes) >= plano.processos * 2:
+                    copiar_parte()
+            
+            while pendentes:
+                copiar_parte()
+        
+        finally:
+            for _, futuro in pendentes:
+                futuro.cancel()
+    
+    return total_detalhes
+
+
+def gerar_remessa(arquivo, nome_arquivo: str, caminho_saida: str,
+                  cod_originador: str, razao_social: str, numero_banco: str,
+                  nome_banco: str, seq_arquivo: int,
+                  coobrigacao: str = "02", tipo_baixa: str = "TOTAL",
+                  max_memory_mb: float = 1024,
+                  plano: Optional[PlanoExecucao] = None,
+                  manifesto: Optional[ManifestoRemessa] = None) -> PlanoExecucao:
+    
+    plano = plano or planejar_execucao(arquivo, nome_arquivo, max_memory_mb)
+    if plano.estrategia == ESTRATEGIA_FAIXAS and not csv_divisivel_em_faixas(arquivo):
+        plano = plano._replace(estrategia=ESTRATEGIA_STREAMING, processos=1)
+    gerador = GeradorCNABCompilado()
+    inicio = time.perf_counter()
+    
+    try:
+        with medir_etapa(f"geracao_{plano.estrategia}"):
+            total_detalhes = _gravar_remessa(
+                arquivo, nome_arquivo, caminho_saida, gerador, plano,
+                cod_originador, razao_social, numero_banco, nome_banco, seq_arquivo,
+                coobrigacao, tipo_baixa, manifesto
+            )
+    except Exception as e:
+        registrar_falha('planejador', e)
+        raise
+    
+    registrar_arquivo('planejador', total_detalhes, time.perf_counter() - inicio)
+    
+    return plano
+
+
+def _gravar_remessa(arquivo, nome_arquivo: str, caminho_saida: str, gerador, plano: PlanoExecucao,
+                    cod_originador: str, razao_social: str, numero_banco: str,
+                    nome_banco: str, seq_arquivo: int, coobrigacao: str, tipo_baixa: str,
+                    manifesto: Optional[ManifestoRemessa]) -> int:
+    
+    with open(caminho_saida, 'wb', buffering=TAMANHO_BUFFER_ESCRITA) as arquivo_saida:
+        destino = SaidaComManifesto(arquivo_saida, manifesto) if manifesto is not None else arquivo_saida
+        
+        header = gerador.gerar_header(cod_originador, razao_social, numero_banco,
+                                      nome_banco, seq_arquivo)
+        destino.write(header.encode('latin-1'))
+        
+        if plano.estrategia in (ESTRATEGIA_PARALELO, ESTRATEGIA_FAIXAS):
+            diretorio_saida = os.path.dirname(os.path.abspath(caminho_saida))
+            with tempfile.TemporaryDirectory(dir=diretorio_saida) as diretorio_temporario:
+                if plano.estrategia == ESTRATEGIA_FAIXAS:
+                    total_detalhes = _gerar_faixas_csv(
+                        arquivo, plano, coobrigacao, tipo_baixa,
+                        destino, diretorio_temporario, manifesto
+                    )
+                else:
+                    total_detalhes = _gerar_paralelo(
+                        arquivo, nome_arquivo, plano, coobrigacao, tipo_baixa,
+                        destino, diretorio_temporario, manifesto
+                    )
+        else:
+            total_detalhes = _gerar_sequencial(
+                arquivo, nome_arquivo, plano, gerador, coobrigacao, tipo_baixa, destino, manifesto
+            )
+        
+        trailer = gerador.gerar_trailer(total_detalhes + 2)
+        destino.write(("\r\n" + trailer).encode('latin-1'))
+    
+    return total_detalhes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Geração de remessa CNAB 444 com orçamento de memória")
+    parser.add_argument("entrada")
+    parser.add_argument("saida")
+    parser.add_argument("--max-memory-mb", type=float, default=1024)
+    parser.add_argument("--cod-originador", required=True)
+    parser.add_argument("--razao-social", required=True)
+    parser.add_argument("--numero-banco", required=True)
+    parser.add_argument("--nome-banco", required=True)
+    parser.add_argument("--seq-arquivo", type=int, default=1)
+    parser.add_argument("--coobrigacao", choices=["02", "01"], default="02")
+    parser.add_argument("--tipo-baixa", choices=["TOTAL", "PARCIAL"], default="TOTAL")
+    parser.add_argument("--sem-manifesto", action="store_true", help="Não grava o manifesto JSON")
+    parser.add_argument("--metricas-arquivo", help="Grava as métricas OpenMetrics neste arquivo (textfile collector)")
+    args = parser.parse_args()
+    
+    manifesto = None if args.sem_manifesto else ManifestoRemessa()
+    
+    plano = gerar_remessa(
+        args.entrada, args.entrada, args.saida,
+        args.cod_originador, args.razao_social, args.numero_banco,
+        args.nome_banco, args.seq_arquivo, args.coobrigacao, args.tipo_baixa,
+        max_memory_mb=args.max_memory_mb, manifesto=manifesto
+    )
+    
+    if manifesto is not None:
+        manifesto.gravar(caminho_manifesto(args.saida), arquivo=os.path.basename(args.saida))
+        print(f"Manifesto: {caminho_manifesto(args.saida)} (SHA-256 {manifesto.sha256})")
+    
+    if args.metricas_arquivo:
+        gravar_textfile(args.metricas_arquivo)
+    
+    print(f"Estratégia: {plano.estrategia}")
+    print(f"Registros estimados: {plano.registros_estimados:,}")
+    print(f"Memória estimada: {plano.memoria_estimada_mb:,.0f} MB")
+    if plano.memoria_estimada_mb > args.max_memory_mb:
+        print(f"Aviso: {args.entrada} é lido inteiro em memória e excedeu o limite de {args.max_memory_mb:,.0f} MB")
+    print(f"Lote: {plano.tamanho_lote:,} registros | Processos: {plano.processos}")
@@ -0,0 +1,238 @@
+import json
+import time
+import argparse
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+from cnab_engine import GeradorCNABCompilado
+from fontes_dados import ler_dataframe, preparar_lote
+from metricas import TIPO_CONTEUDO, exportar, medir_etapa, registrar_arquivo, registrar_falha
+
+
+TAMANHO_LOTE = 5000
+TAMANHO_MAXIMO_UPLOAD = 512 * 1024 * 1024
+
+PARAMETROS_OBRIGATORIOS = ('cod_originador', 'razao_social', 'numero_banco', 'nome_banco')
+
+_gerador_processo: Optional[GeradorCNABCompilado] = None
+
+
+def _formatar_lote(lote: pd.DataFrame, sequencial_inicial: int,
+                   coobrigacao: str, tipo_baixa: str) -> bytes:
+    
+    global _gerador_processo
+    if _gerador_processo is None:
+        _gerador_processo = GeradorCNABCompilado()
+    
+    detalhes = _gerador_processo.gerar_lote(lote, sequencial_inicial, coobrigacao, tipo_baixa)
+    return ("\r\n" + "\r\n".join(detalhes)).encode('latin-1') if detalhes else b""
+
+
+def ler_parametros(query: str) -> Dict[str, str]:
+    
+    valores = {chave: itens[-1] for chave, itens in parse_qs(query).items()}
+    
+    faltantes = [nome for nome in PARAMETROS_OBRIGATORIOS if not valores.get(nome, "").strip()]
+    if faltantes:
+        raise ValueError(f"Parâmetros obrigatórios ausentes: {', '.join(faltantes)}")
+    
+    if 'formato' not in valores and 'nome_arquivo' not in valores:
+        raise ValueError("Informe 'formato' (csv, xlsx, xls, parquet) ou 'nome_arquivo'")
+    
+    valores.setdefault('seq_arquivo', "1")
+    valores.setdefault('coobrigacao', "02")
+    valores.setdefault('tipo_baixa', "TOTAL")
+    
+    if valores['coobrigacao'] not in ("01", "02"):
+        raise ValueError("coobrigacao deve ser 01 ou 02")
+    
+    if valores['tipo_baixa'] not in ("TOTAL", "PARCIAL"):
+        raise ValueError("tipo_baixa deve ser TOTAL ou PARCIAL")
+    
+    return valores
+
+
+class ManipuladorRemessa(BaseHTTPRequestHandler):
+    
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        
+        rota = urlparse(self.path).path
+        if rota == "/saude":
+            corpo, tipo = b"ok", "text/plain"
+        elif rota == "/metrics":
+            corpo, tipo = exportar().encode('utf-8'), TIPO_CONTEUDO
+        else:
+            self._responder_erro(404, "Rota não encontrada")
+            return
+        
+        self.send_response(200)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+    
+    def do_POST(self):
+        
+        url = urlparse(self.path)
+        if url.path != "/remessa":
+            self._responder_erro(404, "Rota não encontrada")
+            return
+        
+        inicio = time.perf_counter()
+        
+        try:
+            parametros = ler_parametros(url.query)
+            
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            if tamanho <= 0:
+                raise ValueError("Corpo da requisição vazio")
+            
+            if tamanho > self.server.tamanho_maximo_upload:
+                self._responder_erro(413, "Arquivo excede o tamanho máximo permitido")
+                return
+            
+            conteudo = self.rfile.read(tamanho)
+            nome_arquivo = parametros.get('nome_arquivo') or f"entrada.{parametros['formato']}"
+            with medir_etapa('leitura'):
+                df = preparar_lote(ler_dataframe(BytesIO(conteudo), nome_arquivo))
+            
+            gerador = GeradorCNABCompilado()
+            header = gerador.gerar_header(
+                parametros['cod_originador'], parametros['razao_social'],
+                parametros['numero_banco'], parametros['nome_banco'],
+                int(parametros['seq_arquivo'])
+            )
+        
+        except Exception as e:
+            registrar_falha('servidor', e)
+            self._responder_erro(400, str(e))
+            return
+        
+        nome_saida = f"REMESSA_{datetime.now().strftime('%Y%m%d_%H%M%S')}.REM"
+        
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=latin-1")
+        self.send_header("Content-Disposition", f'attachment; filename="{nome_saida}"')
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        
+        try:
+            self._enviar_bloco(header.encode('latin-1'))
+            
+            with medir_etapa('formatacao'):
+                total_detalhes = self._enviar_detalhes(
+                    df, parametros['coobrigacao'], parametros['tipo_baixa']
+                )
+            
+            trailer = gerador.gerar_trailer(total_detalhes + 2)
+            self._enviar_bloco(("\r\n" + trailer).encode('latin-1'))
+            self.wfile.write(b"0\r\n\r\n")
+        
+        except Exception as e:
+            registrar_falha('servidor', e)
+            self.log_error("Geração interrompida: %s", e)
+            self.close_connection = True
+            return
+        
+        registrar_arquivo('servidor', total_detalhes, time.perf_counter() - inicio)
+    
+    def _enviar_detalhes(self, df: pd.DataFrame, coobrigacao: str, tipo_baixa: str) -> int:
+        
+        executor = self.server.executor
+        tamanho_lote = self.server.tamanho_lote
+        pendentes = deque()
+        
+        try:
+            for inicio in range(0, len(df), tamanho_lote):
+                lote = df.iloc[inicio:inicio + tamanho_lote]
+                pendentes.append(
+                    executor.submit(_formatar_lote, lote, inicio + 2, coobrigacao, tipo_baixa)
+                )
+                
+                if len(pendentes) >= self.server.janela_por_requisicao:
+                    self._enviar_bloco(pendentes.popleft().result())
+            
+            while pendentes:
+                self._enviar_bloco(pendentes.popleft().result())
+        
+        finally:
+            for futuro in pendentes:
+                futuro.cancel()
+        
+        return len(df)
+    
+    def _enviar_bloco(self, bloco: bytes):
+        
+        if not bloco:
+            return
+        
+        self.wfile.write(f"{len(bloco):X}\r\n".encode('ascii'))
+        self.wfile.write(bloco)
+        self.wfile.write(b"\r\n")
+    
+    def _responder_erro(self, status: int, mensagem: str):
+        
+        corpo = json.dumps({"erro": mensagem}, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(corpo)
+        self.close_connection = True
+
+
+class ServidorRemessa(ThreadingHTTPServer):
+    
+    daemon_threads = True
+    
+    def __init__(self, endereco, processos: int = 2, tamanho_lote: int = TAMANHO_LOTE,
+                 janela_por_requisicao: Optional[int] = None,
+                 tamanho_maximo_upload: int = TAMANHO_MAXIMO_UPLOAD):
+        super().__init__(endereco, ManipuladorRemessa)
+        self.executor = ProcessPoolExecutor(
+            max_workers=processos,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        self.tamanho_lote = tamanho_lote
+        self.janela_por_requisicao = janela_por_requisicao or processos
+        self.tamanho_maximo_upload = tamanho_maximo_upload
+    
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def criar_servidor(host: str = "127.0.0.1", porta: int = 8502, processos: int = 2,
+                   **opcoes) -> ServidorRemessa:
+    
+    return ServidorRemessa((host, porta), processos=processos, **opcoes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serviço HTTP de geração de remessas CNAB 444")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8502)
+    parser.add_argument("--processos", type=int, default=2)
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE)
+    args = parser.parse_args()
+    
+    servidor = criar_servidor(args.host, args.porta, args.processos, tamanho_lote=args.tamanho_lote)
+    print(f"Servidor CNAB em http://{args.host}:{servidor.server_address[1]} "
+          f"({args.processos} processos)")
+    
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
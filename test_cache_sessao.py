@@ -0,0 +1,68 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from cache_sessao import CacheSessao
+
+
+def _carteira(quantidade):
+    return pd.DataFrame({
+        'SEU_NUMERO': range(quantidade),
+        'VALOR_NOMINAL': [10.5 + i for i in range(quantidade)],
+        'NOME_SACADO': ["Maria Conceição"] * quantidade,
+    })
+
+
+def test_derrama_em_disco_e_recarrega(tmp_path):
+    cache = CacheSessao(str(tmp_path), limite_memoria_mb=0.1, limite_disco_mb=10)
+    primeira, segunda = _carteira(2000), _carteira(3000)
+    
+    cache.guardar("a:dados", primeira)
+    cache.guardar("b:dados", segunda)
+    cache.guardar("b:remessa", b"1" * 444 * 100)
+    
+    assert cache.estatisticas()['bytes_memoria'] <= cache.limite_memoria
+    assert list(tmp_path.glob("*.arrow"))
+    
+    pd.testing.assert_frame_equal(cache.obter("a:dados"), primeira)
+    assert bytes(cache.obter("b:remessa")) == b"1" * 444 * 100
+    assert cache.obter("c:dados") is None
+    assert cache.acertos_disco == 2 and cache.faltas == 1
+    
+    cache.remover_prefixo("b:")
+    assert "b:dados" not in cache and "a:dados" in cache
+
+
+def test_limite_de_disco_descarta_os_mais_antigos(tmp_path):
+    cache = CacheSessao(str(tmp_path), limite_memoria_mb=0, limite_disco_mb=0.05)
+    
+    for indice in range(5):
+        cache.guardar(f"s:{indice}", bytes([65 + indice]) * 20_000)
+    
+    assert cache.estatisticas()['bytes_disco'] <= cache.limite_disco
+    assert cache.obter("s:0") is None
+    assert bytes(cache.obter("s:4")) == b"E" * 20_000
+
+
+def test_colunas_objeto_e_datas_voltam_com_os_mesmos_tipos(tmp_path):
+    cache = CacheSessao(str(tmp_path), limite_memoria_mb=0, limite_disco_mb=10)
+    textos = pd.DataFrame({
+        'NOME_SACADO': ["Maria", "José"],
+        'DATA_VENCIMENTO': [date(2025, 1, 31), date(2025, 2, 28)],
+        'DATA_EMISSAO': pd.to_datetime(["2025-01-01", "2025-01-02"]),
+    })
+    mistos = pd.DataFrame({
+        'NOME_SACADO': ["Maria", np.nan],
+        'DOC_SACADO': pd.Series([12345678901, 98765432100], dtype=object),
+        'DATA_VENCIMENTO': [date(2025, 1, 31), np.nan],
+    })
+    
+    cache.guardar("s:textos", textos)
+    cache.guardar("s:mistos", mistos)
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == [".arrow", ".pkl"]
+    
+    for chave, original in (("s:textos", textos), ("s:mistos", mistos)):
+        recarregado = cache.obter(chave)
+        pd.testing.assert_frame_equal(recarregado, original)
+        for coluna in original:
+            assert list(map(type, recarregado[coluna])) == list(map(type, original[coluna]))
@@ -0,0 +1,65 @@
+import pandas as pd
+from cnab_engine import GeradorCNAB
+from conciliacao_retorno import carregar_remessas, carregar_retorno, conciliar, resumir_conciliacao
+
+
+def _remessa(seus_numeros, valores):
+    df = pd.DataFrame({'SEU_NUMERO': seus_numeros, 'VALOR_NOMINAL': valores})
+    return GeradorCNAB().gerar_arquivo_completo(
+        df, "202501", "BANCO", "611", "PAULISTA", 1
+    ).encode('latin-1')
+
+
+def _retorno(ocorrencias):
+    linhas = ["0" + " " * 443]
+    for sequencial, (seu_numero, codigo, valor_centavos) in enumerate(ocorrencias, 2):
+        registro = [" "] * 444
+        registro[0] = "1"
+        registro[37:62] = str(seu_numero).zfill(25)
+        registro[108:110] = codigo
+        registro[152:165] = str(valor_centavos).zfill(13)
+        registro[438:444] = str(sequencial).zfill(6)
+        linhas.append("".join(registro))
+    linhas.append("9" + " " * 437 + str(len(linhas) + 1).zfill(6))
+    return "\r\n".join(linhas).encode('latin-1')
+
+
+def test_conciliacao_classifica_e_compara_valores():
+    remessas = carregar_remessas([_remessa([1, 2, 3], [10.0, 20.0, 30.0]), _remessa([4], [40.0])])
+    retorno = carregar_retorno(_retorno([(1, "02", 1000), (2, "03", 2000), (4, "02", 4500), (9, "02", 100)]))
+    
+    resultado = conciliar(remessas, retorno)
+    
+    assert resultado.aceitos['SEU_NUMERO'].str.lstrip("0").tolist() == ["1", "4"]
+    assert resultado.aceitos['DIFERENCA_VALOR'].tolist() == [0, 500]
+    assert resultado.rejeitados['SEU_NUMERO'].str.lstrip("0").tolist() == ["2"]
+    assert resultado.ausentes['SEU_NUMERO'].str.lstrip("0").tolist() == ["3"]
+    assert resultado.desconhecidos['SEU_NUMERO'].str.lstrip("0").tolist() == ["9"]
+    
+    resumo = resumir_conciliacao(resultado).set_index('SITUACAO')
+    assert resumo.loc['aceitos', 'VALORES_DIVERGENTES'] == 1
+    assert resumo.loc['ausentes', 'VALOR_REMESSA_CENTAVOS'] == 3000
+
+
+def test_conciliacao_relata_chaves_duplicadas_e_vazias():
+    remessas = carregar_remessas([
+        _remessa([1, 2, None], [10.0, 20.0, 30.0]),
+        _remessa([2, 3, None], [21.0, 30.0, 31.0]),
+    ])
+    retorno = carregar_retorno(_retorno([(1, "02", 1000), (2, "02", 2000), (0, "02", 3000), (3, "03", 3000)]))
+    
+    resultado = conciliar(remessas, retorno)
+    
+    assert resultado.aceitos['SEU_NUMERO'].str.lstrip("0").tolist() == ["1"]
+    assert resultado.rejeitados['SEU_NUMERO'].str.lstrip("0").tolist() == ["3"]
+    assert resultado.duplicados['SEU_NUMERO'].str.lstrip("0").tolist() == ["2", "2"]
+    assert resultado.duplicados['VALOR_NOMINAL'].tolist() == [2000, 2100]
+    assert resultado.sem_chave['VALOR_NOMINAL'].tolist() == [3000, 3100]
+    assert resultado.ambiguos['SEU_NUMERO'].str.lstrip("0").tolist() == ["2"]
+    assert resultado.desconhecidos['VALOR_NOMINAL'].tolist() == [3000]
+    assert resultado.ausentes.empty
+    
+    resumo = resumir_conciliacao(resultado).set_index('SITUACAO')
+    assert resumo['REGISTROS'].sum() == len(remessas) + len(retorno) - 2
+    assert resumo.loc['sem_chave', 'VALOR_REMESSA_CENTAVOS'] == 6100
+    assert resumo.loc['ambiguos', 'VALOR_RETORNO_CENTAVOS'] == 2000
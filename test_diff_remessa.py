@@ -0,0 +1,48 @@
+import pandas as pd
+from cnab_engine import GeradorCNAB
+from diff_remessa import carregar_matriz, comparar_remessas, formatar_resumo
+
+
+def _remessa(valores, seus_numeros):
+    df = pd.DataFrame({'SEU_NUMERO': seus_numeros, 'VALOR_NOMINAL': valores})
+    return GeradorCNAB().gerar_arquivo_completo(
+        df, "202501", "BANCO", "611", "PAULISTA", 1
+    ).encode('latin-1')
+
+
+def test_carregar_matriz_com_e_sem_quebra_final():
+    conteudo = _remessa([1.0, 2.0], [1, 2])
+    
+    assert carregar_matriz(conteudo).shape == (4, 444)
+    assert carregar_matriz(conteudo + b"\r\n").shape == (4, 444)
+
+
+def test_diferencas_por_posicao():
+    resultado = comparar_remessas(_remessa([1.0, 2.0, 3.0], [1, 2, 3]), _remessa([1.0, 9.0, 8.0], [1, 2, 3]))
+    
+    assert resultado.resumo[['CAMPO', 'REGISTROS_DIFERENTES']].values.tolist() == [['VALOR_NOMINAL', 2]]
+    assert resultado.exemplos['LINHA_A'].tolist() == [3, 4]
+    assert "VALOR_NOMINAL (detalhe, 127-139) difere em 2 registros" in formatar_resumo(resultado)
+
+
+def test_alinhamento_por_seu_numero():
+    resultado = comparar_remessas(
+        _remessa([1.0, 2.0, 3.0], [1, 2, 3]), _remessa([3.0, 1.0, 5.0], [3, 1, 4]),
+        chave='SEU_NUMERO', ignorar=['SEQUENCIAL']
+    )
+    
+    assert resultado.resumo.empty
+    assert resultado.somente_a.tolist() == [3]
+    assert resultado.somente_b.tolist() == [4]
+
+
+def test_chaves_duplicadas_sobram_nos_dois_arquivos():
+    resultado = comparar_remessas(
+        _remessa([1.0, 5.0, 2.0], [1, 1, 2]), _remessa([2.0, 1.0, 7.0], [2, 1, 1]),
+        chave='SEU_NUMERO', ignorar=['SEQUENCIAL']
+    )
+    
+    assert resultado.resumo.empty
+    assert resultado.registros_comparados == 4
+    assert resultado.somente_a.tolist() == [3]
+    assert resultado.somente_b.tolist() == [4]
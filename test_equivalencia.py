@@ -0,0 +1,30 @@
+from equivalencia import MOTORES, MOTORES_ARQUIVO, comparar_motores, executar_rodadas, gerar_carteira, primeira_diferenca
+
+
+def test_motores_equivalentes_ao_legado():
+    resultados = executar_rodadas(300, 2, semente=11, motores_arquivo={})
+    
+    assert set(resultados['MOTOR']) == set(MOTORES)
+    assert resultados['IDENTICO'].all(), resultados[~resultados['IDENTICO']].to_string()
+
+
+def test_motores_de_arquivo_equivalentes_ao_legado():
+    resultados = executar_rodadas(200, 1, semente=11, motores={})
+    
+    assert set(resultados['MOTOR']) == set(MOTORES_ARQUIVO)
+    assert resultados['IDENTICO'].all(), resultados[~resultados['IDENTICO']].to_string()
+
+
+def test_diferenca_localizada():
+    assert primeira_diferenca(b"abcdef", b"abcdef") is None
+    assert primeira_diferenca(b"abcdef", b"abXdef") == 2
+    assert primeira_diferenca(b"abc", b"abcd") == 3
+    
+    def motor_quebrado(df, parametros):
+        conteudo = MOTORES['compilado'](df, parametros)
+        return conteudo[:446 + 37] + "X" + conteudo[446 + 38:]
+    
+    resultado = comparar_motores(gerar_carteira(5), {'quebrado': motor_quebrado}).iloc[0]
+    
+    assert not resultado['IDENTICO']
+    assert (resultado['LINHA'], resultado['COLUNA']) == (2, 38)
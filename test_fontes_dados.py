@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+from cnab_engine import GeradorCNAB
+from fontes_dados import ler_dataframes
+
+
+PARAMETROS = ("202501", "58479927000136BANCO PAULISTA", "611", "PAULISTA S.A.", 1)
+
+
+def _carteira(inicio, quantidade):
+    return pd.DataFrame({
+        'SEU_NUMERO': range(inicio, inicio + quantidade),
+        'VALOR_NOMINAL': [10.5 + i for i in range(quantidade)],
+        'DATA_VENCIMENTO': ["15/01/2026"] * quantidade,
+        'NOME_SACADO': ["Maria Conceição"] * quantidade,
+    })
+
+
+def test_arquivos_unidos_em_uma_remessa(tmp_path):
+    partes = [_carteira(1, 30), _carteira(31, 20), _carteira(51, 15)]
+    arquivos = []
+    for indice, parte in enumerate(partes):
+        caminho = tmp_path / f"parte_{indice}.csv"
+        parte[list(reversed(parte.columns))].to_csv(caminho, index=False)
+        arquivos.append((str(caminho), caminho.name))
+    
+    df = ler_dataframes(arquivos)
+    
+    esperado = GeradorCNAB().gerar_arquivo_completo(pd.concat(partes, ignore_index=True), *PARAMETROS)
+    assert GeradorCNAB().gerar_arquivo_completo(df, *PARAMETROS) == esperado
+    assert esperado.split("\r\n")[-2][438:444] == "000066"
+
+
+def test_colunas_divergentes_sao_rejeitadas(tmp_path):
+    primeiro = tmp_path / "a.csv"
+    segundo = tmp_path / "b.csv"
+    _carteira(1, 5).to_csv(primeiro, index=False)
+    _carteira(6, 5).drop(columns=['VALOR_NOMINAL']).to_csv(segundo, index=False)
+    
+    with pytest.raises(ValueError, match="VALOR_NOMINAL"):
+        ler_dataframes([(str(primeiro), "a.csv"), (str(segundo), "b.csv")])
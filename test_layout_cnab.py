@@ -0,0 +1,141 @@
+import os
+import sys
+import subprocess
+import pandas as pd
+import pytest
+from cnab_engine import GeradorCNAB, GeradorCNABCompilado
+from layout_cnab import Campo, LAYOUT_444, compilar_registro, derivar_layout, grupos_fatorados, nome_campo
+
+
+def _carteira():
+    return pd.DataFrame([
+        {
+            'SEU_NUMERO': 123456.0, 'ID_RECEBIVEL': 987, 'VALOR_PRESENTE': 1500.5,
+            'DATA_REFERENCIA': pd.Timestamp('2025-11-27'), 'NU_DOCUMENTO': 'NF-123',
+            'DATA_VENCIMENTO_AJUSTADA': pd.NaT, 'DATA_VENCIMENTO': '15/01/2026',
+            'VALOR_NOMINAL': 2000, 'DATA_EMISSAO': '2025-10-01',
+            'DOC_CEDENTE': '12.345.678/0001-95', 'VALOR_AQUISICAO': 1400.99,
+            'DOC_SACADO': '123.456.789-09', 'NOME_SACADO': 'José da Silva',
+            'CHAVE_NFE': None, 'NOME_CEDENTE': 'Cedente Ção Ltda',
+        },
+        {
+            'SEU_NUMERO': 'AB-77', 'ID_RECEBIVEL': None, 'VALOR_PRESENTE': None,
+            'DATA_REFERENCIA': None, 'NU_DOCUMENTO': 4567,
+            'DATA_VENCIMENTO_AJUSTADA': pd.Timestamp('2026-02-01'), 'DATA_VENCIMENTO': None,
+            'VALOR_NOMINAL': 'R$ 10,50', 'DATA_EMISSAO': None,
+            'DOC_CEDENTE': None, 'VALOR_AQUISICAO': None,
+            'DOC_SACADO': '11.222.333/0001-81', 'NOME_SACADO': None,
+            'CHAVE_NFE': '35251112345678000195', 'NOME_CEDENTE': 'X' * 80,
+        },
+    ])
+
+
+@pytest.mark.parametrize("coobrigacao,tipo_baixa", [("02", "TOTAL"), ("01", "PARCIAL")])
+def test_compilado_igual_ao_legado(coobrigacao, tipo_baixa):
+    parametros = dict(
+        cod_originador="202501", razao_social="58479927000136BANCO PAULISTA",
+        numero_banco="611", nome_banco="PAULISTA S.A.", seq_arquivo=1,
+        coobrigacao=coobrigacao, tipo_baixa=tipo_baixa
+    )
+    
+    legado = GeradorCNAB().gerar_arquivo_completo(_carteira(), **parametros)
+    compilado = GeradorCNABCompilado().gerar_arquivo_completo(_carteira(), **parametros)
+    
+    assert compilado == legado
+
+
+@pytest.mark.parametrize("gerador", [GeradorCNAB, GeradorCNABCompilado])
+def test_registros_sem_pandas(gerador):
+    carteira = _carteira()
+    esperado = [GeradorCNAB().gerar_detalhe(linha, indice + 2) for indice, linha in carteira.iterrows()]
+    
+    registros = carteira.astype(object).where(carteira.notna(), None).to_dict('records')
+    
+    assert gerador().gerar_lote(registros, 2) == esperado
+
+
+def test_lote_fatorado_igual_ao_legado():
+    carteira = pd.concat([_carteira()] * 30, ignore_index=True)
+    carteira.loc[::3, 'DOC_SACADO'] = 12345678909
+    carteira.loc[1::3, 'DOC_SACADO'] = 12345678909.0
+    esperado = [GeradorCNAB().gerar_detalhe(linha, indice + 2) for indice, linha in carteira.iterrows()]
+    
+    assert GeradorCNABCompilado().gerar_lote(carteira, 2) == esperado
+    
+    grupos = grupos_fatorados(LAYOUT_444, 'detalhe', ('NOME_CEDENTE', 'DOC_CEDENTE'))
+    externos = [tuple(nome_campo(campo) for campo in campos) for _, campos in grupos]
+    assert externos == [('TIPO_PESSOA_CEDENTE',), ('CEDENTE',)]
+    assert "doc_cedente =" not in compilar_registro(LAYOUT_444, 'detalhe', externos).__source__
+
+
+@pytest.mark.parametrize("gerador", [GeradorCNAB, GeradorCNABCompilado])
+def test_variantes_iguais_a_geracoes_separadas(tmp_path, gerador):
+    carteira = pd.concat([_carteira()] * 10, ignore_index=True)
+    base = dict(cod_originador="202501", razao_social="58479927000136BANCO PAULISTA",
+                numero_banco="611", nome_banco="PAULISTA S.A.", seq_arquivo=1)
+    variantes = [
+        base,
+        {**base, 'coobrigacao': "01", 'tipo_baixa': "PARCIAL"},
+        {**base, 'numero_banco': "237", 'nome_banco': "BRADESCO", 'seq_arquivo': 2},
+        {**base, 'tipo_baixa': "PARCIAL"},
+    ]
+    caminhos = [str(tmp_path / f"variante_{indice}.REM") for indice in range(len(variantes))]
+    
+    assert gerador().gerar_variantes(carteira, variantes, caminhos) == 22
+    
+    for variante, caminho in zip(variantes, caminhos):
+        esperado = GeradorCNAB().gerar_arquivo_completo(carteira, **variante)
+        with open(caminho, 'rb') as arquivo:
+            assert arquivo.read() == esperado.encode('latin-1')
+    
+    with pytest.raises(ValueError, match="sem parâmetros: seq_arquivo"):
+        gerador().gerar_variantes(carteira, [{'cod_originador': "1", 'razao_social': "A",
+                                              'numero_banco': "1", 'nome_banco': "B"}], caminhos[:1])
+
+
+def test_importar_motor_nao_carrega_pandas():
+    codigo = "import sys, cnab_engine; sys.exit('pandas' in sys.modules)"
+    
+    assert subprocess.run([sys.executable, "-c", codigo], cwd=os.path.dirname(__file__)).returncode == 0
+
+
+def test_sequencial_acima_do_limite_gera_erro():
+    linha = _carteira().iloc[0]
+    
+    with pytest.raises(ValueError):
+        GeradorCNABCompilado().gerar_detalhe(linha, 1_000_000)
+
+
+def test_variante_de_layout():
+    variante = derivar_layout(
+        LAYOUT_444, nome='444-teste', versao='1',
+        substituicoes={'detalhe': [Campo(274, 40, 'texto', "SEM ENDERECO", constante=True)]}
+    )
+    
+    gerar_detalhe = compilar_registro(variante, 'detalhe')
+    detalhe = gerar_detalhe(_carteira().iloc[0], 2)
+    
+    assert detalhe[274:314] == "SEM ENDERECO".ljust(40)
+    assert compilar_registro(variante, 'detalhe') is gerar_detalhe
+
+
+def test_variante_com_lacuna_e_rejeitada():
+    with pytest.raises(ValueError):
+        derivar_layout(
+            LAYOUT_444, nome='444-invalido', versao='1',
+            substituicoes={'trailer': [Campo(0, 1, 'constante', "9")]}
+        )
+
+
+@pytest.mark.parametrize("aleatoria", [False, True])
+def test_previa_igual_ao_arquivo_completo(aleatoria):
+    carteira = pd.concat([_carteira()] * 20, ignore_index=True)
+    gerador = GeradorCNAB()
+    linhas = gerador.gerar_arquivo_completo(carteira, "202501", "BANCO", "611", "PAULISTA", 1).split("\r\n")
+    
+    previa = gerador.gerar_previa(carteira, 5, aleatoria, semente=7)
+    
+    assert len(previa) == 5
+    for sequencial, detalhe, erro in previa:
+        assert erro is None
+        assert detalhe == linhas[sequencial - 1]
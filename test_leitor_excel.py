@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+from cnab_engine import GeradorCNAB
+from fontes_dados import iterar_lotes
+from leitor_excel import inferir_tipos_excel, ler_registros_excel
+from planejador import ESTRATEGIA_STREAMING, PlanoExecucao, gerar_remessa
+
+
+PARAMETROS = ("202501", "58479927000136BANCO PAULISTA", "611", "PAULISTA S.A.", 1)
+
+
+@pytest.fixture
+def carteira_xlsx(tmp_path):
+    workbook = Workbook()
+    aba = workbook.active
+    aba.append(['SEU_NUMERO', 'VALOR_NOMINAL', 'DATA_VENCIMENTO', 'DOC_SACADO', 'NOME_SACADO', 'CHAVE_NFE'])
+    for i in range(60):
+        aba.append([
+            i + 1, 10.5 + i, datetime(2026, 1, 1 + i % 28),
+            12345678909 if i < 59 else None,
+            "Maria Conceição" if i % 9 else "00123",
+            i if i < 40 else "sem chave",
+        ])
+        if i == 20:
+            aba.append([])
+    aba.append([])
+    
+    caminho = tmp_path / "carteira.xlsx"
+    workbook.save(caminho)
+    return str(caminho)
+
+
+@pytest.mark.parametrize("tamanho_lote", [7, 1000])
+def test_lotes_iguais_ao_read_excel(carteira_xlsx, tmp_path, tamanho_lote):
+    saida = tmp_path / "remessa.REM"
+    plano = PlanoExecucao(ESTRATEGIA_STREAMING, 61, 0, 0, tamanho_lote, 1)
+    
+    gerar_remessa(carteira_xlsx, carteira_xlsx, str(saida), *PARAMETROS, plano=plano)
+    
+    esperado = GeradorCNAB().gerar_arquivo_completo(pd.read_excel(carteira_xlsx), *PARAMETROS)
+    assert saida.read_bytes() == esperado.encode('latin-1')
+    assert [len(lote) for lote in iterar_lotes(carteira_xlsx, carteira_xlsx, 25)] == [25, 25, 11]
+
+
+def test_registros_com_tipos_do_pandas(carteira_xlsx):
+    registros = list(ler_registros_excel(carteira_xlsx))
+    
+    assert len(registros) == 61
+    assert registros[0].DOC_SACADO == 12345678909.0 and isinstance(registros[0].DOC_SACADO, float)
+    assert pd.isna(registros[21].SEU_NUMERO)
+    assert registros[0].CHAVE_NFE == 0 and registros[-1].CHAVE_NFE == "sem chave"
+    
+    esperado = GeradorCNAB().gerar_arquivo_completo(pd.read_excel(carteira_xlsx), *PARAMETROS)
+    gerado = "\r\n".join(GeradorCNAB().gerar_linhas(registros, *PARAMETROS))
+    assert gerado == esperado
+
+
+def test_tipos_sem_pandas(carteira_xlsx, tmp_path):
+    _, tipos = inferir_tipos_excel(carteira_xlsx)
+    
+    assert tipos == {
+        'SEU_NUMERO': 'real', 'VALOR_NOMINAL': 'real', 'DATA_VENCIMENTO': 'objeto',
+        'DOC_SACADO': 'real', 'NOME_SACADO': 'objeto', 'CHAVE_NFE': 'objeto',
+    }
+    
+    workbook = Workbook()
+    aba = workbook.active
+    aba.append(['SEU_NUMERO', 'DOC_SACADO', 'OBSERVACAO', 'VALOR_NOMINAL'])
+    for i in range(30):
+        aba.append([i + 1, "12345678909", "007", 10.5 + i])
+    caminho = tmp_path / "numerica.xlsx"
+    workbook.save(caminho)
+    
+    registros = list(ler_registros_excel(str(caminho)))
+    
+    assert registros[0].SEU_NUMERO == 1.0 and isinstance(registros[0].SEU_NUMERO, float)
+    esperado = GeradorCNAB().gerar_arquivo_completo(pd.read_excel(caminho), *PARAMETROS)
+    assert "\r\n".join(GeradorCNAB().gerar_linhas(registros, *PARAMETROS)) == esperado
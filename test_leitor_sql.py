@@ -0,0 +1,76 @@
+import io
+import sqlite3
+
+import pandas as pd
+import pytest
+from cnab_engine import GeradorCNAB
+from leitor_sql import gerar_remessa_sql, iterar_lotes_sql, mapear_colunas
+
+
+PARAMETROS = ("202501", "58479927000136BANCO PAULISTA", "611", "PAULISTA S.A.", 1)
+
+
+def _carteira(quantidade):
+    return pd.DataFrame({
+        'SEU_NUMERO': range(1, quantidade + 1),
+        'VALOR_NOMINAL': [100.25 + i for i in range(quantidade)],
+        'DATA_VENCIMENTO': [f"2026-01-{1 + i % 28:02d}" for i in range(quantidade)],
+        'DOC_SACADO': ["123.456.789-09"] * quantidade,
+        'NOME_SACADO': ["José da Silva"] * quantidade,
+        'NOME_CEDENTE': ["CEDENTE ALFA"] * quantidade,
+    })
+
+
+@pytest.fixture
+def conexao():
+    conexao = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES)
+    conexao.execute(
+        "CREATE TABLE recebiveis (seu_numero INTEGER, valor REAL, vencimento DATE, "
+        "doc_sacado TEXT, nome_sacado TEXT, nome_cedente TEXT, observacao TEXT)"
+    )
+    conexao.executemany(
+        "INSERT INTO recebiveis VALUES (?, ?, ?, ?, ?, ?, 'x')",
+        _carteira(30).itertuples(index=False)
+    )
+    yield conexao
+    conexao.close()
+
+
+def test_remessa_sql_igual_ao_gerador(conexao):
+    destino = io.BytesIO()
+    
+    total = gerar_remessa_sql(
+        conexao, "SELECT * FROM recebiveis WHERE seu_numero > ? ORDER BY seu_numero", destino,
+        *PARAMETROS, parametros=(0,), tamanho_lote=7,
+        mapeamento={'valor': 'VALOR_NOMINAL', 'vencimento': 'DATA_VENCIMENTO'}
+    )
+    
+    esperado = GeradorCNAB().gerar_arquivo_completo(_carteira(30), *PARAMETROS)
+    assert total == 32
+    assert destino.getvalue() == esperado.encode('latin-1')
+
+
+def test_lotes_e_mapeamento(conexao):
+    lotes = list(iterar_lotes_sql(conexao, "SELECT seu_numero, vencimento FROM recebiveis", tamanho_lote=7,
+                                  mapeamento={'vencimento': 'DATA_VENCIMENTO'}))
+    
+    assert [len(lote) for lote in lotes] == [7, 7, 7, 7, 2]
+    assert lotes[0][0].SEU_NUMERO == 1 and lotes[0][0].VALOR_NOMINAL is None
+    assert lotes[0][0].DATA_VENCIMENTO.strftime('%d%m%y') == "010126"
+    
+    with pytest.raises(ValueError, match="Campo de destino desconhecido"):
+        mapear_colunas([("valor",)], {'valor': 'VALOR_TOTAL'})
+    
+    assert mapear_colunas([("id",), ("valor",)], {'valor': ' valor_nominal '}) == {'VALOR_NOMINAL': 1}
+    
+    with pytest.raises(ValueError, match="Nenhuma coluna"):
+        next(iterar_lotes_sql(conexao, "SELECT observacao FROM recebiveis"))
+
+
+def test_cursor_recebido_continua_aberto(conexao):
+    cursor = conexao.cursor()
+    
+    lotes = list(iterar_lotes_sql(cursor, "SELECT seu_numero FROM recebiveis", tamanho_lote=10))
+    
+    assert [len(lote) for lote in lotes] == [10, 10, 10]
+    assert cursor.execute("SELECT COUNT(*) FROM recebiveis").fetchone() == (30,)
@@ -0,0 +1,33 @@
+import json
+import pandas as pd
+from cnab_engine import GeradorCNAB
+from manifesto import ManifestoRemessa
+
+
+def test_totais_por_cedente():
+    df = pd.DataFrame({
+        'SEU_NUMERO': [1, 2, 3, 4],
+        'VALOR_NOMINAL': [100.10, 200.20, 'R$ 300,30', None],
+        'VALOR_PRESENTE': [90, 180, 270, 5.5],
+        'VALOR_AQUISICAO': [80.01, None, 240, 1],
+        'NOME_CEDENTE': ['Cedente Alfa', 'Cedente Beta', 'Cedente Alfa', 'Cedente Beta'],
+        'DOC_CEDENTE': ['12.345.678/0001-95', '11.222.333/0001-81', '12.345.678/0001-95', '11.222.333/0001-81'],
+    })
+    gerador = GeradorCNAB()
+    manifesto = ManifestoRemessa()
+    
+    manifesto.registrar_detalhes(gerador.gerar_lote(df.itertuples(index=False), 2))
+    
+    assert manifesto.registros == 4
+    assert manifesto.totais == {'VALOR_NOMINAL': 60060, 'VALOR_PRESENTE': 54550, 'VALOR_AQUISICAO': 32101}
+    
+    subtotais = {item['CEDENTE']: item for item in manifesto.subtotais_cedentes()}
+    assert subtotais['CEDENTE ALFA 12345678000195'] == {
+        'CEDENTE': 'CEDENTE ALFA 12345678000195', 'registros': 2,
+        'VALOR_NOMINAL': 40040, 'VALOR_PRESENTE': 36000, 'VALOR_AQUISICAO': 32001,
+    }
+    assert subtotais['CEDENTE BETA 11222333000181']['registros'] == 2
+    
+    dados = json.loads(manifesto.para_json(arquivo="REMESSA.REM"))
+    assert dados['arquivo'] == "REMESSA.REM"
+    assert dados['total_registros'] == 6
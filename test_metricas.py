@@ -0,0 +1,78 @@
+import re
+import urllib.request
+
+import pandas as pd
+from cache_sessao import CacheSessao
+from metricas import (
+    TIPO_CONTEUDO, ARQUIVOS_GERADOS, RegistroMetricas, gravar_textfile,
+    iniciar_servidor_metricas, registrar_cache
+)
+from planejador import gerar_remessa
+
+
+def test_formato_openmetrics():
+    registro = RegistroMetricas()
+    erros = registro.contador("cnab_erros_linha", "Erros por tipo", ("tipo",))
+    duracao = registro.histograma("cnab_duracao_etapa_segundos", "Duração", (0.1, 1), ("etapa",))
+    
+    erros.inc(tipo="ValueError")
+    erros.inc(2, tipo='Key"Error')
+    duracao.observar(0.05, etapa="leitura")
+    duracao.observar(0.5, etapa="leitura")
+    duracao.observar(3, etapa="leitura")
+    
+    linhas = registro.exportar().splitlines()
+    
+    assert linhas[0] == "# TYPE cnab_erros_linha counter"
+    assert 'cnab_erros_linha_total{tipo="ValueError"} 1' in linhas
+    assert 'cnab_erros_linha_total{tipo="Key\\"Error"} 2' in linhas
+    assert 'cnab_duracao_etapa_segundos_bucket{etapa="leitura",le="0.1"} 1' in linhas
+    assert 'cnab_duracao_etapa_segundos_bucket{etapa="leitura",le="1"} 2' in linhas
+    assert 'cnab_duracao_etapa_segundos_bucket{etapa="leitura",le="+Inf"} 3' in linhas
+    assert 'cnab_duracao_etapa_segundos_count{etapa="leitura"} 3' in linhas
+    assert 'cnab_duracao_etapa_segundos_sum{etapa="leitura"} 3.55' in linhas
+    assert linhas[-1] == "# EOF"
+
+
+def test_geracao_exporta_metricas(tmp_path):
+    entrada = tmp_path / "carteira.csv"
+    pd.DataFrame({
+        'SEU_NUMERO': range(1, 51),
+        'VALOR_NOMINAL': [10.5 + i for i in range(50)],
+        'NOME_SACADO': ["José da Silva"] * 50,
+    }).to_csv(entrada, index=False)
+    
+    antes = ARQUIVOS_GERADOS.valor(origem='planejador')
+    gerar_remessa(str(entrada), "carteira.csv", str(tmp_path / "saida.REM"),
+                  "202501", "58479927000136BANCO PAULISTA", "611", "PAULISTA S.A.", 1)
+    assert ARQUIVOS_GERADOS.valor(origem='planejador') == antes + 1
+    
+    cache = CacheSessao(str(tmp_path / "cache"))
+    cache.guardar("a", b"x")
+    cache.obter("a")
+    cache.obter("b")
+    registrar_cache(cache, nome="teste")
+    
+    outro = CacheSessao(str(tmp_path / "outro"))
+    outro.obter("c")
+    registrar_cache(outro, nome="outro")
+    
+    caminho = tmp_path / "cnab.prom"
+    gravar_textfile(str(caminho))
+    texto = caminho.read_text(encoding='utf-8')
+    
+    assert re.search(r'cnab_registros_por_arquivo_bucket\{origem="planejador",le="100"\} \d+', texto)
+    assert 'cnab_cache_consultas_total{cache="teste",resultado="acerto_memoria"} 1' in texto
+    assert 'cnab_cache_taxa_acertos{cache="teste"} 0.5' in texto
+    assert 'cnab_cache_consultas_total{cache="outro",resultado="falta"} 1' in texto
+    assert texto.count("# TYPE cnab_cache_consultas counter") == 1
+    assert texto.endswith("# EOF\n")
+    
+    servidor = iniciar_servidor_metricas(porta=0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{servidor.server_address[1]}/metrics") as resposta:
+            assert resposta.headers["Content-Type"] == TIPO_CONTEUDO
+            assert "cnab_arquivos_gerados_total" in resposta.read().decode('utf-8')
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
@@ -0,0 +1,62 @@
+import hashlib
+import pandas as pd
+import pytest
+from cnab_engine import GeradorCNAB
+from manifesto import ManifestoRemessa
+from pipeline import ErroLinha, gerar_remessa_pipeline
+
+
+PARAMETROS = ("202501", "58479927000136BANCO PAULISTA", "611", "PAULISTA S.A.", 1)
+
+
+def _carteira(quantidade):
+    return pd.DataFrame({
+        'SEU_NUMERO': range(1, quantidade + 1),
+        'ID_RECEBIVEL': [str(1000 + i) for i in range(quantidade)],
+        'VALOR_NOMINAL': [10.5 + i for i in range(quantidade)],
+        'DATA_VENCIMENTO': ["15/01/2026"] * quantidade,
+        'DOC_SACADO': ["123.456.789-09"] * quantidade,
+        'NOME_SACADO': ["Maria Conceição"] * quantidade,
+    })
+
+
+@pytest.mark.parametrize("processos", [1, 2])
+def test_pipeline_igual_ao_gerador(tmp_path, processos):
+    entrada = tmp_path / "carteira.csv"
+    _carteira(500).to_csv(entrada, index=False)
+    saida = tmp_path / "remessa.REM"
+    manifesto = ManifestoRemessa()
+    
+    resultado = gerar_remessa_pipeline(
+        str(entrada), "carteira.csv", str(saida), *PARAMETROS,
+        tamanho_lote=37, processos=processos, janela=2, manifesto=manifesto
+    )
+    
+    esperado = GeradorCNAB().gerar_arquivo_completo(pd.read_csv(entrada), *PARAMETROS)
+    conteudo = saida.read_bytes()
+    assert conteudo == esperado.encode('latin-1')
+    assert resultado.total_detalhes == 500 and resultado.erros == []
+    assert manifesto.sha256 == hashlib.sha256(conteudo).hexdigest()
+
+
+def test_linhas_com_erro_vao_para_canal_lateral(tmp_path):
+    carteira = _carteira(100)
+    carteira.loc[[5, 40, 41], 'ID_RECEBIVEL'] = "ABC"
+    entrada = tmp_path / "carteira.csv"
+    carteira.to_csv(entrada, index=False)
+    saida = tmp_path / "remessa.REM"
+    recebidos = []
+    
+    resultado = gerar_remessa_pipeline(
+        str(entrada), "carteira.csv", str(saida), *PARAMETROS,
+        tamanho_lote=10, janela=1, ao_erro=recebidos.append
+    )
+    
+    assert [erro.linha for erro in resultado.erros] == [7, 42, 43]
+    assert all(isinstance(erro, ErroLinha) and erro.tipo == "ValueError" for erro in resultado.erros)
+    assert recebidos == resultado.erros
+    assert resultado.total_detalhes == 97
+    
+    validas = pd.read_csv(entrada).drop(index=[5, 40, 41]).reset_index(drop=True)
+    esperado = GeradorCNAB().gerar_arquivo_completo(validas, *PARAMETROS)
+    assert saida.read_bytes() == esperado.encode('latin-1')
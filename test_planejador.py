@@ -0,0 +1,147 @@
+import hashlib
+import importlib.util
+from io import BytesIO
+import pandas as pd
+import pytest
+from cnab_engine import GeradorCNAB
+from manifesto import ManifestoRemessa
+from planejador import (
+    ESTRATEGIA_MEMORIA, ESTRATEGIA_STREAMING, ESTRATEGIA_PARALELO, ESTRATEGIA_FAIXAS, MEMORIA_BASE_MB,
+    PlanoExecucao, csv_divisivel_em_faixas, dividir_faixas_csv, gerar_remessa, planejar_execucao, tamanho_saida
+)
+
+
+PARAMETROS = ("202501", "58479927000136BANCO PAULISTA", "611", "PAULISTA S.A.", 1)
+
+
+@pytest.fixture
+def carteira_csv(tmp_path):
+    quantidade = 2500
+    df = pd.DataFrame({
+        'SEU_NUMERO': range(1, quantidade + 1),
+        'VALOR_NOMINAL': [10.5 + i for i in range(quantidade)],
+        'DATA_VENCIMENTO': ["15/01/2026"] * quantidade,
+        'DOC_SACADO': ["123.456.789-09"] * quantidade,
+        'NOME_SACADO': ["Maria Conceição"] * quantidade,
+        'NOME_CEDENTE': ["Cedente Alfa"] * quantidade,
+    })
+    caminho = tmp_path / "carteira.csv"
+    df.to_csv(caminho, index=False)
+    return str(caminho)
+
+
+def test_orcamento_define_estrategia(carteira_csv):
+    assert planejar_execucao(carteira_csv, carteira_csv, 4096).estrategia == ESTRATEGIA_MEMORIA
+    
+    plano = planejar_execucao(carteira_csv, carteira_csv, 151)
+    assert plano.estrategia == ESTRATEGIA_STREAMING
+    assert plano.registros_estimados == 2500
+    assert plano.tamanho_saida_bytes == tamanho_saida(2500)
+    
+    com_download = planejar_execucao(carteira_csv, carteira_csv, 151, saida_em_memoria=True)
+    assert com_download.memoria_estimada_mb - MEMORIA_BASE_MB >= tamanho_saida(2500) / (1024 * 1024)
+    assert com_download.tamanho_lote <= plano.tamanho_lote
+
+
+def test_formatos_lidos_inteiros_planejados_em_memoria(tmp_path, monkeypatch):
+    xls = BytesIO(b"\0" * 4 * 1024 * 1024)
+    plano = planejar_execucao(xls, "carteira.xls", 200)
+    
+    assert plano.estrategia == ESTRATEGIA_MEMORIA
+    assert plano.memoria_estimada_mb > 200
+    
+    caminho = tmp_path / "carteira.parquet"
+    pd.DataFrame({'SEU_NUMERO': range(200_000), 'VALOR_NOMINAL': 10.5}).to_parquet(caminho)
+    assert planejar_execucao(str(caminho), "carteira.parquet", 160).estrategia == ESTRATEGIA_STREAMING
+    
+    encontrar = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda nome, *a: None if nome == 'pyarrow' else encontrar(nome, *a))
+    sem_pyarrow = planejar_execucao(str(caminho), "carteira.parquet", 160)
+    
+    assert sem_pyarrow.estrategia == ESTRATEGIA_MEMORIA
+    assert sem_pyarrow.memoria_estimada_mb > 160
+
+
+@pytest.mark.parametrize("plano", [
+    PlanoExecucao(ESTRATEGIA_MEMORIA, 2500, 0, 0, 2500, 1),
+    PlanoExecucao(ESTRATEGIA_STREAMING, 2500, 0, 0, 700, 1),
+    PlanoExecucao(ESTRATEGIA_PARALELO, 2500, 0, 0, 700, 2),
+    PlanoExecucao(ESTRATEGIA_FAIXAS, 2500, 0, 0, 700, 2),
+])
+def test_estrategias_geram_os_mesmos_bytes(carteira_csv, tmp_path, plano):
+    esperado = GeradorCNAB().gerar_arquivo_completo(pd.read_csv(carteira_csv), *PARAMETROS)
+    saida = tmp_path / "remessa.REM"
+    
+    manifesto = ManifestoRemessa()
+    
+    gerar_remessa(carteira_csv, carteira_csv, str(saida), *PARAMETROS, plano=plano, manifesto=manifesto)
+    
+    conteudo = saida.read_bytes()
+    assert conteudo == esperado.encode('latin-1')
+    assert len(conteudo) == tamanho_saida(2500)
+    assert manifesto.sha256 == hashlib.sha256(conteudo).hexdigest()
+    assert manifesto.registros == 2500
+    assert manifesto.totais['VALOR_NOMINAL'] == sum(1050 + 100 * i for i in range(2500))
+
+
+@pytest.mark.parametrize("estrategia, processos", [
+    (ESTRATEGIA_MEMORIA, 1), (ESTRATEGIA_STREAMING, 1), (ESTRATEGIA_PARALELO, 2), (ESTRATEGIA_FAIXAS, 2),
+])
+@pytest.mark.parametrize("coluna_fora_do_layout", [False, True])
+def test_tipos_inferidos_no_arquivo_inteiro(tmp_path, estrategia, processos, coluna_fora_do_layout):
+    quantidade = 3000
+    df = pd.DataFrame({
+        'SEU_NUMERO': range(1, quantidade + 1),
+        'VALOR_NOMINAL': [10.5 + i for i in range(quantidade)],
+        'DOC_SACADO': [12345678909] * quantidade,
+    })
+    if coluna_fora_do_layout:
+        df['OBSERVACAO'] = "fora do layout"
+    else:
+        df['NOME_SACADO'] = "Maria"
+        df['DOC_SACADO'] = df['DOC_SACADO'].astype("Int64")
+        df.loc[quantidade - 1, 'DOC_SACADO'] = None
+    
+    entrada = tmp_path / "carteira.csv"
+    df.to_csv(entrada, index=False)
+    saida = tmp_path / "remessa.REM"
+    
+    plano = PlanoExecucao(estrategia, quantidade, 0, 0, 1000, processos)
+    gerar_remessa(str(entrada), "carteira.csv", str(saida), *PARAMETROS, plano=plano)
+    
+    esperado = GeradorCNAB().gerar_arquivo_completo(pd.read_csv(entrada), *PARAMETROS)
+    assert saida.read_bytes() == esperado.encode('latin-1')
+
+
+@pytest.mark.parametrize("descricao", ['TUBO 1/2" PVC', '"Rua A\nBloco 2"'])
+def test_faixas_com_aspas_usam_streaming(tmp_path, descricao):
+    linhas = ["SEU_NUMERO,VALOR_NOMINAL,NOME_SACADO"]
+    linhas += [f"{i},{10 + i}.5,{descricao if i % 7 == 0 else 'Maria'}" for i in range(1, 2001)]
+    entrada = tmp_path / "carteira.csv"
+    entrada.write_text("\n".join(linhas) + "\n", encoding='utf-8')
+    saida = tmp_path / "remessa.REM"
+    
+    assert not csv_divisivel_em_faixas(str(entrada))
+    
+    plano = PlanoExecucao(ESTRATEGIA_FAIXAS, 2000, 0, 0, 300, 2)
+    executado = gerar_remessa(str(entrada), "carteira.csv", str(saida), *PARAMETROS, plano=plano)
+    
+    esperado = GeradorCNAB().gerar_arquivo_completo(pd.read_csv(entrada), *PARAMETROS)
+    assert executado.estrategia == ESTRATEGIA_STREAMING
+    assert saida.read_bytes() == esperado.encode('latin-1')
+
+
+def test_faixas_alinhadas_em_linhas(carteira_csv):
+    with open(carteira_csv, 'rb') as f:
+        conteudo = f.read()
+    
+    faixas = dividir_faixas_csv(carteira_csv, 7)
+    
+    assert csv_divisivel_em_faixas(carteira_csv)
+    
+    assert len(faixas) == 7
+    assert faixas[0][0] == conteudo.index(b"\n") + 1
+    assert faixas[-1][1] == len(conteudo)
+    for (_, fim), (inicio, _) in zip(faixas, faixas[1:]):
+        assert fim == inicio
+        assert conteudo[inicio - 1:inicio] == b"\n"
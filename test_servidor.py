@@ -0,0 +1,84 @@
+import http.client
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import pandas as pd
+import pytest
+from cnab_engine import GeradorCNAB
+from servidor import criar_servidor
+
+
+PARAMETROS = {
+    'cod_originador': "202501",
+    'razao_social': "58479927000136BANCO PAULISTA",
+    'numero_banco': "611",
+    'nome_banco': "PAULISTA S.A.",
+    'seq_arquivo': "1",
+}
+
+
+@pytest.fixture(scope="module")
+def servidor():
+    servidor = criar_servidor(porta=0, processos=2, tamanho_lote=7)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _carteira(quantidade):
+    return pd.DataFrame({
+        'SEU_NUMERO': range(1, quantidade + 1),
+        'ID_RECEBIVEL': range(1000, 1000 + quantidade),
+        'VALOR_NOMINAL': [100.25 + i for i in range(quantidade)],
+        'DATA_VENCIMENTO': ["2026-01-15"] * quantidade,
+        'DOC_SACADO': ["123.456.789-09"] * quantidade,
+        'NOME_SACADO': ["José da Silva"] * quantidade,
+    })
+
+
+def _enviar(servidor, corpo, **extras):
+    conexao = http.client.HTTPConnection("127.0.0.1", servidor.server_address[1], timeout=60)
+    query = urlencode({**PARAMETROS, 'formato': 'csv', **extras})
+    conexao.request("POST", f"/remessa?{query}", body=corpo)
+    resposta = conexao.getresponse()
+    conteudo = resposta.read()
+    conexao.close()
+    return resposta.status, conteudo
+
+
+def test_remessa_igual_ao_gerador(servidor):
+    df = _carteira(30)
+    
+    status, conteudo = _enviar(servidor, df.to_csv(index=False).encode('utf-8'))
+    esperado = GeradorCNAB().gerar_arquivo_completo(
+        pd.read_csv(io.StringIO(df.to_csv(index=False))),
+        PARAMETROS['cod_originador'], PARAMETROS['razao_social'],
+        PARAMETROS['numero_banco'], PARAMETROS['nome_banco'], 1
+    )
+    
+    assert status == 200
+    assert conteudo.decode('latin-1') == esperado
+
+
+def test_requisicoes_concorrentes(servidor):
+    corpos = [_carteira(quantidade).to_csv(index=False).encode('utf-8') for quantidade in (200, 3, 50)]
+    
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        respostas = list(executor.map(lambda corpo: _enviar(servidor, corpo), corpos))
+    
+    for (status, conteudo), quantidade in zip(respostas, (200, 3, 50)):
+        linhas = conteudo.decode('latin-1').split("\r\n")
+        assert status == 200
+        assert len(linhas) == quantidade + 2
+        assert linhas[-1][-6:] == str(quantidade + 2).zfill(6)
+
+
+def test_parametros_ausentes(servidor):
+    status, conteudo = _enviar(servidor, b"SEU_NUMERO\n1\n", cod_originador="")
+    
+    assert status == 400
+    assert b"cod_originador" in conteudo
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from cnab_engine import GeradorCNAB
+from validacao import documento_emitido, documentos_validos, obrigatorias_ausentes, validar_dataframe
+
+
+def _erros(relatorio, campo):
+    return relatorio[relatorio['CAMPO'] == campo][['LINHA', 'ERRO']].values.tolist()
+
+
+def test_documento_validado_como_gravado():
+    inteiros = pd.Series([1234567890, 12345678909, 1234567000195, 1234567891])
+    assert documentos_validos(inteiros).tolist() == [True, True, False, False]
+    
+    reais = pd.Series([1234567890.0, np.nan, 12345678909.0, 12345678000195.0])
+    assert documentos_validos(reais).tolist() == [False, False, False, False]
+    
+    textos = pd.Series(["012.345.678-90", "01.234.567/0001-95", "1234567890", ""])
+    assert documentos_validos(textos).tolist() == [True, True, True, False]
+    assert documentos_validos(textos, completar_zeros=False).tolist() == [True, True, False, False]
+    
+    gerador = GeradorCNAB()
+    for valor in [*inteiros, *reais, *textos]:
+        detalhe = gerador.gerar_detalhe({'DOC_SACADO': valor}, 2)
+        tipo, campo = detalhe[218:220], detalhe[220:234]
+        assert documento_emitido(valor) == (campo if tipo == "02" else campo[3:] if campo[:3] == "000" else "")
+
+
+def test_relatorio_de_documentos():
+    df = pd.DataFrame({
+        'DOC_SACADO': ["1234567890", np.nan, 12345678909.0],
+        'DOC_CEDENTE': ["01234567000195", None, 1234567000195],
+        'DATA_VENCIMENTO': ["15/01/2026"] * 3,
+        'VALOR_NOMINAL': [10.0] * 3,
+    })
+    
+    relatorio = validar_dataframe(df)
+    
+    assert _erros(relatorio, 'DOC_SACADO') == [[3, "Documento ausente"], [4, "CPF/CNPJ inválido"]]
+    assert _erros(relatorio, 'DOC_CEDENTE') == [[3, "Documento ausente"], [4, "CPF/CNPJ inválido"]]
+
+
+def test_colunas_obrigatorias():
+    assert obrigatorias_ausentes(['DATA_VENCIMENTO_AJUSTADA', 'NOME_SACADO']) == ['DOC_SACADO', 'VALOR_NOMINAL']
+    
+    relatorio = validar_dataframe(pd.DataFrame({'DATA_VENCIMENTO_AJUSTADA': ["15/01/2026"]}))
+    ausentes = relatorio[relatorio['ERRO'] == "Coluna obrigatória ausente"]
+    assert sorted(ausentes['CAMPO']) == ['DOC_SACADO', 'VALOR_NOMINAL']
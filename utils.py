@@ -1,13 +1,42 @@
 import re
 import unicodedata
+from collections.abc import Mapping
 from datetime import datetime
-from typing import Optional, Union
+from importlib.util import find_spec
+from typing import Any, Optional, Union
 
-try:
-    from unidecode import unidecode
-    UNIDECODE_AVAILABLE = True
-except ImportError:
-    UNIDECODE_AVAILABLE = False
+UNIDECODE_AVAILABLE = find_spec("unidecode") is not None
+
+_unidecode = None
+
+
+def _carregar_unidecode():
+    global _unidecode
+    
+    if _unidecode is None:
+        from unidecode import unidecode
+        _unidecode = unidecode
+    
+    return _unidecode
+
+
+def valor_preenchido(valor: Any) -> bool:
+    if valor is None:
+        return False
+    
+    try:
+        return bool(valor == valor)
+    except (TypeError, ValueError):
+        return False
+
+
+def obter_campo(linha: Any, campo: str) -> Any:
+    if isinstance(linha, Mapping):
+        valor = linha.get(campo)
+    else:
+        valor = getattr(linha, campo, None)
+    
+    return valor if valor_preenchido(valor) else None
 
 
 def format_text(value: Union[str, None], length: int) -> str:
@@ -94,7 +123,7 @@ def remover_acentos(texto: Union[str, None]) -> str:
     texto_str = str(texto)
     
     if UNIDECODE_AVAILABLE:
-        texto_sem_acento = unidecode(texto_str)
+        texto_sem_acento = _carregar_unidecode()(texto_str)
     else:
         texto_normalizado = unicodedata.normalize('NFD', texto_str)
         texto_sem_acento = ''.join(
@@ -0,0 +1,271 @@
+import re
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Callable, List
+
+from layout_cnab import documento_campo, tipo_pessoa
+from utils import formatar_numero, remover_acentos, valor_preenchido
+
+
+COLUNAS_RELATORIO = ['LINHA', 'CAMPO', 'ERRO', 'VALOR']
+
+COLUNAS_OBRIGATORIAS = {
+    'DOC_SACADO': ('DOC_SACADO',),
+    'DATA_VENCIMENTO': ('DATA_VENCIMENTO', 'DATA_VENCIMENTO_AJUSTADA'),
+    'VALOR_NOMINAL': ('VALOR_NOMINAL',),
+}
+
+TAMANHOS_VALOR = {
+    'VALOR_PRESENTE': 10,
+    'VALOR_NOMINAL': 13,
+    'VALOR_AQUISICAO': 13,
+}
+
+FORMATOS_DATA = [
+    '%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d',
+    '%d-%m-%Y', '%Y%m%d', '%d%m%Y'
+]
+
+PESOS_CPF_1 = np.arange(10, 1, -1)
+PESOS_CPF_2 = np.arange(11, 1, -1)
+PESOS_CNPJ_1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+PESOS_CNPJ_2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+
+def _mapear_unicos(serie: pd.Series, funcao: Callable) -> np.ndarray:
+    
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    resultados = np.array([funcao(valor) for valor in unicos], dtype=object)
+    
+    saida = np.empty(len(serie), dtype=object)
+    saida[:] = None
+    presentes = codigos >= 0
+    if len(resultados):
+        saida[presentes] = resultados[codigos[presentes]]
+    
+    return saida
+
+
+def _matriz_digitos(documentos: np.ndarray, tamanho: int) -> np.ndarray:
+    
+    bruto = "".join(documentos).encode('ascii')
+    return np.frombuffer(bruto, dtype=np.uint8).reshape(-1, tamanho).astype(np.int64) - 48
+
+
+def _cpf_valido(digitos: np.ndarray) -> np.ndarray:
+    
+    dv1 = (digitos[:, :9] @ PESOS_CPF_1) * 10 % 11 % 10
+    dv2 = (digitos[:, :10] @ PESOS_CPF_2) * 10 % 11 % 10
+    repetidos = (digitos == digitos[:, :1]).all(axis=1)
+    
+    return (dv1 == digitos[:, 9]) & (dv2 == digitos[:, 10]) & ~repetidos
+
+
+def _cnpj_valido(digitos: np.ndarray) -> np.ndarray:
+    
+    resto1 = (digitos[:, :12] @ PESOS_CNPJ_1) % 11
+    resto2 = (digitos[:, :13] @ PESOS_CNPJ_2) % 11
+    dv1 = np.where(resto1 < 2, 0, 11 - resto1)
+    dv2 = np.where(resto2 < 2, 0, 11 - resto2)
+    repetidos = (digitos == digitos[:, :1]).all(axis=1)
+    
+    return (dv1 == digitos[:, 12]) & (dv2 == digitos[:, 13]) & ~repetidos
+
+
+def documento_emitido(valor, completar_zeros: bool = True) -> str:
+    
+    documento = documento_campo(valor if valor_preenchido(valor) else None)
+    
+    if not completar_zeros:
+        return documento if documento.isdigit() else ""
+    
+    numero = formatar_numero(documento, 14)
+    if tipo_pessoa(documento) == "02":
+        return numero
+    return numero[3:] if numero.startswith("000") else ""
+
+
+def documentos_validos(documentos: pd.Series, completar_zeros: bool = True) -> np.ndarray:
+    
+    limpos = _mapear_unicos(documentos, lambda valor: documento_emitido(valor, completar_zeros))
+    tamanhos = np.array([len(doc) if doc is not None else 0 for doc in limpos], dtype=np.int64)
+    
+    validos = np.zeros(len(limpos), dtype=bool)
+    
+    for tamanho, verificador in ((11, _cpf_valido), (14, _cnpj_valido)):
+        selecionados = tamanhos == tamanho
+        if selecionados.any():
+            digitos = _matriz_digitos(limpos[selecionados], tamanho)
+            validos[selecionados] = verificador(digitos)
+    
+    return validos
+
+
+def _datas_validas(valores: pd.Series) -> np.ndarray:
+    
+    validas = valores.map(lambda valor: isinstance(valor, datetime)).to_numpy(dtype=bool)
+    pendentes = valores.map(lambda valor: isinstance(valor, str)).to_numpy(dtype=bool)
+    
+    for fmt in FORMATOS_DATA:
+        if not pendentes.any():
+            break
+        
+        convertidas = pd.to_datetime(valores[pendentes], format=fmt, errors='coerce')
+        validas[pendentes] = convertidas.notna().to_numpy()
+        pendentes &= ~validas
+    
+    return validas
+
+
+def _vencimentos(df: pd.DataFrame) -> pd.Series:
+    
+    vencimentos = pd.Series(None, index=df.index, dtype=object)
+    
+    for coluna in ('DATA_VENCIMENTO', 'DATA_VENCIMENTO_AJUSTADA'):
+        if coluna in df.columns:
+            serie = df[coluna].astype(object)
+            vencimentos = serie.where(serie.notna(), vencimentos)
+    
+    return vencimentos
+
+
+def _valores_centavos(serie: pd.Series) -> pd.Series:
+    
+    if pd.api.types.is_numeric_dtype(serie):
+        numeros = serie.astype('float64')
+    else:
+        textos = serie.astype(str).str.strip().str.replace('R$', '', regex=False)
+        textos = textos.str.replace(' ', '', regex=False).str.replace(',', '.', regex=False)
+        numeros = pd.to_numeric(textos.where(serie.notna()), errors='coerce')
+    
+    return np.round(numeros * 100)
+
+
+def _normalizar_seu_numero(valor) -> str:
+    
+    try:
+        texto = str(int(float(valor)))
+    except (ValueError, TypeError, OverflowError):
+        texto = str(valor)
+    
+    return re.sub(r'\D', '', texto).zfill(25)[:25]
+
+
+def _ocorrencias(mascara: np.ndarray, campo: str, erro: str, valores) -> pd.DataFrame:
+    
+    posicoes = np.flatnonzero(mascara)
+    return pd.DataFrame({
+        'LINHA': posicoes + 2,
+        'CAMPO': campo,
+        'ERRO': erro,
+        'VALOR': np.asarray(valores, dtype=object)[posicoes],
+    })
+
+
+def _coluna_ausente(campo: str) -> pd.DataFrame:
+    
+    return pd.DataFrame({
+        'LINHA': [pd.NA],
+        'CAMPO': [campo],
+        'ERRO': ["Coluna obrigatória ausente"],
+        'VALOR': [None],
+    })
+
+
+def obrigatorias_ausentes(colunas) -> List[str]:
+    
+    presentes = set(colunas)
+    return [
+        campo for campo, alternativas in COLUNAS_OBRIGATORIAS.items()
+        if not presentes.intersection(alternativas)
+    ]
+
+
+def validar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    
+    ocorrencias: List[pd.DataFrame] = [_coluna_ausente(campo) for campo in obrigatorias_ausentes(df.columns)]
+    
+    for campo in ('DOC_SACADO', 'DOC_CEDENTE'):
+        if campo not in df.columns:
+            continue
+        
+        serie = df[campo]
+        presentes = serie.notna().to_numpy()
+        validos = documentos_validos(serie, completar_zeros=campo == 'DOC_SACADO')
+        
+        ocorrencias.append(_ocorrencias(~presentes, campo, "Documento ausente", serie))
+        ocorrencias.append(_ocorrencias(presentes & ~validos, campo, "CPF/CNPJ inválido", serie))
+    
+    if 'DATA_VENCIMENTO_AJUSTADA' in df.columns or 'DATA_VENCIMENTO' in df.columns:
+        vencimentos = _vencimentos(df)
+        
+        codigos, unicos = pd.factorize(vencimentos)
+        validas = _datas_validas(pd.Series(unicos, dtype=object))
+        
+        ausentes = codigos < 0
+        invalidas = ~ausentes & ~validas[codigos]
+        
+        ocorrencias.append(_ocorrencias(ausentes, 'DATA_VENCIMENTO', "Data de vencimento ausente", vencimentos))
+        ocorrencias.append(_ocorrencias(invalidas, 'DATA_VENCIMENTO', "Data de vencimento inválida", vencimentos))
+    
+    for campo, tamanho in TAMANHOS_VALOR.items():
+        if campo not in df.columns:
+            continue
+        
+        serie = df[campo]
+        centavos = _valores_centavos(serie).to_numpy()
+        
+        ausentes = np.isnan(centavos)
+        nao_positivos = ~ausentes & (centavos <= 0)
+        excedentes = ~ausentes & (centavos >= 10 ** tamanho)
+        
+        ocorrencias.append(_ocorrencias(ausentes, campo, "Valor ausente ou inválido", serie))
+        ocorrencias.append(_ocorrencias(nao_positivos, campo, "Valor não positivo", serie))
+        ocorrencias.append(_ocorrencias(excedentes, campo, f"Valor excede {tamanho} dígitos", serie))
+    
+    for campo in ('SEU_NUMERO', 'ID_RECEBIVEL'):
+        if campo not in df.columns:
+            continue
+        
+        serie = df[campo]
+        if campo == 'SEU_NUMERO':
+            chaves = pd.Series(_mapear_unicos(serie, _normalizar_seu_numero), index=df.index)
+        else:
+            chaves = pd.to_numeric(serie, errors='coerce')
+            invalidos = (serie.notna() & chaves.isna()).to_numpy()
+            ocorrencias.append(_ocorrencias(invalidos, campo, "Identificador não numérico", serie))
+        
+        duplicados = (chaves.notna() & chaves.duplicated(keep=False)).to_numpy()
+        ocorrencias.append(_ocorrencias(duplicados, campo, "Identificador duplicado", serie))
+    
+    for campo in ('NOME_SACADO', 'NOME_CEDENTE'):
+        if campo not in df.columns:
+            continue
+        
+        serie = df[campo]
+        normalizados = _mapear_unicos(serie, lambda valor: remover_acentos(str(valor)).strip())
+        vazios = np.array([not nome for nome in normalizados], dtype=bool)
+        
+        ocorrencias.append(_ocorrencias(vazios, campo, "Nome vazio após normalização", serie))
+    
+    ocorrencias = [ocorrencia for ocorrencia in ocorrencias if len(ocorrencia)]
+    if not ocorrencias:
+        return pd.DataFrame(columns=COLUNAS_RELATORIO)
+    
+    relatorio = pd.concat(ocorrencias, ignore_index=True)
+    return relatorio.sort_values(['LINHA', 'CAMPO'], na_position='first', kind='stable').reset_index(drop=True)
+
+
+def resumir_validacao(relatorio: pd.DataFrame) -> pd.DataFrame:
+    
+    if relatorio.empty:
+        return pd.DataFrame(columns=['CAMPO', 'ERRO', 'OCORRENCIAS'])
+    
+    return (
+        relatorio.groupby(['CAMPO', 'ERRO'], sort=False)
+        .size()
+        .reset_index(name='OCORRENCIAS')
+        .sort_values('OCORRENCIAS', ascending=False)
+        .reset_index(drop=True)
+    )